@@ -1,12 +1,20 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, timedelta
+import json
 import random
 import os
-from scheduler import PatchScheduler
+import threading
+from collections import OrderedDict
+from scheduler import PatchScheduler, MAX_HORIZON_DAYS
+from multi_strategy_scheduler import multi_strategy_scheduler
+from schedule_context import context_cache
 from models import NetworkLoad, CrewMember, Patch
-from ml_predictor import predictor
 from supabase_client import supabase_fetcher
+from model_warmup import model_warmup
+from forecast_service import DAYS
+from forecast_horizon import ForecastHorizon
+from model_registry import model_registry, validate_site, DEFAULT_SITE
 
 # Configure Flask to serve frontend files
 app = Flask(__name__, static_folder='../frontend', static_url_path='')
@@ -19,17 +27,96 @@ scheduler = PatchScheduler()
 custom_patches = []
 next_patch_id = 100  # Start from 100 to avoid conflicts with Supabase IDs
 
-# Train ML model on startup
-print("Training ML model for network load prediction...")
+# Live schedules per site, updated patch by patch (built on first use), least recently used first;
+# bounded like the model registry (its sites plus the default site)
+LIVE_SCHEDULE_CAPACITY = model_registry.capacity + 1
+live_schedules = OrderedDict()
+_live_lock = threading.Lock()  # Guards the live schedules, the patch lists and _patch_version
+_live_building = {}  # site -> lock, so concurrent misses build a site's schedule once
+_patch_version = 0  # Bumped by every patch change, so builds can tell they missed one
+
+# IDs of cancelled Supabase patches (they can't be deleted there, so they are filtered out
+# here), oldest first; custom patches are deleted outright
+MAX_CANCELLED_PATCHES = 10000
+cancelled_patch_ids = OrderedDict()
+
+# Train or load ML models in the background; endpoints fall back to raw loads until ready
 print("Initializing Supabase connection...")
+model_warmup.start()
+
+def _request_site():
+    """Models of the site named by the `site` query arg or JSON field (default site if absent)"""
+    body = request.get_json(silent=True) if request.is_json else None
+    site = request.args.get('site') or (body or {}).get('site')
+    return model_registry.get(site)
+
+def _site_loads(site):
+    """Load history of a site (the default site reads the unfiltered table); RuntimeError if it has none"""
+    loads = supabase_fetcher.fetch_network_loads(None if site == DEFAULT_SITE else site)
+    if not loads:
+        raise RuntimeError(f"No load history for site {site}")
+    return loads
+
+def _site_error(e):
+    """Error response for a bad site ID (400) or a site without data (404)"""
+    return jsonify({'success': False, 'error': str(e)}), 400 if isinstance(e, ValueError) else 404
+
+def _current_patches():
+    """Supabase and custom patches, without cancelled ones"""
+    patches = supabase_fetcher.fetch_patches() + custom_patches
+    return [patch for patch in patches if patch.id not in cancelled_patch_ids]
+
+def _live_schedule(site, rebuild=False):
+    """
+    Live schedule of a site, built from every current patch on first use (or on rebuild)
+
+    Schedules are built outside _live_lock, one build per site at a time. A
+    build that overlaps a patch change (_patch_version moved) is redone, so
+    the stored schedule always includes every change made before it is stored.
+    """
+    with _live_lock:
+        live = None if rebuild else live_schedules.get(site)
+        if live is not None:
+            live_schedules.move_to_end(site)
+            return live
+        site_lock = _live_building.setdefault(site, threading.Lock())
+
+    with site_lock:
+        try:
+            # Another request may have built the schedule while this one waited
+            if not rebuild:
+                with _live_lock:
+                    live = live_schedules.get(site)
+                    if live is not None:
+                        live_schedules.move_to_end(site)
+                        return live
+
+            network_loads, crew = _site_loads(site), supabase_fetcher.fetch_crew_members()
+            while True:
+                with _live_lock:
+                    version = _patch_version
+                live = scheduler.incremental(network_loads, crew, _current_patches())
+
+                with _live_lock:
+                    if version != _patch_version:
+                        continue
+                    live_schedules[site] = live
+                    live_schedules.move_to_end(site)
+                    # Evict the least recently used sites
+                    while len(live_schedules) > LIVE_SCHEDULE_CAPACITY:
+                        evicted, _ = live_schedules.popitem(last=False)
+                        print(f"Live schedule of site {evicted} evicted")
+                    return live
+        finally:
+            with _live_lock:
+                _live_building.pop(site, None)
 
 # Sample data generation
 def generate_sample_network_loads():
     """Generate sample network load data for 7 days (weekly)"""
     loads = []
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     
-    for day_num, day_name in enumerate(days):
+    for day_num, day_name in enumerate(DAYS):
         for hour in range(24):
             # Weekday pattern (Mon-Fri)
             if day_num < 5:
@@ -78,14 +165,79 @@ def generate_sample_patches():
 
 @app.route('/api/network-load', methods=['GET'])
 def get_network_load():
-    """Get network load data for the week (7 days × 24 hours = 168 data points)"""
-    loads = supabase_fetcher.fetch_network_loads()
+    """Get network load data for the week (7 days × 24 hours = 168 data points)
+    
+    Query: site (optional)
+    """
+    try:
+        loads = _site_loads(validate_site(request.args.get('site')))
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
     return jsonify([load.to_dict() for load in loads])
 
+@app.route('/api/network-load/readings', methods=['POST'])
+def ingest_network_load_readings():
+    """Fold new meter readings into the load models without a full retrain
+    
+    Body: {"site": "feeder-7", "readings": [{"day_number": 0, "hour": 14, "minute": 0, "load_kilowatts": 52.3}, ...]}
+    The site is optional; its models must be resident or loadable
+    """
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    try:
+        readings = (request.json or {}).get('readings', [])
+        
+        new_loads = [
+            NetworkLoad(
+                hour=int(r['hour']),
+                load_kilowatts=float(r['load_kilowatts']),
+                day_of_week=DAYS[int(r['day_number']) % 7],
+                day_number=int(r['day_number']) % 7
+            )
+            for r in readings
+        ]
+        if not new_loads:
+            return jsonify({'success': False, 'error': 'No readings provided'}), 400
+        
+        # Random Forest: warm-started with trees fitted on the new batch
+        n_trees = models.rf.update(new_loads)
+        
+        # Linear Regression: sufficient-statistics update
+        columns = {
+            'day_num': [load.day_number for load in new_loads],
+            'hour': [load.hour for load in new_loads],
+            'minute': [float(r.get('minute', 0)) for r in readings],
+            'load_kw': [load.load_kilowatts for load in new_loads]
+        }
+        n_observations = models.lr.update(columns=columns)
+        
+        # Seasonal profile: exponential smoothing of the touched slots
+        n_profile_slots = models.profile.update(columns=columns)
+        
+        return jsonify({
+            'success': True,
+            'site': models.site,
+            'readings_ingested': len(new_loads),
+            'rf_estimators': n_trees,
+            'lr_observations': n_observations,
+            'profile_slots_updated': n_profile_slots
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/best-hours', methods=['GET'])
 def get_best_hours():
-    """Get the best hours for patching (lowest network load)"""
-    loads = supabase_fetcher.fetch_network_loads()
+    """Get the best hours for patching (lowest network load)
+    
+    Query: site (optional)
+    """
+    try:
+        loads = _site_loads(validate_site(request.args.get('site')))
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
     # Sort by load and get top 10 best hours
     sorted_loads = sorted(loads, key=lambda x: x.load_kilowatts)
     best_hours = sorted_loads[:10]
@@ -117,32 +269,36 @@ def get_crew():
 @app.route('/api/patches', methods=['GET', 'POST'])
 def handle_patches():
     """Get patches that need to be scheduled or create a new patch"""
-    global custom_patches, next_patch_id
+    global custom_patches, next_patch_id, _patch_version
     
     if request.method == 'GET':
         # Return all patches (from Supabase + custom in-memory)
-        patches = supabase_fetcher.fetch_patches() + custom_patches
+        patches = _current_patches()
         return jsonify([patch.to_dict() for patch in patches])
     
     elif request.method == 'POST':
         # Create new patch
         try:
             data = request.json
-            new_patch = Patch(
-                id=next_patch_id,
-                name=data.get('name', 'Unnamed Patch'),
-                duration=float(data.get('duration', 1)),
-                priority=int(data.get('priority', 3)),
-                min_crew=int(data.get('min_crew', 1))
-            )
-            custom_patches.append(new_patch)
-            next_patch_id += 1
+            name = data.get('name', 'Unnamed Patch')
+            duration = float(data.get('duration', 1))
+            priority = int(data.get('priority', 3))
+            min_crew = int(data.get('min_crew', 1))
+            
+            # Take an ID and insert into the live schedules without re-optimizing them
+            with _live_lock:
+                new_patch = Patch(id=next_patch_id, name=name, duration=duration, priority=priority, min_crew=min_crew)
+                custom_patches.append(new_patch)
+                next_patch_id += 1
+                _patch_version += 1
+                placements = {site: live.insert(new_patch) for site, live in live_schedules.items()}
             
             print(f"New patch created: {new_patch.name} (ID: {new_patch.id})")
             
             return jsonify({
                 'success': True,
-                'patch': new_patch.to_dict()
+                'patch': new_patch.to_dict(),
+                'live_schedule': placements
             }), 201
         except Exception as e:
             print(f"Error creating patch: {str(e)}")
@@ -151,22 +307,108 @@ def handle_patches():
                 'error': str(e)
             }), 400
 
+@app.route('/api/patches/<int:patch_id>', methods=['DELETE'])
+def cancel_patch(patch_id):
+    """Cancel a patch: drop it from the current patches and release its crew in the live schedules"""
+    global custom_patches, _patch_version
+    
+    in_supabase = any(patch.id == patch_id for patch in supabase_fetcher.fetch_patches())
+    removals = {}
+    with _live_lock:
+        found = patch_id not in cancelled_patch_ids and (
+            in_supabase or any(patch.id == patch_id for patch in custom_patches)
+        )
+        custom_patches = [patch for patch in custom_patches if patch.id != patch_id]
+        if found and in_supabase:
+            cancelled_patch_ids[patch_id] = True
+            while len(cancelled_patch_ids) > MAX_CANCELLED_PATCHES:
+                cancelled_patch_ids.popitem(last=False)
+        _patch_version += 1
+        
+        for site, live in live_schedules.items():
+            try:
+                removals[site] = live.remove(patch_id)
+            except KeyError:
+                continue
+    
+    if not found and not removals:
+        return jsonify({'success': False, 'error': f'Patch {patch_id} not found'}), 404
+    return jsonify({'success': True, 'patch_id': patch_id, 'live_schedule': removals})
+
+@app.route('/api/schedule/live', methods=['GET'])
+def get_live_schedule():
+    """Current live schedule of a site (kept up to date as patches are created and cancelled)
+    
+    Query: site (optional), rebuild=1 to re-optimize it from scratch
+    """
+    try:
+        site = validate_site(request.args.get('site'))
+        live = _live_schedule(site, rebuild=request.args.get('rebuild') == '1')
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    return jsonify({
+        'success': True,
+        'site': site,
+        'schedule': live.schedule(),
+        'stats': live.get_stats()
+    })
+
 @app.route('/api/optimize-schedule', methods=['POST'])
 def optimize_schedule():
-    """Calculate optimal patch schedule"""
+    """Calculate optimal patch schedule
+    
+    Body (optional): {"site": "feeder-7", "horizon_days": 7, "mode": "greedy", "time_budget": 1.0}
+    mode "exact" searches for the optimal schedule (branch-and-bound) for up
+    to time_budget seconds and reports the optimality gap of what it found;
+    mode "local_search" improves the greedy schedule by simulated annealing
+    (optional "iterations", "time_limit" and "seed")
+    """
     global custom_patches
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
     try:
         # Get data from Supabase
-        network_loads = supabase_fetcher.fetch_network_loads()
+        network_loads = _site_loads(models.site)
         crew = supabase_fetcher.fetch_crew_members()
-        patches = supabase_fetcher.fetch_patches() + custom_patches  # Include custom patches
+        patches = _current_patches()  # Include custom patches, without cancelled ones
+        
+        # Run optimization over the week (or the requested number of days)
+        options = request.get_json(silent=True) or {}
+        # Horizons longer than MAX_HORIZON_DAYS are clamped to it
+        horizon_days = min(int(options.get('horizon_days', 7)), MAX_HORIZON_DAYS)
+        mode = options.get('mode', 'greedy')
         
-        # Run optimization
-        schedule = scheduler.optimize(network_loads, crew, patches)
+        optimizer_stats = None
+        if mode == 'exact':
+            time_budget = options.get('time_budget')
+            result = scheduler.optimize_exact(
+                network_loads, crew, patches, horizon_days=horizon_days,
+                time_budget=None if time_budget is None else float(time_budget)
+            )
+            schedule, optimizer_stats = result['schedule'], result['optimizer']
+        elif mode in ('greedy', 'local_search'):
+            schedule = scheduler.optimize(network_loads, crew, patches, horizon_days=horizon_days)
+            if mode == 'local_search':
+                result = scheduler.improve(
+                    schedule, network_loads, crew, horizon_days=horizon_days,
+                    iterations=options.get('iterations'), time_limit=options.get('time_limit'),
+                    seed=options.get('seed', 0)
+                )
+                schedule, optimizer_stats = result['schedule'], result['local_search']
+        else:
+            raise ValueError(f"mode must be 'greedy', 'exact' or 'local_search', got {mode!r}")
         
         return jsonify({
             'success': True,
+            'site': models.site,
+            'mode': mode,
+            'horizon_days': horizon_days,
             'schedule': schedule,
+            'optimizer': optimizer_stats,
             'message': 'Schedule optimized successfully'
         })
     except Exception as e:
@@ -175,6 +417,46 @@ def optimize_schedule():
             'error': str(e)
         }), 400
 
+@app.route('/api/schedule-options', methods=['POST'])
+def get_schedule_options():
+    """Schedule options of every strategy, computed in parallel, side by side
+    
+    Body (optional): {"site": "feeder-7", "local_search": {"iterations": 5000, "seed": 0}}
+    Every strategy reports its runtime_ms; total_ms is the wall time of all of them.
+    The strategies share one precomputed ScheduleContext (see context_cache)
+    """
+    global custom_patches
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    try:
+        network_loads = _site_loads(models.site)
+        crew = supabase_fetcher.fetch_crew_members()
+        patches = _current_patches()
+        local_search = (request.get_json(silent=True) or {}).get('local_search')
+        
+        start_time = datetime.now()
+        strategies = multi_strategy_scheduler.generate_multiple_schedules(
+            patches, crew, network_loads, local_search=local_search, optimizer=models.optimizer
+        )
+        total_ms = (datetime.now() - start_time).total_seconds() * 1000
+        
+        return jsonify({
+            'success': True,
+            'site': models.site,
+            'strategies': strategies,
+            'total_ms': round(total_ms, 2),
+            'slowest_ms': max(strategy['runtime_ms'] for strategy in strategies.values()),
+            'context_cache': context_cache.get_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/schedule-patch', methods=['POST'])
 def schedule_patch():
     """Manually schedule a specific patch"""
@@ -197,7 +479,7 @@ def get_stats():
     global custom_patches
     network_loads = supabase_fetcher.fetch_network_loads()
     crew = supabase_fetcher.fetch_crew_members()
-    patches = supabase_fetcher.fetch_patches() + custom_patches  # Include custom patches
+    patches = _current_patches()  # Include custom patches, without cancelled ones
     
     # Handle empty network loads
     avg_load = sum(load.load_kilowatts for load in network_loads) / len(network_loads) if network_loads else 0
@@ -236,6 +518,11 @@ def get_stats():
 def chat():
     """ML-powered chatbot for patch scheduling recommendations"""
     global custom_patches
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
     try:
         data = request.json
         user_message = data.get('message', '').lower()
@@ -244,13 +531,12 @@ def chat():
             return jsonify({'success': False, 'error': 'No message provided'}), 400
         
         # Get current system context from Supabase
-        network_loads = supabase_fetcher.fetch_network_loads()
+        network_loads = _site_loads(models.site)
         crew = supabase_fetcher.fetch_crew_members()
-        patches = supabase_fetcher.fetch_patches() + custom_patches  # Include custom patches
+        patches = _current_patches()  # Include custom patches, without cancelled ones
         
-        # Ensure model is trained
-        if not predictor.is_trained:
-            predictor.train(network_loads)
+        # Models warm up in the background; until then answers use the raw loads
+        week = models.rf.get_week_forecast(network_loads)
         
         # Generate response based on question type
         response_text = ""
@@ -258,7 +544,7 @@ def chat():
         # Check what user is asking about
         if 'best' in user_message or 'optimal' in user_message or 'when' in user_message:
             if any(word in user_message for word in ['time', 'hour', 'window', 'when']):
-                windows = predictor.find_optimal_windows(2, network_loads)
+                windows = models.rf.find_optimal_windows(2, network_loads)
                 response_text = "⚡ **Optimal Maintenance Windows:**\n\n"
                 response_text += "Based on ML predictions of network load patterns:\n\n"
                 for i, window in enumerate(windows[:5], 1):
@@ -270,16 +556,16 @@ def chat():
             response_text = "🔮 **Network Load Predictions:**\n\n"
             response_text += "Our ML model predicts the following load patterns:\n\n"
             for day in ['Monday', 'Friday', 'Saturday', 'Sunday']:
-                day_num = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'].index(day)
-                night_load = predictor.predict_load(day_num, 3)
-                day_load = predictor.predict_load(day_num, 14)
+                day_num = DAYS.index(day)
+                night_load = week[day_num, 3]
+                day_load = week[day_num, 14]
                 response_text += f"**{day}:**\n"
                 response_text += f"  • Night (3 AM): {night_load:.1f} kW ✅ Low\n"
                 response_text += f"  • Afternoon (2 PM): {day_load:.1f} kW ⚠️ High\n\n"
         
         elif 'schedule' in user_message or 'patch' in user_message:
             # Provide patch-specific recommendations
-            response_text = predictor.get_recommendations(patches, crew, network_loads)
+            response_text = models.rf.get_recommendations(patches, crew, network_loads)
         
         elif 'crew' in user_message or 'staff' in user_message:
             response_text = "👥 **Crew Analysis:**\n\n"
@@ -293,7 +579,7 @@ def chat():
             response_text += "• Recommendation: Assign high-skill crew to critical patches\n"
         
         elif 'model' in user_message or 'how' in user_message:
-            stats = predictor.get_model_stats()
+            stats = models.rf.get_model_stats()
             response_text = "🤖 **ML Model Information:**\n\n"
             response_text += f"• Model Type: {stats.get('model_type', 'Random Forest')}\n"
             response_text += f"• Training Status: {'Trained ✅' if stats['trained'] else 'Not trained ❌'}\n"
@@ -306,7 +592,7 @@ def chat():
         
         else:
             # General recommendations
-            response_text = predictor.get_recommendations(patches, crew, network_loads)
+            response_text = models.rf.get_recommendations(patches, crew, network_loads)
         
         return jsonify({
             'success': True,
@@ -323,28 +609,149 @@ def chat():
 
 @app.route('/api/ml-stats', methods=['GET'])
 def get_ml_stats():
-    """Get ML model statistics and predictions"""
+    """Get ML model statistics and predictions
+    
+    Query: site (optional)
+    """
     try:
-        network_loads = supabase_fetcher.fetch_network_loads()
-        
-        # Train if not already trained
-        if not predictor.is_trained:
-            predictor.train(network_loads)
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    try:
+        network_loads = _site_loads(models.site)
         
-        # Get model stats
-        stats = predictor.get_model_stats()
+        # Get model stats (untrained while warming up)
+        stats = models.rf.get_model_stats()
         
-        # Get optimal windows
-        optimal_windows = predictor.find_optimal_windows(2, network_loads)
+        # Get optimal windows (seasonal profile until the model is ready)
+        optimal_windows = models.rf.find_optimal_windows(2, network_loads)
         
         return jsonify({
             'success': True,
+            'site': models.site,
             'model_stats': stats,
+            'fallback_model_stats': models.profile.get_model_stats(),
+            'model_status': model_warmup.get_status(),
             'optimal_windows': optimal_windows[:5]
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _parse_datetime(args, name):
+    """ISO datetime query arg (None if absent); ValueError if malformed"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        # fromisoformat() before Python 3.11 does not take a 'Z' suffix
+        return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} datetime {value!r}: use ISO 8601, e.g. 2025-01-06T08:00")
+
+def _horizon_from_args(args, models):
+    """
+    ForecastHorizon of a site's RF load model and its from/to range from query args:
+    start, weeks, resolution_minutes, from, to
+    
+    start, from and to must all be naive or all timezone-aware (ValueError
+    otherwise); without a start the horizon begins now, in from/to's zone.
+    """
+    start, t0, t1 = (_parse_datetime(args, name) for name in ('start', 'from', 'to'))
+    given = [when for when in (start, t0, t1) if when is not None]
+    if len({when.tzinfo is None for when in given}) > 1:
+        raise ValueError("start, from and to must all be naive or all include a UTC offset")
+    if start is None and given:
+        start = datetime.now(given[0].tzinfo)
+    
+    horizon = ForecastHorizon(
+        models.rf,
+        start=start,
+        weeks=int(args.get('weeks', 4)),
+        resolution_minutes=int(args.get('resolution_minutes', 60)),
+        fallback=models.profile
+    )
+    return horizon, t0, t1
+
+@app.route('/api/forecast/horizon', methods=['GET'])
+def get_forecast_horizon():
+    """Stream the load forecast over a multi-week horizon as NDJSON, one line per chunk (day)
+    
+    Query: site, start, weeks (default 4), resolution_minutes (60/30/15), and
+    an optional from/to range (ISO datetimes) inside the horizon
+    """
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    try:
+        horizon, t0, t1 = _horizon_from_args(request.args, models)
+        horizon.grid.slot_range(t0, t1)  # Reject bad ranges before streaming
+        horizon.loads(0, 1)  # Fail before streaming if no model can forecast yet
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def generate():
+        for chunk_start, loads in horizon.chunks(t0, t1):
+            yield json.dumps({
+                'start': chunk_start.isoformat(),
+                'resolution_minutes': horizon.grid.resolution_minutes,
+                'loads': [round(float(load), 2) for load in loads]
+            }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/forecast/windows', methods=['GET'])
+def get_forecast_windows():
+    """Lowest-load windows over a multi-week horizon, keyed by real datetimes
+    
+    Query: site, duration_hours (default 2), top_k (default 10), start, weeks,
+    resolution_minutes, and an optional from/to range (ISO datetimes)
+    """
+    try:
+        models = _request_site()
+    except (ValueError, RuntimeError) as e:
+        return _site_error(e)
+    
+    try:
+        horizon, t0, t1 = _horizon_from_args(request.args, models)
+        windows = horizon.best_windows(
+            float(request.args.get('duration_hours', 2)),
+            top_k=int(request.args.get('top_k', 10)),
+            t0=t0,
+            t1=t1
+        )
+        return jsonify({
+            'success': True,
+            'site': models.site,
+            'horizon': horizon.get_stats(),
+            'windows': windows
+        })
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sites', methods=['GET'])
+def get_sites():
+    """Model registry: resident sites (least recently used first) and hit/miss/eviction counters"""
+    return jsonify({
+        'success': True,
+        'registry': model_registry.get_stats()
+    })
+
+@app.route('/api/ready', methods=['GET'])
+def get_readiness():
+    """Readiness probe: 200 once every ML model is warm, 503 while warming up"""
+    ready = model_warmup.is_ready()
+    return jsonify({
+        'ready': ready,
+        'models': model_warmup.get_status()
+    }), 200 if ready else 503
+
 # Serve frontend
 @app.route('/')
 def serve_frontend():
@@ -352,12 +759,9 @@ def serve_frontend():
     return send_from_directory(app.static_folder, 'index.html')
 
 if __name__ == '__main__':
-    # Train ML model on startup with data from Supabase
+    # ML models are already warming up in the background (see model_warmup.start above)
     print("Initializing ML-powered patch advisor...")
-    initial_loads = supabase_fetcher.fetch_network_loads()
-    predictor.train(initial_loads)
-    print(f"Model trained successfully on {len(initial_loads)} data points")
-    print(f"Model stats: {predictor.get_model_stats()}")
+    print(f"Model status: {model_warmup.get_status()}")
     
     app.run(debug=True, port=5000)
 
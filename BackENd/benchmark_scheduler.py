@@ -0,0 +1,109 @@
+"""
+Scheduler Benchmark
+Times PatchScheduler.optimize over growing horizons (1 day to several weeks)
+and resolutions, and the dense load table against the linear scan it replaced
+
+Usage: python benchmark_scheduler.py [--patches N] [--crew N] [--repeat N]
+"""
+
+import sys
+import time
+import random
+from models import NetworkLoad, CrewMember, Patch
+from scheduler import PatchScheduler
+from forecast_service import DAYS
+
+HORIZONS_DAYS = (1, 7, 14, 28, 56)
+RESOLUTIONS = (60, 15)
+
+
+def sample_inputs(n_patches=20, n_crew=10, seed=0):
+    """Fixed random week of loads, crew shifts and patches"""
+    rng = random.Random(seed)
+    loads = [
+        NetworkLoad(hour=hour, load_kilowatts=rng.uniform(5, 85), day_of_week=day, day_number=day_num)
+        for day_num, day in enumerate(DAYS) for hour in range(24)
+    ]
+    crew = []
+    for i in range(n_crew):
+        start = rng.randint(0, 20)
+        crew.append(CrewMember(name=f"crew-{i}", available_hours=[(start, min(24, start + rng.randint(4, 10)))],
+                               skill_level=rng.randint(1, 5)))
+    patches = [
+        Patch(id=i, name=f"patch-{i}", duration=rng.choice([0.5, 1, 1.5, 2, 3, 4]),
+              priority=rng.randint(1, 5), min_crew=rng.randint(1, 3))
+        for i in range(n_patches)
+    ]
+    return loads, crew, patches
+
+
+def time_call(fn, repeat):
+    """Best wall time of repeat calls, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_horizons(loads, crew, patches, repeat=5):
+    """optimize() time for every horizon and resolution"""
+    scheduler = PatchScheduler()
+    rows = []
+    for resolution in RESOLUTIONS:
+        slots_per_day = 24 * 60 // resolution
+        for days in HORIZONS_DAYS:
+            seconds = time_call(
+                lambda: scheduler.optimize(loads, crew, patches, resolution_minutes=resolution, horizon_days=days),
+                repeat
+            )
+            n_slots = days * slots_per_day
+            rows.append({
+                'resolution_minutes': resolution,
+                'horizon_days': days,
+                'slots': n_slots,
+                'ms': seconds * 1000,
+                'us_per_slot_patch': seconds * 1e6 / (n_slots * len(patches))
+            })
+    return rows
+
+
+def benchmark_lookups(loads, repeat=5):
+    """Load lookups for every hour of the week: linear scan vs dense table"""
+    table = PatchScheduler().load_table(loads)
+
+    def scan():
+        for day_num in range(7):
+            for hour in range(24):
+                next((l.load_kilowatts for l in loads if l.day_number == day_num and l.hour == hour), 50)
+
+    def lookup():
+        for day_num in range(7):
+            for hour in range(24):
+                table[day_num, hour]
+
+    return time_call(scan, repeat) * 1000, time_call(lookup, repeat) * 1000
+
+
+def format_report(rows, scan_ms, lookup_ms):
+    """Plain-text table of a benchmark run"""
+    lines = [f"{'resolution':>10}{'days':>6}{'slots':>8}{'ms':>10}{'us/slot/patch':>15}"]
+    for r in rows:
+        lines.append(
+            f"{r['resolution_minutes']:>10}{r['horizon_days']:>6}{r['slots']:>8}"
+            f"{r['ms']:>10.2f}{r['us_per_slot_patch']:>15.3f}"
+        )
+    lines.append(f"168 load lookups: linear scan {scan_ms:.3f} ms, dense table {lookup_ms:.3f} ms")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+
+    def option(name, default):
+        return int(args[args.index(name) + 1]) if name in args else default
+
+    loads, crew, patches = sample_inputs(option('--patches', 20), option('--crew', 10))
+    repeat = option('--repeat', 5)
+    print(format_report(benchmark_horizons(loads, crew, patches, repeat), *benchmark_lookups(loads, repeat)))
@@ -0,0 +1,188 @@
+"""
+Crew Availability Index
+Precomputes when every crew member can work as a bitset over the slots of
+the week (bit i = slot i) plus per-slot counts of free and booked crew, so
+availability checks are bitwise operations and bookings update the index
+incrementally instead of rescanning every member's available hours
+"""
+
+import numpy as np
+from forecast_service import DAYS_PER_WEEK
+from slot_grid import get_slot_grid
+
+# Best start slots best_staffable() checks one by one before checking every slot at once
+STAFF_CHECKS = 8
+
+
+def _to_bits(mask):
+    """Bitset (Python int, bit i = element i) of a boolean array"""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+    return int.from_bytes(packed.tobytes(), 'little')
+
+
+class CrewIndex:
+    """Per-crew availability/booking bitsets and per-slot crew counts over a cycle of days"""
+
+    def __init__(self, crew, grid=None, days=DAYS_PER_WEEK, cyclic=True):
+        """
+        Args:
+            crew: List of CrewMember (available_hours repeat every day)
+            grid: SlotGrid giving the slot size (the default grid if None)
+            days: Days indexed from Monday on
+            cyclic: The days recur, so windows wrap from the last slot to the
+                    first; False for a real horizon, where windows may not
+                    pass its last slot
+        """
+        self.grid = grid or get_slot_grid()
+        self.crew = list(crew)
+        self.cyclic = cyclic
+        self.n_slots = days * self.grid.slots_per_day
+        self.full_mask = (1 << self.n_slots) - 1
+
+        # Daily availability repeated over every day of the cycle
+        daily = self.grid.crew_availability(self.crew)
+        self.available = [_to_bits(np.tile(row, days)) for row in daily]
+        self.busy = [0] * len(self.crew)
+
+        # Whether every member is free (available and not booked) in every slot,
+        # crew free and crew booked in every slot
+        self.free = np.tile(daily, (1, days)).reshape(len(self.crew), self.n_slots)
+        self.free_counts = np.tile(daily.sum(axis=0), days).astype(np.int32)
+        self.booked_counts = np.zeros(self.n_slots, dtype=np.int32)
+
+    def copy(self):
+        """Independent index with the same availability and bookings (no bitsets rebuilt)"""
+        other = object.__new__(CrewIndex)
+        other.__dict__.update(self.__dict__)
+        other.busy = list(self.busy)
+        other.free = self.free.copy()
+        other.free_counts = self.free_counts.copy()
+        other.booked_counts = self.booked_counts.copy()
+        return other
+
+    def _check_window(self, start_slot, duration_slots):
+        """ValueError for a window past the end of a non-cyclic horizon"""
+        if not self.cyclic and (start_slot < 0 or start_slot + duration_slots > self.n_slots):
+            raise ValueError(
+                f"Window of {duration_slots} slots from slot {start_slot} passes the end of the horizon ({self.n_slots} slots)"
+            )
+
+    def window_mask(self, start_slot, duration_slots=1):
+        """Bitset of duration_slots slots from start_slot, wrapping at the end of a cycle"""
+        self._check_window(start_slot, duration_slots)
+        if duration_slots >= self.n_slots:
+            return self.full_mask
+        start_slot %= self.n_slots
+        mask = ((1 << duration_slots) - 1) << start_slot
+        # Bits past the end of the cycle continue at slot 0
+        return (mask & self.full_mask) | (mask >> self.n_slots)
+
+    def window_slots(self, start_slot, duration_slots=1):
+        """Slot indices of a window (wrapping at the end of a cycle)"""
+        self._check_window(start_slot, duration_slots)
+        return (start_slot + np.arange(min(duration_slots, self.n_slots))) % self.n_slots
+
+    def is_free(self, member, start_slot, duration_slots=1):
+        """Whether crew member (index) is available and unbooked for the whole window"""
+        mask = self.window_mask(start_slot, duration_slots)
+        return (self.available[member] & ~self.busy[member] & mask) == mask
+
+    def free_crew(self, start_slot, duration_slots=1):
+        """Indices of crew available and unbooked for the whole window"""
+        mask = self.window_mask(start_slot, duration_slots)
+        return [
+            i for i, (available, busy) in enumerate(zip(self.available, self.busy))
+            if (available & ~busy & mask) == mask
+        ]
+
+    def idle_crew(self, start_slot, duration_slots=1):
+        """Indices of crew not booked anywhere in the window (regardless of their hours)"""
+        mask = self.window_mask(start_slot, duration_slots)
+        return [i for i, busy in enumerate(self.busy) if not (busy & mask)]
+
+    def free_matrix(self):
+        """(n_crew, n_slots) boolean: whether every member is available and unbooked in every slot"""
+        return self.free.copy()
+
+    def window_free(self, duration_slots=1):
+        """
+        (n_crew, n_slots) boolean: whether every member is available and unbooked for the
+        whole window of duration_slots starting in every slot (windows wrap at the end)
+        """
+        duration_slots = min(duration_slots, self.n_slots)
+        if duration_slots <= 1:
+            return self.free.copy()
+        # Free slots per window from prefix sums over the cycle extended by the wrap-around
+        extended = np.concatenate((self.free, self.free[:, :duration_slots - 1]), axis=1)
+        sums = np.zeros((len(self.crew), extended.shape[1] + 1), dtype=np.int32)
+        np.cumsum(extended, axis=1, out=sums[:, 1:])
+        return sums[:, duration_slots:duration_slots + self.n_slots] - sums[:, :self.n_slots] == duration_slots
+
+    def staffable_counts(self, duration_slots=1):
+        """Crew free for the whole window starting in every slot (what a patch can actually be staffed with)"""
+        return self.window_free(duration_slots).sum(axis=0)
+
+    def best_staffable(self, scores, duration_slots, min_crew):
+        """
+        Best-scoring start slot (the earliest among ties) where min_crew members are each
+        free for the whole window, and those members; (None, []) if no slot with a
+        non-negative score has them
+
+        scores should already be -1 where the per-slot counts rule a slot out: the best
+        slots are checked one by one, and only after STAFF_CHECKS misses are all slots
+        checked at once
+        """
+        scores = np.array(scores, dtype=float)
+        for _ in range(STAFF_CHECKS):
+            slot = int(np.argmax(scores))
+            if scores[slot] < 0:
+                return None, []
+            members = self.free_crew(slot, duration_slots)
+            if len(members) >= min_crew:
+                return slot, members[:min_crew]
+            scores[slot] = -1
+
+        scores[self.staffable_counts(duration_slots) < min_crew] = -1
+        slot = int(np.argmax(scores))
+        if scores[slot] < 0:
+            return None, []
+        return slot, self.free_crew(slot, duration_slots)[:min_crew]
+
+    def min_free(self, start_slot, duration_slots=1):
+        """Fewest free crew in any slot of the window (unbounded for an empty window)"""
+        slots = self.window_slots(start_slot, duration_slots)
+        return int(self.free_counts[slots].min()) if len(slots) else float('inf')
+
+    def min_idle(self, start_slot, duration_slots=1):
+        """Fewest unbooked crew in any slot of the window (unbounded for an empty window)"""
+        slots = self.window_slots(start_slot, duration_slots)
+        return len(self.crew) - int(self.booked_counts[slots].max()) if len(slots) else float('inf')
+
+    def book(self, members, start_slot, duration_slots=1):
+        """Mark crew members (indices) busy for a window, updating the slot counts"""
+        self._set_busy(members, start_slot, duration_slots, booked=True)
+
+    def release(self, members, start_slot, duration_slots=1):
+        """Undo book() for a window"""
+        self._set_busy(members, start_slot, duration_slots, booked=False)
+
+    def _set_busy(self, members, start_slot, duration_slots, booked):
+        """Set or clear the busy bits of a window, moving the counts of the slots that change"""
+        slots = self.window_slots(start_slot, duration_slots)
+        mask = self.window_mask(start_slot, duration_slots)
+        step = 1 if booked else -1
+
+        for member in members:
+            member = int(member)
+            busy = self.busy[member]
+            # Only slots whose state actually changes move the counts
+            changed = mask & ~busy if booked else mask & busy
+            if not changed:
+                continue
+            self.busy[member] = busy | changed if booked else busy & ~changed
+
+            changed_slots = slots[[(changed >> int(s)) & 1 == 1 for s in slots]]
+            self.booked_counts[changed_slots] += step
+            was_free = np.array([(self.available[member] >> int(s)) & 1 == 1 for s in changed_slots], dtype=bool)
+            self.free_counts[changed_slots[was_free]] -= step
+            self.free[member, changed_slots[was_free]] = not booked
@@ -0,0 +1,349 @@
+"""
+Exact / Anytime Patch Scheduler
+Branch-and-bound search over the slot grid for the best schedule within a
+wall-clock budget, reported with an upper bound and its optimality gap
+
+Model: every patch either starts in one slot of the horizon or stays
+unscheduled. The search works on crew counts: a scheduled patch needs
+min_crew crew in every slot it covers, and in no slot may the patches
+running at once need more crew than are available. That relaxation's best
+value bounds every real schedule, but it may not be staffable by actual
+people, so the result is staffed afterwards with members free for a patch's
+whole window (patches nobody can staff are left unscheduled) and is only
+reported optimal when the staffed schedule reaches the bound.
+The objective adds PLACEMENT_BONUS plus the patch's 'basic' kernel score for
+every scheduled patch, so fitting another patch always outweighs moving one
+to a better slot.
+"""
+
+import time
+import numpy as np
+from crew_index import CrewIndex
+from forecast_service import DAYS, DAYS_PER_WEEK
+from models import ScheduledPatch
+from scoring import get_kernel
+
+# Value of scheduling a patch at all, on top of its 0-100 score
+PLACEMENT_BONUS = 100.0
+
+# Wall-clock budget when none is given (seconds)
+DEFAULT_TIME_BUDGET = 1.0
+
+
+class _Timeout(Exception):
+    pass
+
+
+class BranchAndBoundScheduler:
+    """Best (or bounded-gap) schedule of a set of patches over a slot grid"""
+
+    def __init__(self, grid, crew, slot_loads, horizon_days, index=None):
+        """
+        Args:
+            grid: SlotGrid of the horizon's slot size
+            crew: List of CrewMember
+            slot_loads: (horizon_days * slots_per_day,) network load of every slot
+            horizon_days: Days scheduled; windows wrap from the horizon's end to its start
+                          only if it is a recurring week
+            index: Unbooked CrewIndex of the horizon to staff from (built if None)
+        """
+        self.grid = grid
+        self.crew = crew
+        self.slot_loads = np.asarray(slot_loads, dtype=float)
+        self.horizon_days = horizon_days
+        self.index = index or CrewIndex(crew, grid, days=horizon_days, cyclic=horizon_days == DAYS_PER_WEEK)
+        self.capacity = self.index.free_counts.astype(np.int64)
+        self.n_slots = len(self.capacity)
+        self.deadline = float('inf')
+
+    def prepare(self, patches):
+        """Durations, crew needs and (patch, slot) values of the patches, in the given order"""
+        self.patches = list(patches)
+        self.durations = [self.grid.duration_slots(p.duration) for p in self.patches]
+        self.min_crews = [p.min_crew for p in self.patches]
+        # Start slots whose window stays inside the horizon (-inf value elsewhere)
+        self.valid = [self.grid.valid_starts(self.n_slots, d, self.index.cyclic) for d in self.durations]
+        self.values = np.where(np.array(self.valid, dtype=bool).reshape(len(self.patches), self.n_slots),
+                               self._values(self.patches), -np.inf)
+
+    def _values(self, patches):
+        """(n_patches, n_slots) objective value of starting every patch in every slot"""
+        kernel = get_kernel('basic')
+        return PLACEMENT_BONUS + kernel.score_matrix(patches, self.slot_loads, crew_counts=self.capacity)
+
+    def _check_clock(self):
+        if time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+    def _fits(self, capacity, patch_num):
+        """Start slots where patch patch_num fits the remaining crew capacity"""
+        fits = self.grid.window_min(capacity, self.durations[patch_num]) >= self.min_crews[patch_num]
+        return fits & self.valid[patch_num]
+
+    def _book(self, capacity, patch_num, slot):
+        """Remaining capacity after starting patch patch_num in slot"""
+        capacity = capacity.copy()
+        capacity[self.grid.window_slots(slot, self.durations[patch_num], wrap=self.n_slots)] -= self.min_crews[patch_num]
+        return capacity
+
+    def _bound(self, depth, capacity):
+        """Upper bound on what patches depth.. can still add: each at its best slot that still fits"""
+        total = 0.0
+        for patch_num in range(depth, len(self.patches)):
+            self._check_clock()
+            fits = self._fits(capacity, patch_num)
+            if fits.any():
+                total += self.values[patch_num][fits].max()
+        return total
+
+    def _assign(self, free, patch_num, slot):
+        """
+        Book the first min_crew members free for the whole window of a patch in slot
+        on a (n_crew, n_slots) free matrix; their indices, or None if too few are free
+        """
+        slots = self.grid.window_slots(slot, self.durations[patch_num], wrap=self.n_slots)
+        members = np.flatnonzero(free[:, slots].all(axis=1))[:self.min_crews[patch_num]]
+        if len(members) < self.min_crews[patch_num]:
+            return None
+        free[np.ix_(members, slots)] = False
+        return [int(m) for m in members]
+
+    def _greedy(self):
+        """
+        Priority-order greedy staffed by people: every patch at its best slot with
+        enough members free for the whole window. The first incumbent; patches
+        left when the clock runs out stay unscheduled.
+
+        Returns:
+            (value, starts, members)
+        """
+        free = self.index.free_matrix()
+        starts = [None] * len(self.patches)
+        members = [None] * len(self.patches)
+        value = 0.0
+        for patch_num in range(len(self.patches)):
+            if time.perf_counter() > self.deadline:
+                break
+            duration_slots = self.durations[patch_num]
+            staffable = np.zeros(self.n_slots, dtype=np.int64)
+            for row in free:
+                staffable += self.grid.window_min(row, duration_slots)
+            fits = (staffable >= self.min_crews[patch_num]) & self.valid[patch_num]
+            if not fits.any():
+                continue
+            slot = int(np.argmax(np.where(fits, self.values[patch_num], -np.inf)))
+            starts[patch_num] = slot
+            members[patch_num] = self._assign(free, patch_num, slot)
+            value += self.values[patch_num][slot]
+        return value, starts, members
+
+    def objective(self, starts):
+        """Total value of start slots of the prepared patches (None = unscheduled)"""
+        return float(sum(self.values[p][s] for p, s in enumerate(starts) if s is not None))
+
+    def staff(self, starts):
+        """
+        Crew members for start slots of the prepared patches, highest priority first:
+        only members free for a patch's whole window, never overbooked. A patch
+        nobody is left to staff gets members moved off overlapping patches first.
+
+        Returns:
+            (starts with unstaffable patches set to None, members of every patch)
+        """
+        free = self.index.free_matrix()
+        starts = list(starts)
+        members = [None] * len(self.patches)
+        for patch_num in sorted(range(len(self.patches)), key=lambda p: -self.patches[p].priority):
+            if starts[patch_num] is None:
+                continue
+            members[patch_num] = self._assign(free, patch_num, starts[patch_num])
+            if members[patch_num] is None and self._reassign(free, starts, members, patch_num):
+                members[patch_num] = self._assign(free, patch_num, starts[patch_num])
+            if members[patch_num] is None:
+                starts[patch_num] = None
+        return starts, members
+
+    def _reassign(self, free, starts, members, patch_num):
+        """
+        Reassign crew move: hand overlapping staffed patches other members (each free for
+        that patch's whole window) so the members they release can staff patch patch_num
+
+        Returns:
+            Whether enough members are now free for patch patch_num's whole window
+        """
+        slots = self.grid.window_slots(starts[patch_num], self.durations[patch_num], wrap=self.n_slots)
+        ready = free[:, slots].all(axis=1)
+        for other, other_members in enumerate(members):
+            if ready.sum() >= self.min_crews[patch_num]:
+                break
+            if other_members is None:
+                continue
+            other_slots = self.grid.window_slots(starts[other], self.durations[other], wrap=self.n_slots)
+            for position, member in enumerate(other_members):
+                # The member is free for this window once the other patch releases it
+                released = free[member].copy()
+                released[other_slots] = True
+                if ready[member] or not released[slots].all():
+                    continue
+                # A replacement free for the other window that this patch could not use anyway
+                replacements = np.flatnonzero(free[:, other_slots].all(axis=1) & ~ready)
+                if not len(replacements):
+                    continue
+                replacement = int(replacements[0])
+                free[member] = released
+                free[replacement, other_slots] = False
+                other_members[position] = replacement
+                ready = free[:, slots].all(axis=1)
+                if ready.sum() >= self.min_crews[patch_num]:
+                    break
+        return ready.sum() >= self.min_crews[patch_num]
+
+    def _search(self, incumbent):
+        """
+        Depth-first branch-and-bound on crew counts (an explicit stack, so any
+        number of patches fits), pruning against incumbent
+
+        Sets self.relaxed_value and self.relaxed_starts; raises _Timeout with
+        self.open_bounds holding the bounds of the unfinished nodes
+        """
+        n_patches = len(self.patches)
+        # Cheap bound: every remaining patch at its best slot, ignoring capacity
+        best_values = self.values.max(axis=1) if n_patches else np.zeros(0)
+        suffix_bounds = np.concatenate((np.cumsum(best_values[::-1])[::-1], [0.0]))
+        self.open_bounds = [suffix_bounds[0]]
+        starts = [None] * n_patches
+
+        def expand(depth, capacity, value):
+            """Stack frame of a node ([depth, capacity, value, candidates, next, bound]), None if done"""
+            self.nodes += 1
+            self._check_clock()
+            if depth == n_patches:
+                if value > self.relaxed_value + 1e-9:
+                    self.relaxed_value = value
+                    self.relaxed_starts = list(starts)
+                return None
+
+            # Prune with the cheap bound first, then with the capacity-aware one
+            if value + suffix_bounds[depth] <= self.relaxed_value + 1e-9:
+                return None
+            bound = value + self._bound(depth, capacity)
+            if bound <= self.relaxed_value + 1e-9:
+                return None
+
+            candidates = np.flatnonzero(self._fits(capacity, depth))
+            # Best slots first (stable, so the earliest slot wins ties)
+            candidates = candidates[np.argsort(-self.values[depth][candidates], kind='stable')]
+            return [depth, capacity, value, candidates, 0, bound]
+
+        self.relaxed_value, self.relaxed_starts = incumbent
+        root = expand(0, self.capacity, 0.0)
+        stack = [root] if root else []
+        self.open_bounds = [root[5]] if root else []
+
+        while stack:
+            frame = stack[-1]
+            depth, capacity, value, candidates, position, _ = frame
+            frame[4] += 1
+            child = None
+            if position < len(candidates):
+                slot = int(candidates[position])
+                slot_value = self.values[depth][slot]
+                if value + slot_value + suffix_bounds[depth + 1] <= self.relaxed_value + 1e-9:
+                    frame[4] = len(candidates)  # Later candidates are worth even less
+                    continue
+                starts[depth] = slot
+                child = expand(depth + 1, self._book(capacity, depth, slot), value + slot_value)
+            elif position == len(candidates):
+                # Leave the patch unscheduled
+                starts[depth] = None
+                child = expand(depth + 1, capacity, value)
+            else:
+                stack.pop()
+                self.open_bounds.pop()
+
+            if child is not None:
+                stack.append(child)
+                self.open_bounds.append(child[5])
+
+    def solve(self, patches, time_budget=DEFAULT_TIME_BUDGET):
+        """
+        Search for the best schedule within time_budget seconds
+
+        The clock is checked at every node and inside every bound, so the
+        search stops within about one bound computation of the budget.
+
+        Returns:
+            dict with the start slot and crew member indices of every patch
+            (None = unscheduled), objective, upper_bound, gap (relative),
+            optimal, search_complete, nodes, seconds and greedy_objective
+        """
+        start_time = time.perf_counter()
+        self.deadline = start_time + time_budget
+
+        # Higher priority first: those branches decide the most value
+        self.prepare(sorted(patches, key=lambda p: -p.priority))
+        self.nodes = 0
+
+        greedy_value, greedy_starts, greedy_members = self._greedy()
+        try:
+            self._search((greedy_value, greedy_starts))
+            search_complete = True
+            upper_bound = self.relaxed_value
+        except _Timeout:
+            search_complete = False
+            upper_bound = max([self.relaxed_value] + self.open_bounds)
+        self.deadline = float('inf')
+
+        # Staff the best count-feasible schedule; keep the greedy if that loses patches
+        starts, members = self.staff(self.relaxed_starts)
+        value = self.objective(starts)
+        if value < greedy_value:
+            value, starts, members = greedy_value, greedy_starts, greedy_members
+
+        gap = 0.0 if upper_bound <= 0 else max(0.0, upper_bound - value) / upper_bound
+        return {
+            'starts': starts,
+            'members': members,
+            'objective': round(value, 2),
+            'upper_bound': round(float(upper_bound), 2),
+            'gap': round(float(gap), 4),
+            'optimal': bool(search_complete and value >= upper_bound - 1e-9),
+            'search_complete': search_complete,
+            'nodes': self.nodes,
+            'seconds': round(time.perf_counter() - start_time, 4),
+            'greedy_objective': round(float(greedy_value), 2)
+        }
+
+    def build_schedule(self, starts, members=None):
+        """
+        Schedule entries (like PatchScheduler.optimize) for start slots of the prepared
+        patches; staffed with staff() unless the members are given
+        """
+        if members is None:
+            starts, members = self.staff(starts)
+
+        schedule = []
+        for patch_num, patch in enumerate(self.patches):
+            slot = starts[patch_num]
+            if slot is None:
+                schedule.append({
+                    'patch': patch.to_dict(),
+                    'status': 'unscheduled',
+                    'reason': 'Insufficient crew availability'
+                })
+                continue
+
+            horizon_day, day_slot = divmod(slot, self.grid.slots_per_day)
+            start_hour = self.grid.hour_of_day(day_slot)
+            schedule.append(ScheduledPatch(
+                patch=patch,
+                start_hour=start_hour,
+                end_hour=start_hour + patch.duration,
+                assigned_crew=[self.crew[m].name for m in members[patch_num]],
+                network_load=float(self.slot_loads[slot]),
+                score=round(float(self.values[patch_num][slot] - PLACEMENT_BONUS), 2),
+                day=DAYS[horizon_day % DAYS_PER_WEEK],
+                day_number=horizon_day % DAYS_PER_WEEK,
+                horizon_day=horizon_day
+            ).to_dict())
+        return schedule
@@ -0,0 +1,108 @@
+"""
+Multi-Week Forecast Horizon
+Forecasts network load over N weeks of real calendar time. Loads are
+generated lazily from the cached weekly forecast and streamed in chunks of
+plain arrays, with range queries by datetime and window search over the
+whole horizon
+"""
+
+import numpy as np
+from slot_grid import HorizonGrid
+
+
+class ForecastHorizon:
+    """Load forecast of a weekly predictor over a rolling multi-week horizon"""
+
+    def __init__(self, predictor, start=None, weeks=4, resolution_minutes=None,
+                 fallback=None, chunk_slots=None):
+        """
+        Args:
+            predictor: Weekly model usable by ForecastService (predict_grid, model_version)
+            start: First datetime of the horizon (now if None), rounded down to a slot
+            weeks: Horizon length in weeks
+            resolution_minutes: Slot size (60, 30 or 15)
+            fallback: Predictor served while predictor is not trained yet
+            chunk_slots: Slots per streamed chunk (one day by default)
+        """
+        self.predictor = predictor
+        self.fallback = fallback
+        self.grid = HorizonGrid(start, weeks, resolution_minutes)
+        self.chunk_slots = chunk_slots or self.grid.week_grid.slots_per_day
+
+    def _week(self):
+        """Flat weekly forecast (cached per model version by ForecastService)"""
+        week = self.grid.week_grid.forecast(self.predictor, self.fallback)
+        if week is None:
+            raise RuntimeError("No forecast available: the model is not trained yet")
+        return week
+
+    def loads(self, first, last):
+        """Forecast (kW) of horizon slots first..last-1"""
+        return self._week()[self.grid.week_slots(first, last)]
+
+    def chunks(self, t0=None, t1=None):
+        """
+        Stream the forecast between t0 and t1 (the whole horizon by default)
+
+        Yields:
+            (start datetime, loads array) per chunk of chunk_slots slots; a
+            chunk is only computed when the consumer asks for it
+        """
+        first, last = self.grid.slot_range(t0, t1)
+        for chunk_start in range(first, last, self.chunk_slots):
+            chunk_end = min(last, chunk_start + self.chunk_slots)
+            yield self.grid.time_at(chunk_start), self.loads(chunk_start, chunk_end)
+
+    def loads_between(self, t0, t1):
+        """
+        Range query: forecast of every slot overlapping [t0, t1)
+
+        Returns:
+            (datetime64[m] slot start times, loads in kW) arrays
+        """
+        first, last = self.grid.slot_range(t0, t1)
+        return self.grid.times(first, last), self.loads(first, last)
+
+    def best_windows(self, duration_hours, top_k=10, t0=None, t1=None):
+        """
+        Lowest-load windows of duration_hours that fit entirely in [t0, t1)
+
+        Uses prefix sums, so the cost is linear in the number of slots no
+        matter how long the window is.
+
+        Returns:
+            list of top_k dicts (start, end, avg_load_kw), best first
+        """
+        first, last = self.grid.slot_range(t0, t1)
+        duration_slots = self.grid.week_grid.duration_slots(duration_hours)
+        n_starts = last - first - duration_slots + 1
+        if n_starts <= 0:
+            return []
+
+        loads = self.loads(first, last)
+        prefix = np.concatenate(([0.0], np.cumsum(loads)))
+        averages = (prefix[duration_slots:] - prefix[:-duration_slots]) / duration_slots
+
+        # Stable sort keeps the earliest start on ties (rounded: prefix sums add float noise)
+        best = np.argsort(np.round(averages, 6), kind='stable')[:top_k]
+
+        windows = []
+        for offset in best:
+            start = self.grid.time_at(first + offset)
+            windows.append({
+                'start': start.isoformat(),
+                'end': (start + duration_slots * self.grid.step).isoformat(),
+                'avg_load_kw': round(float(averages[offset]), 2)
+            })
+        return windows
+
+    def get_stats(self):
+        """Horizon bounds and size"""
+        return {
+            'start': self.grid.start.isoformat(),
+            'end': self.grid.end.isoformat(),
+            'weeks': self.grid.weeks,
+            'resolution_minutes': self.grid.resolution_minutes,
+            'n_slots': self.grid.n_slots,
+            'chunk_slots': self.chunk_slots
+        }
@@ -0,0 +1,187 @@
+"""
+Shared Weekly Forecast Service
+Precomputes the week of network load forecasts once per trained model version
+so every scheduler and endpoint reads the same numbers instead of calling
+the models slot by slot
+"""
+
+import threading
+import numpy as np
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAYS_PER_WEEK = len(DAYS)
+MINUTES_PER_DAY = 24 * 60
+
+
+class ForecastService:
+    """Caches dense (day, slot) forecast arrays for each registered predictor"""
+
+    def __init__(self):
+        # id(predictor) -> {'predictor', 'version', 'grids': {resolution_minutes: array}}
+        self._forecasts = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def get_week(self, predictor, resolution_minutes=60, fallback=None):
+        """
+        Get the weekly forecast of a predictor
+
+        Args:
+            predictor: Any model exposing predict_grid(day_nums, hours, minutes)
+                       and a model_version counter bumped on every (re)train
+            resolution_minutes: Slot size in minutes (must divide 60 or a day)
+            fallback: Cheap predictor served instead while predictor is not
+                      trained yet (e.g. still warming up), if it is trained
+
+        Returns:
+            Read-only array of shape (7, slots_per_day) in kW, or None if the
+            predictor cannot forecast yet (e.g. not trained)
+        """
+        if (fallback is not None and not getattr(predictor, 'is_trained', True)
+                and getattr(fallback, 'is_trained', False)):
+            return self.get_week(fallback, resolution_minutes)
+
+        if MINUTES_PER_DAY % resolution_minutes != 0:
+            raise ValueError(f"resolution_minutes must divide a day, got {resolution_minutes}")
+
+        key = id(predictor)
+        version = getattr(predictor, 'model_version', 0)
+
+        with self._lock:
+            entry = self._forecasts.get(key)
+            if entry is not None and entry['predictor'] is predictor and entry['version'] == version:
+                grid = entry['grids'].get(resolution_minutes)
+                if grid is not None:
+                    self.hits += 1
+                    return grid
+
+        grid = self._build_week(predictor, resolution_minutes)
+        if grid is None:
+            return None
+
+        # Read the version again: predict_grid may have trained the model lazily
+        version = getattr(predictor, 'model_version', 0)
+
+        with self._lock:
+            entry = self._forecasts.get(key)
+            if entry is None or entry['predictor'] is not predictor or entry['version'] != version:
+                entry = {'predictor': predictor, 'version': version, 'grids': {}}
+                self._forecasts[key] = entry
+            entry['grids'][resolution_minutes] = grid
+            self.builds += 1
+
+        return grid
+
+    def get_load(self, predictor, day_num, hour, minute=0, resolution_minutes=60, fallback=None):
+        """Look up a single forecast value (kW) from the cached week"""
+        week = self.get_week(predictor, resolution_minutes, fallback)
+        if week is None:
+            return None
+        slot = (hour * 60 + minute) // resolution_minutes
+        return week[day_num % DAYS_PER_WEEK, slot]
+
+    def invalidate(self, predictor=None):
+        """Drop cached forecasts for one predictor, or for all of them"""
+        with self._lock:
+            if predictor is None:
+                self._forecasts.clear()
+            else:
+                self._forecasts.pop(id(predictor), None)
+
+    def get_stats(self):
+        """Return cache statistics"""
+        with self._lock:
+            return {
+                'cached_models': len(self._forecasts),
+                'builds': self.builds,
+                'hits': self.hits
+            }
+
+    def _build_week(self, predictor, resolution_minutes):
+        """Evaluate the predictor on every slot of the week in one call"""
+        slots_per_day = MINUTES_PER_DAY // resolution_minutes
+        slot_minutes = np.arange(slots_per_day) * resolution_minutes
+
+        day_nums = np.repeat(np.arange(DAYS_PER_WEEK), slots_per_day)
+        hours = np.tile(slot_minutes // 60, DAYS_PER_WEEK)
+        minutes = np.tile(slot_minutes % 60, DAYS_PER_WEEK)
+
+        loads = predictor.predict_grid(day_nums, hours, minutes)
+        if loads is None:
+            return None
+
+        grid = np.asarray(loads, dtype=float).reshape(DAYS_PER_WEEK, slots_per_day)
+        grid.setflags(write=False)
+        return grid
+
+
+def week_from_loads(network_loads, resolution_minutes=60):
+    """
+    Dense (7, slots_per_day) array from raw NetworkLoad records
+
+    Cheap fallback for consumers while the forecasting models warm up.
+    Several readings in one slot are averaged and empty slots take the
+    overall mean.
+    """
+    if not network_loads:
+        return None
+
+    slots_per_day = MINUTES_PER_DAY // resolution_minutes
+    totals = np.zeros(DAYS_PER_WEEK * slots_per_day)
+    counts = np.zeros(DAYS_PER_WEEK * slots_per_day)
+
+    slots = np.array([
+        (load.day_number % DAYS_PER_WEEK) * slots_per_day + (load.hour * 60) // resolution_minutes
+        for load in network_loads
+    ])
+    values = np.array([load.load_kilowatts for load in network_loads], dtype=float)
+    np.add.at(totals, slots, values)
+    np.add.at(counts, slots, 1)
+
+    week = np.full(len(totals), values.mean())
+    observed = counts > 0
+    week[observed] = totals[observed] / counts[observed]
+
+    week = week.reshape(DAYS_PER_WEEK, slots_per_day)
+    week.setflags(write=False)
+    return week
+
+
+def window_averages(loads, duration_slots):
+    """
+    Average load of a window of duration_slots starting at every slot
+
+    Uses prefix sums over the flattened forecast, so the cost is O(n) no matter
+    how long the window is. Windows wrap across midnight and from the end of
+    the forecast back to its start, and fractional durations weight the
+    partially covered last slot.
+
+    Args:
+        loads: Forecast array (any shape, flattened in slot order)
+        duration_slots: Window length in slots (may be fractional, must be > 0)
+
+    Returns:
+        Array of average loads, one per start slot
+    """
+    loads = np.asarray(loads, dtype=float).ravel()
+    n_slots = len(loads)
+
+    whole_slots = int(np.floor(duration_slots))
+    fraction = duration_slots - whole_slots
+    full_cycles, remainder = divmod(whole_slots, n_slots)
+
+    prefix = np.concatenate(([0.0], np.cumsum(np.concatenate((loads, loads)))))
+    starts = np.arange(n_slots)
+
+    totals = (
+        full_cycles * prefix[n_slots]
+        + prefix[starts + remainder] - prefix[starts]
+        + fraction * loads[(starts + remainder) % n_slots]
+    )
+
+    return totals / duration_slots
+
+
+# Global forecast service instance
+forecast_service = ForecastService()
@@ -0,0 +1,152 @@
+"""
+Flattened Forest Inference Engine
+Exports a trained scikit-learn random forest into flat NumPy node arrays and
+evaluates it with vectorized batch traversal, avoiding sklearn's per-call
+overhead on the small predictions the chatbot and optimizer make
+"""
+
+import numpy as np
+
+TREE_LEAF = -1  # sklearn marks leaves with children_left == -1
+
+# Traversal keeps an (n_samples, n_trees) node matrix; larger batches go to sklearn
+FLAT_FOREST_MAX_BATCH = 256
+
+
+class FlatForest:
+    """All trees of a forest concatenated into one set of node arrays"""
+
+    def __init__(self, feature, threshold, left, right, values, roots, max_depth, classes=None):
+        self.feature = feature          # int32 (n_nodes,) split feature, 0 at leaves
+        self.threshold = threshold      # float64 (n_nodes,) split threshold
+        self.left = left                # int32 (n_nodes,) left child (self at leaves)
+        self.right = right              # int32 (n_nodes,) right child (self at leaves)
+        self.values = values            # float64 (n_nodes, n_outputs) leaf prediction
+        self.roots = roots              # int32 (n_trees,) root node of every tree
+        self.max_depth = int(max_depth)
+        self.classes = classes          # class labels for classifiers, None for regressors
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Build from a fitted RandomForestRegressor or RandomForestClassifier"""
+        is_classifier = hasattr(forest, 'classes_')
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # Leaves point at themselves so traversal can run a fixed number of steps
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature)
+
+            if is_classifier:
+                # Per-tree class probabilities, normalized exactly like sklearn
+                value = tree.value[:, 0, :].astype(float)
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            else:
+                value = tree.value[:, :, 0].astype(float)
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            values=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.array(forest.classes_) if is_classifier else None
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild from to_arrays() output (arrays may be memory-mapped)"""
+        classes = arrays.get('classes')
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            left=arrays['left'],
+            right=arrays['right'],
+            values=arrays['values'],
+            roots=arrays['roots'],
+            max_depth=int(arrays['max_depth']),
+            classes=None if classes is None else np.asarray(classes)
+        )
+
+    def to_arrays(self):
+        """Plain dict of arrays, suitable for the model artifact store"""
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'values': self.values,
+            'roots': self.roots,
+            'max_depth': self.max_depth
+        }
+        if self.classes is not None:
+            arrays['classes'] = self.classes
+        return arrays
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        """Memory used by the node arrays"""
+        return int(sum(a.nbytes for a in (self.feature, self.threshold, self.left,
+                                          self.right, self.values, self.roots)))
+
+    def apply(self, X):
+        """Leaf node reached in every tree, shape (n_samples, n_trees)"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def _mean_leaf_values(self, X):
+        """Average of the leaf values over all trees, accumulated tree by tree like sklearn"""
+        leaf_values = self.values[self.apply(X)]  # (n_samples, n_trees, n_outputs)
+        out = np.zeros((leaf_values.shape[0], leaf_values.shape[2]))
+        for t in range(self.n_trees):
+            out += leaf_values[:, t]
+        out /= self.n_trees
+        return out
+
+    def predict(self, X):
+        """Regression value, or class label for classifiers"""
+        if self.classes is not None:
+            return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+        out = self._mean_leaf_values(X)
+        return out[:, 0] if out.shape[1] == 1 else out
+
+    def predict_proba(self, X):
+        """Class probabilities (classifiers only)"""
+        if self.classes is None:
+            raise ValueError("predict_proba is only available for classifiers")
+        return self._mean_leaf_values(X)
@@ -0,0 +1,248 @@
+"""
+Incremental Scheduler
+Keeps a live greedy schedule and its crew bookings as state, so patches are
+inserted as they arrive and removed when cancelled by booking or releasing
+only the slots they cover, instead of re-running the greedy over every patch.
+A patch that does not fit may displace a bounded number of lower-priority
+patches, which are re-inserted (or left pending) without further repair
+"""
+
+import threading
+import numpy as np
+from models import ScheduledPatch
+from crew_index import CrewIndex
+from forecast_service import DAYS, DAYS_PER_WEEK
+from scoring import get_kernel
+
+# Most lower-priority patches one insertion may displace
+MAX_DISPLACED = 3
+
+# Best-scoring start slots tried when an insertion has to displace patches
+REPAIR_CANDIDATES = 24
+
+
+class IncrementalSchedule:
+    """A live PatchScheduler schedule updated one patch at a time"""
+
+    def __init__(self, grid, crew, slot_loads, horizon_days, index=None):
+        """
+        Args:
+            grid: SlotGrid of the horizon's slot size
+            crew: List of CrewMember
+            slot_loads: (horizon_days * slots_per_day,) network load of every slot
+            horizon_days: Days scheduled; windows wrap from the horizon's end to its start
+                          only if it is a recurring week
+            index: Unbooked CrewIndex of the horizon to book on (built if None)
+        """
+        self.grid = grid
+        self.crew = crew
+        self.slot_loads = np.asarray(slot_loads, dtype=float)
+        self.horizon_days = horizon_days
+        self.index = index or CrewIndex(crew, grid, days=horizon_days, cyclic=horizon_days == DAYS_PER_WEEK)
+        self.kernel = get_kernel('basic')
+
+        self.placements = {}  # patch id -> placement of a scheduled patch
+        self.pending = {}  # patch id -> Patch that could not be scheduled
+        self._order = {}  # patch id -> arrival number (ties in the schedule's order)
+        self._lock = threading.Lock()
+        self.inserts = 0
+        self.removals = 0
+        self.displacements = 0
+
+    def _scores(self, patch):
+        """Score of starting a patch in every slot against the crew still free"""
+        base = self.kernel.base_scores([patch], self.slot_loads)[0]
+        return self.kernel.finish(base + self.kernel.crew_scores(patch.min_crew, self.index.free_counts))
+
+    def _book(self, patch, slot, score):
+        """Book the minimum crew free for the whole window and record the placement; None if too few are"""
+        duration_slots = self.grid.duration_slots(patch.duration)
+        members = self.index.free_crew(slot, duration_slots)[:patch.min_crew]
+        if len(members) < patch.min_crew:
+            return None
+        self.index.book(members, slot, duration_slots)
+
+        horizon_day, day_slot = divmod(slot, self.grid.slots_per_day)
+        start_hour = self.grid.hour_of_day(day_slot)
+        placement = {
+            'patch': patch,
+            'slot': slot,
+            'duration_slots': duration_slots,
+            'members': members,
+            'entry': ScheduledPatch(
+                patch=patch,
+                start_hour=start_hour,
+                end_hour=start_hour + patch.duration,
+                assigned_crew=[self.crew[m].name for m in members],
+                network_load=float(self.slot_loads[slot]),
+                score=score,
+                day=DAYS[horizon_day % DAYS_PER_WEEK],
+                day_number=horizon_day % DAYS_PER_WEEK,
+                horizon_day=horizon_day
+            ).to_dict()
+        }
+        self.placements[patch.id] = placement
+        self.pending.pop(patch.id, None)
+        return placement
+
+    def _release(self, patch_id):
+        """Free the crew of a scheduled patch; its placement"""
+        # Members are only booked when free for the whole window, so bookings never overlap
+        placement = self.placements.pop(patch_id)
+        self.index.release(placement['members'], placement['slot'], placement['duration_slots'])
+        return placement
+
+    def _valid_starts(self, duration_slots):
+        return self.grid.valid_starts(self.index.n_slots, duration_slots, self.index.cyclic)
+
+    def _place(self, patch):
+        """One greedy step: the patch at its best start slot with enough crew (None if none fits)"""
+        duration_slots = self.grid.duration_slots(patch.duration)
+        fits = self.grid.window_min(self.index.free_counts, duration_slots) >= patch.min_crew
+        fits &= self._valid_starts(duration_slots)
+        if not fits.any():
+            return None
+        # The earliest best slot where enough crew are each free for the whole window
+        scores = self._scores(patch)
+        slot, _ = self.index.best_staffable(np.where(fits, scores, -1), duration_slots, patch.min_crew)
+        if slot is None:
+            return None
+        return self._book(patch, slot, float(scores[slot]))
+
+    def _repair(self, patch):
+        """
+        Place a patch by displacing at most MAX_DISPLACED lower-priority patches
+        Tries the REPAIR_CANDIDATES best slots; returns (placement, displaced placements)
+        """
+        lower = [p for p in self.placements.values() if p['patch'].priority < patch.priority]
+        if not lower:
+            return None, []
+
+        duration_slots = self.grid.duration_slots(patch.duration)
+        scores = self._scores(patch)
+        valid = np.flatnonzero(self._valid_starts(duration_slots))
+        candidates = valid[np.argsort(-scores[valid], kind='stable')][:REPAIR_CANDIDATES]
+
+        for slot in candidates:
+            slot = int(slot)
+            window = self.index.window_mask(slot, duration_slots)
+            # Lowest priority first, latest arrival first among equals
+            blockers = sorted(
+                (p for p in lower if self.index.window_mask(p['slot'], p['duration_slots']) & window),
+                key=lambda p: (p['patch'].priority, -self._order[p['patch'].id])
+            )
+
+            released = []
+            for blocker in blockers[:MAX_DISPLACED]:
+                released.append(self._release(blocker['patch'].id))
+                if len(self.index.free_crew(slot, duration_slots)) >= patch.min_crew:
+                    break
+
+            if released and len(self.index.free_crew(slot, duration_slots)) >= patch.min_crew:
+                score = float(self._scores(patch)[slot])
+                placement = self._book(patch, slot, score)
+                if placement is not None:
+                    return placement, released
+
+            # Not enough room here: put the blockers back exactly as they were
+            for blocker in released:
+                self.index.book(blocker['members'], blocker['slot'], blocker['duration_slots'])
+                self.placements[blocker['patch'].id] = blocker
+        return None, []
+
+    def _entry(self, patch_id):
+        placement = self.placements.get(patch_id)
+        if placement is not None:
+            return placement['entry']
+        return {
+            'patch': self.pending[patch_id].to_dict(),
+            'status': 'unscheduled',
+            'reason': 'Insufficient crew availability'
+        }
+
+    def insert(self, patch, repair=True):
+        """
+        Schedule a new patch (an existing patch with the same id is replaced)
+
+        Returns:
+            {'entry': the patch's schedule entry, 'displaced': ids of patches
+             moved to make room, 'unscheduled': displaced ids left pending}
+        """
+        with self._lock:
+            if patch.id in self.placements or patch.id in self.pending:
+                self._remove(patch.id)
+            self._order[patch.id] = self.inserts
+            self.inserts += 1
+
+            displaced = []
+            placement = self._place(patch)
+            if placement is None and repair:
+                placement, displaced = self._repair(patch)
+            if placement is None:
+                self.pending[patch.id] = patch
+
+            # Displaced patches get one plain greedy try each, highest priority first
+            unscheduled = []
+            for old in sorted(displaced, key=lambda p: (-p['patch'].priority, self._order[p['patch'].id])):
+                if self._place(old['patch']) is None:
+                    self.pending[old['patch'].id] = old['patch']
+                    unscheduled.append(old['patch'].id)
+            self.displacements += len(displaced)
+
+            return {
+                'entry': self._entry(patch.id),
+                'displaced': [p['patch'].id for p in displaced],
+                'unscheduled': unscheduled
+            }
+
+    def remove(self, patch_id):
+        """
+        Cancel a patch and give pending patches a try in the freed crew time
+
+        Returns:
+            {'removed': the cancelled patch's entry, 'scheduled': ids of pending patches now placed}
+
+        Raises:
+            KeyError: unknown patch id
+        """
+        with self._lock:
+            entry = self._remove(patch_id)
+
+            scheduled = []
+            if 'status' not in entry:
+                for patch in sorted(self.pending.values(), key=lambda p: (-p.priority, self._order[p.id])):
+                    if self._place(patch) is not None:
+                        scheduled.append(patch.id)
+            return {'removed': entry, 'scheduled': scheduled}
+
+    def _remove(self, patch_id):
+        if patch_id not in self.placements and patch_id not in self.pending:
+            raise KeyError(f"Patch {patch_id} is not in the schedule")
+        entry = self._entry(patch_id)
+        if patch_id in self.placements:
+            self._release(patch_id)
+        else:
+            del self.pending[patch_id]
+        del self._order[patch_id]
+        self.removals += 1
+        return entry
+
+    def schedule(self):
+        """Entries like PatchScheduler.optimize(): highest priority first, then by arrival"""
+        with self._lock:
+            patches = [p['patch'] for p in self.placements.values()] + list(self.pending.values())
+            patches.sort(key=lambda p: (-p.priority, self._order[p.id]))
+            return [self._entry(p.id) for p in patches]
+
+    def get_stats(self):
+        """Sizes of the schedule and counters of the changes applied to it"""
+        with self._lock:
+            return {
+                'scheduled': len(self.placements),
+                'pending': len(self.pending),
+                'inserts': self.inserts,
+                'removals': self.removals,
+                'displacements': self.displacements,
+                'horizon_days': self.horizon_days,
+                'resolution_minutes': self.grid.resolution_minutes
+            }
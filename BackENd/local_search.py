@@ -0,0 +1,240 @@
+"""
+Local Search Improvement
+Simulated annealing over a finished schedule: patches are shifted to other
+start slots, swapped with each other, inserted when unscheduled (in place of
+another patch if there is no room) or dropped.
+Every move is scored from a precomputed (patch, slot) value matrix and
+checked against a per-slot crew usage table, so a move costs a few lookups
+(O(duration) for the capacity check) instead of rescoring the whole schedule
+"""
+
+import math
+import random
+import time
+import numpy as np
+from forecast_service import DAYS, DAYS_PER_WEEK
+
+# Limits of a run when none are given
+DEFAULT_ITERATIONS = 20000
+DEFAULT_TIME_LIMIT = 1.0  # seconds
+
+# Annealing temperature (objective points) at the start and the end of a run
+START_TEMPERATURE = 10.0
+END_TEMPERATURE = 0.05
+
+# Share of shift and swap moves for a scheduled patch (the rest are removals)
+SHIFT_SHARE = 0.6
+SWAP_SHARE = 0.3
+
+# Iterations between two looks at the clock
+CLOCK_CHECK_ITERATIONS = 64
+
+
+def entry_slot(entry, grid, horizon_days=DAYS_PER_WEEK):
+    """
+    Start slot of a schedule entry on a horizon of grid slots (None if unscheduled)
+
+    The day comes from 'horizon_day', 'day_number' or the 'day' name, in that
+    order (day 0 if the entry has none); start_hour may be fractional.
+    """
+    if entry.get('start_hour') is None:
+        return None
+
+    day = entry.get('horizon_day')
+    if day is None:
+        day = entry.get('day_number')
+    if day is None:
+        day = DAYS.index(entry['day']) if entry.get('day') in DAYS else 0
+
+    hour = int(entry['start_hour'])
+    minute = int(round((entry['start_hour'] - hour) * 60))
+    day_slot = (hour % 24) * grid.slots_per_hour + minute // grid.resolution_minutes
+    return (day % horizon_days) * grid.slots_per_day + day_slot
+
+
+class LocalSearch:
+    """Simulated annealing over patch start slots under a per-slot crew capacity"""
+
+    def __init__(self, values, durations, demands, capacity):
+        """
+        Args:
+            values: (n_patches, n_slots) objective value of starting every patch in
+                    every slot (-inf where it may not start); unscheduled patches add 0
+            durations: Slots every patch occupies (windows wrap at the last slot)
+            demands: Crew every patch needs in each slot it occupies
+            capacity: (n_slots,) crew available in every slot
+        """
+        values = np.asarray(values, dtype=float)
+        self.n_patches, self.n_slots = values.shape
+        # Plain lists: single-element lookups are what every move does
+        self.values = values.tolist()
+        self.allowed = [np.flatnonzero(np.isfinite(row)).tolist() for row in values]
+        self.durations = [min(int(d), self.n_slots) for d in durations]
+        self.demands = [int(d) for d in demands]
+        self.capacity = [int(c) for c in capacity]
+
+    def _fits(self, patch_num, slot):
+        """Whether a patch starting in slot fits the crew left in every slot it covers"""
+        demand = self.demands[patch_num]
+        for k in range(self.durations[patch_num]):
+            s = (slot + k) % self.n_slots
+            if self.usage[s] + demand > self.capacity[s]:
+                return False
+        return True
+
+    def _place(self, patch_num, slot):
+        demand = self.demands[patch_num]
+        for k in range(self.durations[patch_num]):
+            self.usage[(slot + k) % self.n_slots] += demand
+        self.starts[patch_num] = slot
+
+    def _unplace(self, patch_num):
+        slot = self.starts[patch_num]
+        demand = self.demands[patch_num]
+        for k in range(self.durations[patch_num]):
+            self.usage[(slot + k) % self.n_slots] -= demand
+        self.starts[patch_num] = None
+
+    def _accept(self, delta, temperature):
+        """Metropolis rule: always take improvements, worse moves with probability e^(delta/T)"""
+        return delta >= 0 or self.rng.random() < math.exp(delta / temperature)
+
+    def _move(self, temperature):
+        """Try one random move; the objective delta if it was applied, else None"""
+        rng = self.rng
+        patch_num = rng.randrange(self.n_patches)
+        old = self.starts[patch_num]
+        row = self.values[patch_num]
+
+        # Insert an unscheduled patch
+        if old is None:
+            if not self.allowed[patch_num]:
+                return None
+            slot = rng.choice(self.allowed[patch_num])
+            if self._fits(patch_num, slot):
+                if self._accept(row[slot], temperature):
+                    self._place(patch_num, slot)
+                    return row[slot]
+                return None
+
+            # No room: try making room by dropping a random scheduled patch
+            other = rng.randrange(self.n_patches)
+            other_old = self.starts[other]
+            if other_old is None:
+                return None
+            self._unplace(other)
+            delta = row[slot] - self.values[other][other_old]
+            if self._fits(patch_num, slot) and self._accept(delta, temperature):
+                self._place(patch_num, slot)
+                return delta
+            self._place(other, other_old)
+            return None
+
+        kind = rng.random()
+
+        # Shift the patch to another start slot
+        if kind < SHIFT_SHARE:
+            slot = rng.choice(self.allowed[patch_num])
+            if slot == old:
+                return None
+            self._unplace(patch_num)
+            delta = row[slot] - row[old]
+            if self._fits(patch_num, slot) and self._accept(delta, temperature):
+                self._place(patch_num, slot)
+                return delta
+            self._place(patch_num, old)
+            return None
+
+        # Swap the start slots of two scheduled patches
+        if kind < SHIFT_SHARE + SWAP_SHARE:
+            other = rng.randrange(self.n_patches)
+            other_old = self.starts[other]
+            if other == patch_num or other_old is None or other_old == old:
+                return None
+            other_row = self.values[other]
+            delta = row[other_old] + other_row[old] - row[old] - other_row[other_old]
+            if not (math.isfinite(delta) and self._accept(delta, temperature)):
+                return None
+            self._unplace(patch_num)
+            self._unplace(other)
+            if self._fits(patch_num, other_old):
+                self._place(patch_num, other_old)
+                if self._fits(other, old):
+                    self._place(other, old)
+                    return delta
+                self._unplace(patch_num)
+            self._place(patch_num, old)
+            self._place(other, other_old)
+            return None
+
+        # Leave the patch unscheduled (frees crew for other moves)
+        if self._accept(-row[old], temperature):
+            self._unplace(patch_num)
+            return -row[old]
+        return None
+
+    def objective(self, starts):
+        """Total value of a list of start slots (None = unscheduled)"""
+        return sum(self.values[p][s] for p, s in enumerate(starts) if s is not None)
+
+    def run(self, starts, iterations=None, time_limit=None, seed=0):
+        """
+        Improve a schedule for up to iterations moves or time_limit seconds
+
+        Patches of the input that start in a forbidden slot or overbook the
+        crew (checked in input order) begin unscheduled. The same seed gives
+        the same result whenever the iteration limit ends the run.
+
+        Returns:
+            dict with the best start slots found, initial_objective, objective,
+            iterations, accepted, improvements, seconds, seed and stopped
+            ('iterations' or 'time_limit')
+        """
+        iterations = DEFAULT_ITERATIONS if iterations is None else iterations
+        time_limit = DEFAULT_TIME_LIMIT if time_limit is None else time_limit
+        start_time = time.perf_counter()
+        deadline = start_time + time_limit
+
+        self.rng = random.Random(seed)
+        self.usage = [0] * self.n_slots
+        self.starts = [None] * self.n_patches
+        for patch_num, slot in enumerate(starts):
+            if slot is not None and math.isfinite(self.values[patch_num][slot]) and self._fits(patch_num, slot):
+                self._place(patch_num, slot)
+
+        value = initial_value = self.objective(self.starts)
+        best_value = value
+        best_starts = list(self.starts)
+        accepted = improvements = done = 0
+        stopped = 'iterations'
+
+        cooling = END_TEMPERATURE / START_TEMPERATURE
+        for done in range(iterations if self.n_patches else 0):
+            if done % CLOCK_CHECK_ITERATIONS == 0 and time.perf_counter() > deadline:
+                stopped = 'time_limit'
+                break
+
+            temperature = START_TEMPERATURE * cooling ** (done / iterations)
+            delta = self._move(temperature)
+            if delta is None:
+                continue
+            accepted += 1
+            value += delta
+            if value > best_value + 1e-9:
+                best_value = value
+                best_starts = list(self.starts)
+                improvements += 1
+        else:
+            done = iterations if self.n_patches else 0
+
+        return {
+            'starts': best_starts,
+            'initial_objective': round(float(initial_value), 2),
+            'objective': round(float(self.objective(best_starts)), 2),
+            'iterations': done,
+            'accepted': accepted,
+            'improvements': improvements,
+            'seconds': round(time.perf_counter() - start_time, 4),
+            'seed': seed,
+            'stopped': stopped
+        }
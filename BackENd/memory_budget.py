@@ -0,0 +1,127 @@
+"""
+Memory-Budgeted Forest Training
+Sizes the forests to a memory budget: picks the tree count and depth before
+fitting and drops surplus trees after, so a worker's model RSS stays capped
+"""
+
+import numpy as np
+from sklearn.base import clone
+
+# Fewest trees worth keeping before giving up depth instead
+MIN_TREES = 25
+
+# Depth limits tried, deepest first, when the full-depth forest does not fit
+DEPTH_STEPS = (24, 16, 12, 10, 8, 6, 4)
+
+# Trees fitted to estimate the size of one tree at a given depth
+PROBE_TREES = 10
+
+# FlatForest bytes per node besides the leaf values: feature, threshold, left, right
+FLAT_NODE_BYTES = 4 + 8 + 4 + 4
+
+
+def tree_nbytes(estimator):
+    """
+    Resident bytes of one fitted tree: sklearn's node and value arrays plus
+    its share of the FlatForest copy the predictors keep for inference
+    """
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    sklearn_bytes = state['nodes'].nbytes + state['values'].nbytes
+
+    outputs_per_node = tree.value.shape[1] * tree.value.shape[2]
+    flat_bytes = tree.node_count * (FLAT_NODE_BYTES + 8 * outputs_per_node) + 4  # + root index
+    return sklearn_bytes + flat_bytes
+
+
+def forest_nbytes(model):
+    """Resident bytes of a fitted forest and its FlatForest copy"""
+    return int(sum(tree_nbytes(e) for e in getattr(model, 'estimators_', [])))
+
+
+def prune_to_budget(model, budget_bytes, keep_newest=False):
+    """
+    Drop trees until the forest fits the budget
+
+    Forest trees are independent draws, so dropping the last ones only
+    costs variance. keep_newest drops the oldest trees instead, which is
+    what incremental updates want.
+
+    Returns:
+        Number of trees dropped
+    """
+    if budget_bytes is None:
+        return 0
+
+    trees = model.estimators_[::-1] if keep_newest else model.estimators_
+    sizes = np.cumsum([tree_nbytes(e) for e in trees])
+    n_keep = max(1, int(np.searchsorted(sizes, budget_bytes, side='right')))
+    n_dropped = len(trees) - n_keep
+    if n_dropped <= 0:
+        return 0
+
+    kept = trees[:n_keep]
+    model.estimators_ = kept[::-1] if keep_newest else kept
+    model.set_params(n_estimators=n_keep)
+    return n_dropped
+
+
+def fitted_depth(model):
+    """Depth limit the fitted trees were grown with (the model's own if it is unfitted)"""
+    estimators = getattr(model, 'estimators_', None)
+    return estimators[0].max_depth if estimators else model.max_depth
+
+
+def fit_within_budget(model, X, y, budget_bytes=None):
+    """
+    Fit a forest so that it (and its FlatForest copy) fits budget_bytes
+
+    Keeps the configured depth as long as at least MIN_TREES trees fit,
+    otherwise steps down through DEPTH_STEPS. The tree size at each depth
+    is estimated from a small probe forest; surplus trees left by the
+    estimate are pruned after the final fit. With no budget the model is
+    fitted as configured. The model's n_estimators/max_depth params are
+    restored after the fit, so refitting starts from the configuration again.
+
+    Returns:
+        The fitted model (the same object)
+    """
+    if budget_bytes is None:
+        return model.fit(X, y)
+
+    n_estimators = model.n_estimators
+    max_depth = model.max_depth
+    depths = [max_depth] + [d for d in DEPTH_STEPS if max_depth is None or d < max_depth]
+
+    n_trees = 1
+    for depth in depths:
+        probe = clone(model).set_params(n_estimators=min(PROBE_TREES, n_estimators), max_depth=depth)
+        probe.fit(X, y)
+        bytes_per_tree = forest_nbytes(probe) / len(probe.estimators_)
+
+        max_depth = depth
+        n_trees = min(n_estimators, int(budget_bytes // bytes_per_tree))
+        if n_trees >= min(MIN_TREES, n_estimators):
+            break
+
+    configured = {'n_estimators': model.n_estimators, 'max_depth': model.max_depth}
+    model.set_params(n_estimators=max(1, n_trees), max_depth=max_depth)
+    try:
+        model.fit(X, y)
+        prune_to_budget(model, budget_bytes)
+    finally:
+        model.set_params(**configured)
+    return model
+
+
+def memory_report(model, budget_bytes=None):
+    """Achieved model size against the budget, for get_model_stats()"""
+    model_bytes = forest_nbytes(model)
+    return {
+        'model_bytes': model_bytes,
+        'model_mb': round(model_bytes / 2 ** 20, 2),
+        'budget_mb': None if budget_bytes is None else round(budget_bytes / 2 ** 20, 2),
+        'within_budget': budget_bytes is None or model_bytes <= budget_bytes,
+        'n_estimators': len(getattr(model, 'estimators_', [])),
+        'max_depth': fitted_depth(model)
+    }
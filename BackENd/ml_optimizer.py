@@ -6,83 +6,49 @@ Combines all three ML models to provide comprehensive patch scheduling recommend
 from network_load_predictor import network_load_predictor
 from patch_classifier import patch_classifier
 from ml_predictor import predictor
+from forecast_service import forecast_service, DAYS
+from seasonal_predictor import seasonal_predictor
+from slot_grid import get_slot_grid
+from scoring import get_kernel
 
 class MLOptimizer:
-    def __init__(self):
-        self.network_predictor = network_load_predictor
+    def __init__(self, network_predictor=None, rf_predictor=None, fallback=None):
+        # The global models unless a site brings its own (see model_registry.py)
+        self.network_predictor = network_predictor or network_load_predictor
         self.patch_classifier_model = patch_classifier
-        self.rf_predictor = predictor
+        self.rf_predictor = rf_predictor or predictor
+        self.fallback = fallback or seasonal_predictor
     
     def calculate_patch_score(self, patch, hour, day_num, network_load, available_crew):
         """
         Calculate a comprehensive score for scheduling a patch at a specific time
         Score range: 0-100 (higher is better)
-        """
-        score = 100  # Start with perfect score
-        
-        # 1. Network Load Factor (40% weight)
-        # Lower load = higher score
-        if network_load < 20:
-            load_score = 40
-        elif network_load < 30:
-            load_score = 30
-        elif network_load < 40:
-            load_score = 20
-        elif network_load < 50:
-            load_score = 10
-        else:
-            load_score = 0
-        
-        score = load_score
-        
-        # 2. Time of Day Factor (20% weight)
-        if 0 <= hour < 6:  # Night - ideal
-            time_score = 20
-        elif 6 <= hour < 9:  # Morning - acceptable
-            time_score = 15
-        elif 9 <= hour < 17:  # Business hours - avoid
-            time_score = 5
-        elif 17 <= hour < 22:  # Evening - acceptable
-            time_score = 12
-        else:  # Late night - good
-            time_score = 18
-        
-        score += time_score
-        
-        # 3. Crew Availability Factor (15% weight)
-        crew_needed = patch.min_crew
-        if available_crew >= crew_needed + 2:
-            crew_score = 15  # Plenty of crew
-        elif available_crew >= crew_needed + 1:
-            crew_score = 12  # Extra crew available
-        elif available_crew >= crew_needed:
-            crew_score = 8   # Just enough
-        else:
-            crew_score = 0   # Not enough crew
-        
-        score += crew_score
-        
-        # 4. Patch Priority Factor (15% weight)
-        # Higher priority should be scheduled sooner (during optimal times)
-        priority_score = (patch.priority / 5) * 15
-        score += priority_score
         
-        # 5. Weekend Factor (10% weight)
-        is_weekend = day_num >= 5
-        if is_weekend:
-            score += 10  # Weekends are better for maintenance
-        
-        return round(min(100, max(0, score)), 2)
+        Factors (the 'ml_optimizer' profile in scoring.WEIGHT_PROFILES):
+        network load 40, time of day 20, crew 15, priority 15, weekend 10
+        """
+        return get_kernel('ml_optimizer').score_one(
+            patch, network_load, hour=hour, day_num=day_num, crew_count=available_crew
+        )
     
-    def find_optimal_hours_for_patch(self, patch, crew_available, top_n=5):
+    def find_optimal_hours_for_patch(self, patch, crew_available, top_n=5, batched=True,
+                                     resolution_minutes=None, context=None):
         """
         Find the best hours to schedule a specific patch using all ML models
+        
+        With batched=True the whole week (7 x 24 slots, or 7 x 96 at a
+        resolution_minutes of 15) is scored with one call per model instead
+        of one call per slot. The unbatched path is hourly only. A
+        ScheduleContext supplies the request's forecast.
         """
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        if batched:
+            grid = get_slot_grid(resolution_minutes)
+            return self._find_optimal_hours_batched(patch, crew_available, top_n, grid, context)
+        
         recommendations = []
         
         # Get predictions for entire week
-        for day_num, day in enumerate(days):
+        for day_num, day in enumerate(DAYS):
             for hour in range(24):
                 # Predict network load (Linear Regression)
                 predicted_load = self.network_predictor.predict(day_num, hour, 0)
@@ -101,6 +67,7 @@ class MLOptimizer:
                     'day': day,
                     'day_num': day_num,
                     'hour': hour,
+                    'minute': 0,
                     'time_display': f"{day} {hour:02d}:00",
                     'predicted_load_kw': predicted_load,
                     'score': score,
@@ -114,14 +81,71 @@ class MLOptimizer:
         
         return recommendations[:top_n]
     
-    def recommend_crew_for_patch(self, patch, crew_list, hour, network_load):
+    def _find_optimal_hours_batched(self, patch, crew_available, top_n, grid, context=None):
         """
-        Recommend the best crew members for a patch based on skills and availability
+        Batched version of find_optimal_hours_for_patch
+        Builds the week's feature matrix once and scores every slot of the grid together
         """
-        available_crew = [c for c in crew_list if hour in c.available_hours]
+        # Slot order matches the nested day/hour loop of the scalar path
+        day_nums = grid.day_nums
+        hours = grid.hours
+        minutes = grid.minutes
+        
+        # Network load for every slot from the shared weekly forecast (Linear Regression)
+        if context is not None:
+            predicted_loads = context.forecast(self.network_predictor, self.fallback, grid.resolution_minutes)
+        else:
+            predicted_loads = grid.forecast(self.network_predictor, fallback=self.fallback)
         
-        # Sort by skill level (descending)
-        available_crew.sort(key=lambda x: x.skill_level, reverse=True)
+        # Classify the patch at every slot (Random Forest Classifier)
+        classifications = self.patch_classifier_model.predict_batch(
+            patch, predicted_loads, crew_available, hours
+        )
+        
+        # Score every slot in one pass of the scoring kernel
+        scores = get_kernel('ml_optimizer').score_matrix(
+            [patch], predicted_loads, hours, day_nums, crew_counts=crew_available
+        )[0]
+        
+        recommendations = []
+        for i, classification in enumerate(classifications):
+            day_num = int(day_nums[i])
+            hour = int(hours[i])
+            minute = int(minutes[i])
+            predicted_load = float(predicted_loads[i])
+            
+            recommendations.append({
+                'day': DAYS[day_num],
+                'day_num': day_num,
+                'hour': hour,
+                'minute': minute,
+                'time_display': f"{DAYS[day_num]} {hour:02d}:{minute:02d}",
+                'predicted_load_kw': predicted_load,
+                'score': float(scores[i]),
+                'patch_type': classification['patch_type'],
+                'confidence': classification['confidence'],
+                'recommended_priority': classification['recommended_priority']
+            })
+        
+        # Sort by score (descending)
+        recommendations.sort(key=lambda x: x['score'], reverse=True)
+        
+        return recommendations[:top_n]
+    
+    def recommend_crew_for_patch(self, patch, crew_list, hour, network_load, context=None):
+        """
+        Recommend the best crew members for a patch based on skills and availability
+        A ScheduleContext of crew_list supplies its skill order and availability
+        """
+        if context is not None:
+            # Already in skill order: keep the members available at the hour
+            slot = (int(hour) % 24) * context.grid.slots_per_hour
+            available_crew = [context.crew[i] for i in context.crew_by_skill if context.crew_availability[i, slot]]
+        else:
+            available_crew = [c for c in crew_list if hour in c.available_hours]
+            
+            # Sort by skill level (descending)
+            available_crew.sort(key=lambda x: x.skill_level, reverse=True)
         
         # Get the required number of crew
         needed = patch.min_crew
@@ -167,9 +191,8 @@ class MLOptimizer:
             score = best_time['score']
         else:
             # Calculate for specific time
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_num = days.index(day) if day in days else 0
-            predicted_load = self.network_predictor.predict(day_num, hour, 0)
+            day_num = DAYS.index(day) if day in DAYS else 0
+            predicted_load = forecast_service.get_load(self.network_predictor, day_num, hour, fallback=self.fallback)
             score = self.calculate_patch_score(patch, hour, day_num, predicted_load, crew_available)
         
         # Get patch classification
@@ -259,11 +282,10 @@ class MLOptimizer:
         """
         Get the score for scheduling a patch at a specific time
         """
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_num = days.index(day) if day in days else 0
+        day_num = DAYS.index(day) if day in DAYS else 0
         
-        # Predict network load
-        predicted_load = self.network_predictor.predict(day_num, hour, 0)
+        # Predicted network load from the shared weekly forecast
+        predicted_load = forecast_service.get_load(self.network_predictor, day_num, hour, fallback=self.fallback)
         
         # Calculate score
         score = self.calculate_patch_score(
@@ -3,19 +3,38 @@ Machine Learning Model for Network Load Prediction and Schedule Optimization
 Uses scikit-learn regression models to predict optimal patch windows
 """
 
+import copy
+import heapq
+import threading
 import numpy as np
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 from datetime import datetime
 import json
+from forecast_service import forecast_service, window_averages, week_from_loads, DAYS
+from seasonal_predictor import seasonal_predictor
+from model_store import model_store, fingerprint, estimator_params
+from forest_engine import FlatForest, FLAT_FOREST_MAX_BATCH
+from model_config import build_estimator, get_memory_budget, model_type, fit_threads, FIT_N_JOBS, SERVING_N_JOBS
+from memory_budget import fit_within_budget, fitted_depth, prune_to_budget, memory_report
 
 class NetworkLoadPredictor:
     """Predicts network load patterns and recommends optimal patch schedules"""
     
-    def __init__(self):
-        self.load_model = RandomForestRegressor(n_estimators=100, random_state=42)
+    def __init__(self, fallback=None):
+        # Random forest (100 trees) unless model_selection.py pinned another configuration
+        self.load_model, self.config_source = build_estimator('network_load_rf')
+        self.memory_budget = get_memory_budget('network_load_rf')  # bytes, None = unlimited
+        self.memory_report = None
         self.is_trained = False
+        self.model_version = 0  # Bumped on every (re)train so cached forecasts are rebuilt
         self.feature_names = ['day_of_week', 'hour', 'is_weekend', 'is_business_hours']
+        self.n_updates = 0
+        self.flat_forest = None  # Flattened copy of the forest for low-overhead inference
+        self.fallback = fallback or seasonal_predictor  # Served while the forest warms up
+        self.fit_n_jobs = FIT_N_JOBS  # Tree-building threads while fitting (predictions use one)
+        self._train_lock = threading.Lock()
+        self._history = None  # Load history of the last warm start, retrained from if needed
+        self._store_options = {}
         
     def prepare_features(self, day_of_week, hour):
         """
@@ -28,15 +47,8 @@ class NetworkLoadPredictor:
         
         return np.array([[day_of_week, hour, is_weekend, is_business_hours]])
     
-    def train(self, network_loads):
-        """
-        Train the model on historical network load data
-        network_loads: list of NetworkLoad objects
-        """
-        if len(network_loads) == 0:
-            return False
-        
-        # Prepare training data
+    def training_arrays(self, network_loads):
+        """Feature matrix and load targets for a list of NetworkLoad objects"""
         X = []
         y = []
         
@@ -45,15 +57,152 @@ class NetworkLoadPredictor:
             X.append(features[0])
             y.append(load.load_kilowatts)
         
-        X = np.array(X)
-        y = np.array(y)
+        return np.array(X), np.array(y)
+    
+    def train(self, network_loads):
+        """
+        Train the model on historical network load data
+        network_loads: list of NetworkLoad objects
+        """
+        if len(network_loads) == 0:
+            return False
+        
+        X, y = self.training_arrays(network_loads)
         
-        # Train the model
-        self.load_model.fit(X, y)
+        # Train the model (sized to the memory budget, if any)
+        with fit_threads(self.load_model, self.fit_n_jobs):
+            fit_within_budget(self.load_model, X, y, self.memory_budget)
+        self.flat_forest = FlatForest.from_sklearn(self.load_model)
+        self.memory_report = memory_report(self.load_model, self.memory_budget)
         self.is_trained = True
+        self.model_version += 1
+        self.n_updates = 0
         
         return True
     
+    def update(self, new_loads, trees_per_update=10, max_estimators=300):
+        """
+        Fold newly ingested NetworkLoad readings into the forest
+        
+        Warm-starts the forest: trees_per_update new trees are fitted on the
+        new batch only and added to the existing ones, so the cost depends on
+        the batch size, not on the training history. Once the forest grows
+        past max_estimators (or the memory budget) the oldest trees are
+        dropped, which lets the model follow recent load patterns.
+        An untrained forest is first trained on its load history (never on
+        the batch alone). The grown forest is built on a copy and swapped in,
+        so concurrent predictions see either the old or the new forest.
+        
+        Returns:
+            Number of trees in the forest after the update
+        
+        Raises:
+            RuntimeError: the forest is untrained and has no load history
+        """
+        if len(new_loads) == 0:
+            return len(getattr(self.load_model, 'estimators_', []))
+        if self.ensure_trained() is None:
+            raise RuntimeError("The load forest is not trained and has no load history to train on")
+        
+        X = np.array([self.prepare_features(l.day_number, l.hour)[0] for l in new_loads])
+        y = np.array([l.load_kilowatts for l in new_loads])
+        
+        with self._train_lock:
+            # Grow a copy that shares the existing (read-only) trees
+            model = copy.copy(self.load_model)
+            model.estimators_ = list(self.load_model.estimators_)
+            # New trees get the depth the budget left the forest with
+            configured_depth = model.max_depth
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees_per_update,
+                             max_depth=fitted_depth(model))
+            with fit_threads(model, self.fit_n_jobs):
+                model.fit(X, y)
+            model.set_params(warm_start=False, max_depth=configured_depth)
+            
+            if len(model.estimators_) > max_estimators:
+                model.estimators_ = model.estimators_[-max_estimators:]
+                model.set_params(n_estimators=max_estimators)
+            prune_to_budget(model, self.memory_budget, keep_newest=True)
+            flat_forest = FlatForest.from_sklearn(model)
+            
+            # Swap the new forest in
+            self.load_model, self.flat_forest = model, flat_forest
+            self.memory_report = memory_report(model, self.memory_budget)
+            self.n_updates += 1
+            self.model_version += 1
+        
+        return len(self.load_model.estimators_)
+    
+    def ensure_trained(self, network_loads=None):
+        """
+        Train or load the forest once, even when several threads ask at the same time
+        
+        Uses network_loads, else the history it was last warm-started from,
+        else the unfiltered load table. Returns None if there is no history.
+        """
+        if self.is_trained:
+            return 'ready'
+        with self._train_lock:
+            if not self.is_trained:
+                if network_loads is None:
+                    network_loads = self._history
+                if network_loads is None:
+                    from supabase_client import supabase_fetcher
+                    network_loads = supabase_fetcher.fetch_network_loads()
+                return self._warm_start(network_loads, **self._store_options)
+        return 'ready'
+    
+    def warm_start(self, network_loads, store=None, force=False, artifact_name='network_load_rf'):
+        """
+        Load the trained model from the artifact store
+        Trains (and saves a new artifact) only if the load history changed
+        artifact_name keeps the artifacts of different sites apart
+        """
+        with self._train_lock:
+            return self._warm_start(network_loads, store, force, artifact_name)
+    
+    def _warm_start(self, network_loads, store=None, force=False, artifact_name='network_load_rf'):
+        """warm_start() with _train_lock held; remembers the history for ensure_trained()"""
+        self._history = list(network_loads)
+        self._store_options = {'store': store, 'artifact_name': artifact_name}
+        if len(network_loads) == 0:
+            return None
+        
+        store = store or model_store
+        key = fingerprint(
+            'network_load_rf',
+            estimator_params(self.load_model),
+            self.memory_budget,
+            np.array([[l.day_number, l.hour, l.load_kilowatts] for l in network_loads], dtype=float)
+        )
+        return store.load_or_train(artifact_name, self, key, lambda: self.train(network_loads), force=force)
+    
+    def get_artifact(self):
+        """Return (payload, metadata) for the model artifact store"""
+        payload = {
+            'load_model': self.load_model,
+            'flat_forest': self.flat_forest.to_arrays()
+        }
+        metadata = {
+            'model_type': model_type(self.load_model),
+            'feature_names': self.feature_names,
+            'memory': self.memory_report
+        }
+        return payload, metadata
+    
+    def load_artifact(self, payload, metadata):
+        """Restore the trained model from an artifact"""
+        self.load_model = payload['load_model']
+        self.load_model.set_params(n_jobs=SERVING_N_JOBS)  # Older artifacts were saved with every core
+        if payload.get('flat_forest') is not None:
+            # Node arrays stay memory-mapped and shared between workers
+            self.flat_forest = FlatForest.from_arrays(payload['flat_forest'])
+        else:
+            self.flat_forest = FlatForest.from_sklearn(self.load_model)
+        self.memory_report = memory_report(self.load_model, self.memory_budget)
+        self.is_trained = True
+        self.model_version += 1
+    
     def predict_load(self, day_of_week, hour):
         """
         Predict network load for a specific day and hour
@@ -63,48 +212,88 @@ class NetworkLoadPredictor:
             return None
         
         features = self.prepare_features(day_of_week, hour)
-        predicted_load = self.load_model.predict(features)[0]
+        predicted_load = self._forest_predict(features)[0]
         
         return round(predicted_load, 2)
     
-    def find_optimal_windows(self, duration_hours, network_loads):
+    def predict_batch(self, day_nums, hours):
+        """
+        Predict network load for many (day, hour) slots in one forest call
+        Returns array of predicted loads in kW, or None if not trained
+        """
+        if not self.is_trained:
+            return None
+        
+        day_nums = np.asarray(day_nums, dtype=float)
+        hours = np.asarray(hours, dtype=float)
+        is_weekend = (day_nums >= 5).astype(float)
+        is_business_hours = ((hours >= 9) & (hours <= 17)).astype(float)
+        
+        X = np.column_stack([day_nums, hours, is_weekend, is_business_hours])
+        
+        return np.round(self._forest_predict(X), 2)
+    
+    def _forest_predict(self, X):
+        """Forest prediction: flat engine for small batches, sklearn for large ones"""
+        if self.flat_forest is not None and len(X) <= FLAT_FOREST_MAX_BATCH:
+            return self.flat_forest.predict(X)
+        return self.load_model.predict(X)
+    
+    def predict_grid(self, day_nums, hours, minutes):
+        """Forecast hook used by the shared ForecastService (minutes are not a feature)"""
+        return self.predict_batch(day_nums, hours)
+    
+    def get_week_forecast(self, network_loads=None):
+        """
+        Weekly (7, 24) load array: the model forecast once trained, otherwise
+        the seasonal profile (or the raw network_loads) as a cheap fallback
+        while the model warms up
+        """
+        week = forecast_service.get_week(self, fallback=self.fallback)
+        if week is None and network_loads:
+            week = week_from_loads(network_loads)
+        return week
+    
+    def find_optimal_windows(self, duration_hours, network_loads, top_k=10):
         """
         Find the best time windows for patching based on predicted loads
-        duration_hours: how long the patch will take
+        duration_hours: how long the patch will take (may be fractional)
+        top_k: number of windows to return
         Returns: list of optimal windows with scores
+        
+        Windows may start at any hour and wrap across midnight and from
+        Sunday into Monday. Until the model is trained the raw network_loads
+        are used instead of the forecast.
         """
+        week = self.get_week_forecast(network_loads)
+        if week is None or duration_hours <= 0:
+            return []
+        
+        # Average load of every window in one prefix-sum pass over the week
+        avg_loads = window_averages(week, duration_hours)
+        
+        # Score: lower load = better (invert for ranking)
+        scores = np.round(100 - (avg_loads / 90 * 100), 2)  # Normalize to 0-100
+        
+        # Keep only the top-k with a heap (ties keep the earliest start)
+        best_starts = heapq.nlargest(top_k, range(len(scores)), key=lambda s: scores[s])
+        
         windows = []
         
-        # Check all possible windows across the week
-        for day in range(7):
-            for hour in range(24 - int(duration_hours) + 1):
-                # Calculate average load for this window
-                total_load = 0
-                for h in range(int(duration_hours)):
-                    predicted = self.predict_load(day, hour + h)
-                    if predicted is not None:
-                        total_load += predicted
-                
-                avg_load = total_load / duration_hours
-                
-                # Score: lower load = better (invert for ranking)
-                score = 100 - (avg_load / 90 * 100)  # Normalize to 0-100
-                
-                day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                
-                windows.append({
-                    'day': day_names[day],
-                    'day_number': day,
-                    'start_hour': hour,
-                    'end_hour': hour + duration_hours,
-                    'avg_load_kw': round(avg_load, 2),
-                    'score': round(score, 2)
-                })
-        
-        # Sort by score (best first)
-        windows.sort(key=lambda x: x['score'], reverse=True)
-        
-        return windows[:10]  # Return top 10
+        for start in best_starts:
+            day, hour = divmod(start, 24)
+            end = start + duration_hours
+            windows.append({
+                'day': DAYS[day],
+                'day_number': day,
+                'start_hour': hour,
+                'end_hour': end % 24,
+                'end_day': DAYS[int(end // 24) % 7],
+                'avg_load_kw': round(float(avg_loads[start]), 2),
+                'score': float(scores[start])
+            })
+        
+        return windows
     
     def get_recommendations(self, patches, crew, network_loads):
         """
@@ -113,27 +302,27 @@ class NetworkLoadPredictor:
         recommendations = []
         
         # Overall load analysis
-        if self.is_trained:
+        week = self.get_week_forecast(network_loads)
+        if week is not None:
             recommendations.append("📊 **Network Load Analysis:**")
             
             # Find lowest load periods
             lowest_loads = []
             for day in range(7):
                 for hour in range(24):
-                    load = self.predict_load(day, hour)
-                    if load is not None:
-                        lowest_loads.append({
-                            'day': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][day],
-                            'hour': hour,
-                            'load': load
-                        })
+                    lowest_loads.append({
+                        'day': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][day],
+                        'hour': hour,
+                        'load': week[day, hour]
+                    })
             
             lowest_loads.sort(key=lambda x: x['load'])
             top_5 = lowest_loads[:5]
             
-            recommendations.append(f"Best maintenance windows (lowest predicted load):")
+            source = "predicted" if self.is_trained else "observed"
+            recommendations.append(f"Best maintenance windows (lowest {source} load):")
             for item in top_5:
-                recommendations.append(f"  • {item['day']} {item['hour']}:00 - Predicted {item['load']:.1f} kW")
+                recommendations.append(f"  • {item['day']} {item['hour']}:00 - {source.capitalize()} {item['load']:.1f} kW")
         
         # Patch-specific recommendations
         if patches:
@@ -143,7 +332,7 @@ class NetworkLoadPredictor:
             if high_priority:
                 recommendations.append(f"You have {len(high_priority)} high-priority patches that should be scheduled first:")
                 for patch in high_priority[:3]:
-                    windows = self.find_optimal_windows(patch.duration, network_loads)
+                    windows = self.find_optimal_windows(patch.duration, network_loads, top_k=1)
                     if windows:
                         best = windows[0]
                         recommendations.append(f"  • {patch.name}: Best window is {best['day']} {best['start_hour']}:00 ({best['avg_load_kw']} kW avg)")
@@ -180,8 +369,12 @@ class NetworkLoadPredictor:
         
         return {
             "trained": True,
-            "model_type": "Random Forest Regressor",
-            "n_estimators": self.load_model.n_estimators,
+            "model_type": model_type(self.load_model),
+            "n_estimators": len(self.load_model.estimators_),
+            "estimator": type(self.load_model).__name__,
+            "config_source": self.config_source,
+            "memory": self.memory_report,
+            "n_updates": self.n_updates,
             "feature_importance": {k: round(float(v), 4) for k, v in feature_importance.items()}
         }
 
@@ -4,156 +4,185 @@ Generates realistic scheduling data for demonstration purposes
 """
 
 import random
+import numpy as np
 from models import Patch
 from network_load_predictor import network_load_predictor
 from patch_classifier import patch_classifier
+from seasonal_predictor import seasonal_predictor
+from forecast_service import DAYS
+from slot_grid import get_slot_grid
+from scoring import get_kernel
+from exact_scheduler import PLACEMENT_BONUS
+from local_search import LocalSearch, entry_slot
 
 class MockScheduler:
-    def __init__(self):
-        self.days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    def __init__(self, resolution_minutes=None):
+        self.days = DAYS
         self.crew_names = [
             'Alex Chen', 'Sarah Miller', 'Mike Johnson', 'Emily Davis',
             'David Wilson', 'Rachel Torres', 'James Park', 'Lisa Wong'
         ]
+        # Slot size of the week being scheduled (60, 30 or 15 minutes)
+        self.grid = get_slot_grid(resolution_minutes)
     
-    def generate_mock_schedule(self, patches):
+    def generate_mock_schedule(self, patches, resolution_minutes=None, context=None):
         """
         Generate a complete mock schedule using Random Forest predictions
+        
+        Patches occupy exactly their duration in slots of resolution_minutes
+        (the scheduler's default if None) and may run across midnight. A
+        ScheduleContext supplies the request's forecast.
         """
+        grid = self.grid if resolution_minutes is None else get_slot_grid(resolution_minutes)
         scheduled_patches = []
-        used_times = set()
+        used_slots = np.zeros(grid.n_slots, dtype=bool)
         
         # Sort patches by priority (descending)
         sorted_patches = sorted(patches, key=lambda p: -p.priority)
         
-        for patch in sorted_patches:
+        # Predicted network load (Linear Regression) from the shared forecast
+        loads = self._forecast(grid, context)
+        
+        # Score of every patch in every slot, in one pass (used slots only change which fit)
+        scores = self._score_slots(sorted_patches, grid, loads)
+        
+        for patch, patch_scores in zip(sorted_patches, scores):
             # Find optimal time using ML predictor
-            best_time = self._find_best_time_with_ml(patch, used_times)
+            best_time = self._find_best_time_with_ml(patch, used_slots, grid, loads, patch_scores)
             
             if best_time:
-                # Get ML classification
-                classification = patch_classifier.predict(
-                    patch, 
-                    best_time['network_load'], 
-                    4,  # Assume 4 crew available
-                    best_time['hour']
-                )
-                
-                # Assign random crew members
-                num_crew = patch.min_crew
-                assigned_crew = random.sample(self.crew_names, min(num_crew, len(self.crew_names)))
+                scheduled_patches.append(self._scheduled_entry(patch, best_time))
                 
-                scheduled_patch = {
-                    'patch': patch.to_dict(),
-                    'start_hour': best_time['hour'],
-                    'end_hour': best_time['hour'] + patch.duration,
-                    'day': best_time['day'],
-                    'assigned_crew': assigned_crew,
-                    'network_load': int(best_time['network_load']),
-                    'score': best_time['score'],
-                    'status': 'scheduled',
-                    'classification': classification['patch_type'],
-                    'confidence': classification['confidence']
-                }
-                
-                scheduled_patches.append(scheduled_patch)
-                
-                # Mark time as used
-                for i in range(int(patch.duration) + 1):
-                    used_times.add((best_time['day'], (best_time['hour'] + i) % 24))
+                # Mark the patch's slots as used
+                used_slots[grid.window_slots(best_time['slot'], grid.duration_slots(patch.duration))] = True
             else:
-                # Couldn't schedule (rare with 168 hours available)
-                scheduled_patches.append({
-                    'patch': patch.to_dict(),
-                    'status': 'unscheduled',
-                    'reason': 'Could not find optimal time window'
-                })
+                # Couldn't schedule (rare with a whole week of slots available)
+                scheduled_patches.append(self._unscheduled_entry(patch))
         
         return scheduled_patches
     
-    def _find_best_time_with_ml(self, patch, used_times):
+    def _scheduled_entry(self, patch, best_time, rng=random):
+        """Schedule entry of a patch starting at best_time, with its ML classification (crew drawn from rng)"""
+        # Get ML classification
+        classification = patch_classifier.predict(
+            patch, 
+            best_time['network_load'], 
+            4,  # Assume 4 crew available
+            int(best_time['hour'])
+        )
+        
+        # Assign random crew members
+        num_crew = patch.min_crew
+        assigned_crew = rng.sample(self.crew_names, min(num_crew, len(self.crew_names)))
+        
+        return {
+            'patch': patch.to_dict(),
+            'start_hour': best_time['hour'],
+            'end_hour': best_time['hour'] + patch.duration,
+            'day': best_time['day'],
+            'assigned_crew': assigned_crew,
+            'network_load': int(best_time['network_load']),
+            'score': best_time['score'],
+            'status': 'scheduled',
+            'classification': classification['patch_type'],
+            'confidence': classification['confidence']
+        }
+    
+    @staticmethod
+    def _unscheduled_entry(patch):
+        return {
+            'patch': patch.to_dict(),
+            'status': 'unscheduled',
+            'reason': 'Could not find optimal time window'
+        }
+    
+    def improve_schedule(self, schedule, resolution_minutes=None, iterations=None, time_limit=None, seed=0,
+                         context=None):
+        """
+        Improve a generated schedule by local search (simulated annealing)
+        
+        Patches may not overlap and score with the 'mock' profile plus a
+        placement bonus; entries of patches that did not move are kept as
+        they are. The same seed and iteration limit give the same schedule.
+        A ScheduleContext supplies the request's forecast.
+        
+        Returns:
+            {'schedule': entries in the input's order, 'local_search': run statistics}
+        """
+        grid = self.grid if resolution_minutes is None else get_slot_grid(resolution_minutes)
+        patches = [Patch(**entry['patch']) for entry in schedule]
+        starts = [entry_slot(entry, grid) for entry in schedule]
+        
+        loads = self._forecast(grid, context)
+        scores = self._score_slots(patches, grid, loads)
+        
+        # One patch at a time: every slot has room for a single patch
+        search = LocalSearch(
+            PLACEMENT_BONUS + scores,
+            [grid.duration_slots(p.duration) for p in patches],
+            [1] * len(patches),
+            np.ones(grid.n_slots, dtype=int)
+        )
+        result = search.run(starts, iterations=iterations, time_limit=time_limit, seed=seed)
+        
+        # Crew of moved patches come from the run's seed too, so the result is reproducible
+        rng = random.Random(seed)
+        improved = []
+        for patch_num, (entry, patch, slot) in enumerate(zip(schedule, patches, result.pop('starts'))):
+            if slot is None:
+                improved.append(self._unscheduled_entry(patch))
+            elif slot == starts[patch_num]:
+                improved.append(entry)
+            else:
+                improved.append(self._scheduled_entry(
+                    patch, self._slot_time(grid, loads, slot, float(scores[patch_num, slot])), rng
+                ))
+        
+        return {'schedule': improved, 'local_search': result}
+    
+    def _find_best_time_with_ml(self, patch, used_slots, grid, loads, patch_scores):
         """
         Use ML model to find best time for a patch
+        Every start slot of the week is checked at once against its precomputed score
         """
-        candidates = []
-        
-        # Check all days and hours
-        for day_num, day in enumerate(self.days):
-            for hour in range(24):
-                # Skip if time is already used
-                if (day, hour) in used_times:
-                    continue
-                
-                # Check if patch duration fits
-                duration_fits = True
-                for i in range(int(patch.duration) + 1):
-                    if (day, (hour + i) % 24) in used_times:
-                        duration_fits = False
-                        break
-                
-                if not duration_fits:
-                    continue
-                
-                # Predict network load using Linear Regression
-                network_load = network_load_predictor.predict(day_num, hour, 0)
-                
-                # Calculate score
-                score = self._calculate_score(patch, hour, day_num, network_load)
-                
-                candidates.append({
-                    'day': day,
-                    'day_num': day_num,
-                    'hour': hour,
-                    'network_load': network_load,
-                    'score': score
-                })
-        
-        # Return best candidate
-        if candidates:
-            return max(candidates, key=lambda x: x['score'])
-        return None
+        # A start slot fits if no slot of the patch's duration is already used
+        fits = grid.window_min(~used_slots, grid.duration_slots(patch.duration)).astype(bool)
+        if not fits.any():
+            return None
+        
+        # Best candidate (the earliest one on ties)
+        scores = np.where(fits, patch_scores, -1)
+        slot = int(np.argmax(scores))
+        
+        return self._slot_time(grid, loads, slot, float(scores[slot]))
+    
+    @staticmethod
+    def _forecast(grid, context=None):
+        """Week of predicted loads at the grid's resolution, the context's if given"""
+        if context is not None:
+            return context.forecast(resolution_minutes=grid.resolution_minutes)
+        return grid.forecast(network_load_predictor, fallback=seasonal_predictor)
     
-    def _calculate_score(self, patch, hour, day_num, network_load):
+    def _slot_time(self, grid, loads, slot, score):
+        """Day, hour, load and score of a start slot"""
+        return {
+            'day': self.days[grid.day_nums[slot]],
+            'day_num': int(grid.day_nums[slot]),
+            'hour': grid.hour_of_day(slot),
+            'slot': slot,
+            'network_load': float(loads[slot]),
+            'score': score
+        }
+    
+    def _score_slots(self, patches, grid, loads):
         """
-        Calculate scheduling score (0-100)
+        Calculate scheduling score (0-100) of every patch in every slot of the week
+        
+        Factors (the 'mock' profile in scoring.WEIGHT_PROFILES): network load 40,
+        time of day 20, weekend 10, priority 15, duration 15 (shorter is better)
         """
-        score = 100
-        
-        # Network load factor (40 points max)
-        if network_load < 20:
-            load_score = 40
-        elif network_load < 30:
-            load_score = 30
-        elif network_load < 40:
-            load_score = 20
-        else:
-            load_score = 10
-        
-        # Time of day factor (20 points max)
-        if 0 <= hour < 6:  # Night - ideal
-            time_score = 20
-        elif 6 <= hour < 9:  # Morning
-            time_score = 15
-        elif 9 <= hour < 17:  # Business hours - avoid
-            time_score = 5
-        elif 17 <= hour < 22:  # Evening
-            time_score = 12
-        else:  # Late night
-            time_score = 18
-        
-        # Weekend bonus (10 points)
-        weekend_score = 10 if day_num >= 5 else 0
-        
-        # Priority factor (15 points max)
-        priority_score = (patch.priority / 5) * 15
-        
-        # Duration factor (15 points max) - shorter is better
-        duration_score = max(0, 15 - (patch.duration * 3))
-        
-        total = load_score + time_score + weekend_score + priority_score + duration_score
-        return round(min(100, max(0, total)), 2)
+        return get_kernel('mock').score_matrix(patches, loads, grid.hours, grid.day_nums)
 
 
 # Global instance
 mock_scheduler = MockScheduler()
-
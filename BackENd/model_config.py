@@ -0,0 +1,165 @@
+"""
+Model Configuration
+Default estimator configurations of the forest models and the pinned
+overrides written by the model selection harness (model_selection.py)
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor,
+    ExtraTreesClassifier, ExtraTreesRegressor
+)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_config.json')
+
+# Estimator families the serving path supports: both are plain tree
+# ensembles, so FlatForest can serve them and warm_start can grow them
+SERVABLE_ESTIMATORS = {
+    'random_forest': {'classifier': RandomForestClassifier, 'regressor': RandomForestRegressor},
+    'extra_trees': {'classifier': ExtraTreesClassifier, 'regressor': ExtraTreesRegressor}
+}
+
+# Task of every configurable model and its historical configuration
+MODEL_TASKS = {
+    'network_load_rf': 'regressor',
+    'patch_classifier': 'classifier'
+}
+
+DEFAULT_CONFIGS = {
+    'network_load_rf': {'estimator': 'random_forest', 'params': {'n_estimators': 100, 'random_state': 42}},
+    'patch_classifier': {'estimator': 'random_forest', 'params': {'n_estimators': 1000, 'random_state': 0}}
+}
+
+# Tree-building threads of a fit (-1 = every core); served and saved models use one,
+# so concurrent requests do not each start a thread per core
+FIT_N_JOBS = -1
+SERVING_N_JOBS = 1
+
+# Share of the per-worker memory budget (MODEL_MEMORY_BUDGET_MB) given to each forest
+MEMORY_BUDGET_SHARES = {
+    'network_load_rf': 0.2,
+    'patch_classifier': 0.8
+}
+
+
+def config_path():
+    """Location of the pinned configuration file (MODEL_CONFIG overrides it)"""
+    return os.getenv('MODEL_CONFIG', DEFAULT_CONFIG_PATH)
+
+
+def load_pinned_configs(path=None):
+    """Pinned configurations by model name ({} if nothing is pinned)"""
+    path = path or config_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading pinned model config {path}: {e}")
+        return {}
+
+
+def get_config(name, path=None):
+    """
+    Configuration of a model: the pinned one if valid, else the default
+
+    Returns:
+        (config dict, source) with source 'pinned' or 'default'
+    """
+    config = load_pinned_configs(path).get(name)
+    if config and config.get('estimator') in SERVABLE_ESTIMATORS:
+        return config, 'pinned'
+    if config and 'estimator' in config:
+        print(f"Ignoring pinned config of {name}: unsupported estimator {config['estimator']}")
+    return DEFAULT_CONFIGS[name], 'default'
+
+
+def get_memory_budget(name, path=None):
+    """
+    Memory budget of a model in bytes, or None for no budget
+
+    A pinned "memory_budget_mb" wins; otherwise the model gets its
+    MEMORY_BUDGET_SHARES share of MODEL_MEMORY_BUDGET_MB (per worker).
+    """
+    pinned = load_pinned_configs(path).get(name) or {}
+    if pinned.get('memory_budget_mb') is not None:
+        return int(float(pinned['memory_budget_mb']) * 2 ** 20)
+
+    total_mb = os.getenv('MODEL_MEMORY_BUDGET_MB')
+    if not total_mb:
+        return None
+    return int(float(total_mb) * MEMORY_BUDGET_SHARES[name] * 2 ** 20)
+
+
+def fit_n_jobs(workers=1):
+    """Tree-building threads per fit when workers processes fit at once: the cores split between them"""
+    if workers <= 1:
+        return FIT_N_JOBS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+@contextmanager
+def fit_threads(model, n_jobs=FIT_N_JOBS):
+    """Fit a forest with n_jobs threads, leaving it with SERVING_N_JOBS for serving and saving"""
+    model.set_params(n_jobs=n_jobs)
+    try:
+        yield model
+    finally:
+        model.set_params(n_jobs=SERVING_N_JOBS)
+
+
+def model_type(model):
+    """Readable name of an estimator's class, e.g. 'Extra Trees Regressor'"""
+    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', type(model).__name__)
+
+
+def build_estimator(name, n_jobs=SERVING_N_JOBS, path=None):
+    """
+    Unfitted estimator for a model, from its pinned or default configuration
+    (fit it inside fit_threads() to build its trees in parallel)
+
+    Returns:
+        (estimator, source) with source 'pinned' or 'default'
+    """
+    config, source = get_config(name, path)
+    estimator_class = SERVABLE_ESTIMATORS[config['estimator']][MODEL_TASKS[name]]
+    return estimator_class(n_jobs=n_jobs, **config['params']), source
+
+
+def pin_config(name, estimator, params, metrics=None, path=None):
+    """Pin the configuration of a model; it is used from the next start on"""
+    if estimator not in SERVABLE_ESTIMATORS:
+        raise ValueError(f"Only {', '.join(SERVABLE_ESTIMATORS)} can be served, not {estimator}")
+
+    path = path or config_path()
+    configs = load_pinned_configs(path)
+    # Keep other pinned settings of the model, such as its memory budget
+    configs[name] = dict(configs.get(name, {}), estimator=estimator, params=params)
+    if metrics:
+        configs[name]['metrics'] = metrics
+
+    _write_configs(configs, path)
+    return configs[name]
+
+
+def unpin_config(name, path=None):
+    """Drop the pinned configuration of a model (back to the default)"""
+    path = path or config_path()
+    configs = load_pinned_configs(path)
+    if configs.pop(name, None) is None:
+        return False
+
+    _write_configs(configs, path)
+    return True
+
+
+def _write_configs(configs, path):
+    """Replace the pinned configuration file atomically (readers never see a partial file)"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(configs, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
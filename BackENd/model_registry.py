@@ -0,0 +1,221 @@
+"""
+Multi-Site Model Registry
+Serves one set of load models per site (substation/feeder). Site models are
+lazy-loaded from their persisted artifacts (or trained on the site's load
+history on first use) and kept in a bounded LRU of hot sites
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from ml_predictor import NetworkLoadPredictor as RandomForestLoadPredictor, predictor
+from network_load_predictor import NetworkLoadPredictor, network_load_predictor
+from seasonal_predictor import SeasonalProfilePredictor, seasonal_predictor
+from ml_optimizer import MLOptimizer, ml_optimizer
+from forecast_service import forecast_service
+from model_store import model_store
+from supabase_client import supabase_fetcher
+
+# Site served by the global model instances
+DEFAULT_SITE = 'default'
+
+# Site IDs end up in artifact paths, so only plain identifiers are accepted
+SITE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Hot sites kept in memory when no capacity is given
+DEFAULT_CAPACITY = int(os.getenv('MODEL_REGISTRY_CAPACITY', '8'))
+
+
+def validate_site(site):
+    """Normalized site ID (DEFAULT_SITE for None/empty); ValueError if malformed"""
+    if site is None or site == '':
+        return DEFAULT_SITE
+    site = str(site)
+    if not SITE_ID_PATTERN.match(site):
+        raise ValueError(f"Invalid site ID {site!r}: use letters, digits, '_' or '-' (max 64)")
+    return site
+
+
+class SiteModels:
+    """The load models of one site"""
+
+    def __init__(self, site, rf=None, lr=None, profile=None, optimizer=None):
+        self.site = site
+        self.profile = profile or SeasonalProfilePredictor()
+        self.rf = rf or RandomForestLoadPredictor(fallback=self.profile)
+        self.lr = lr or NetworkLoadPredictor()
+        self.optimizer = optimizer or MLOptimizer(self.lr, self.rf, fallback=self.profile)
+        self.sources = {}
+        self.load_seconds = 0
+
+    def load(self, network_loads, store=None):
+        """Restore (or train) every model from the site's load history"""
+        start_time = time.time()
+        columns = {
+            'day_num': [l.day_number for l in network_loads],
+            'hour': [l.hour for l in network_loads],
+            'load_kw': [l.load_kilowatts for l in network_loads]
+        }
+
+        self.profile.train(columns)
+        self.sources['seasonal_profile'] = 'trained'
+        self.sources['network_load_rf'] = self.rf.warm_start(
+            network_loads, store=store, artifact_name=self.artifact_name('network_load_rf')
+        )
+        self.sources['network_load_lr'] = self.lr.warm_start(
+            columns=columns, store=store, artifact_name=self.artifact_name('network_load_lr')
+        )
+        self.load_seconds = round(time.time() - start_time, 3)
+        return self
+
+    def artifact_name(self, model_name):
+        """Artifact store name of one of the site's models (sites/<site>/<model>)"""
+        return os.path.join('sites', self.site, model_name)
+
+    def release(self):
+        """Drop the site's cached forecasts so evicted models can be freed"""
+        for model in (self.rf, self.lr, self.profile):
+            forecast_service.invalidate(model)
+
+    def get_stats(self):
+        """Where each model came from and how long loading took"""
+        return {
+            'site': self.site,
+            'sources': dict(self.sources),
+            'load_seconds': self.load_seconds,
+            'rf_trained': self.rf.is_trained,
+            'lr_trained': self.lr.is_trained
+        }
+
+
+class ModelRegistry:
+    """Bounded LRU of per-site models with hit/miss/eviction counters"""
+
+    def __init__(self, capacity=None, store=None, fetch_loads=None):
+        """
+        Args:
+            capacity: Most sites kept in memory (MODEL_REGISTRY_CAPACITY by default)
+            store: ModelStore the site artifacts live in
+            fetch_loads: fetch_loads(site) -> load history used to load or train a site
+        """
+        self.capacity = max(1, capacity or DEFAULT_CAPACITY)
+        self.store = store or model_store
+        self.fetch_loads = fetch_loads or supabase_fetcher.fetch_network_loads
+
+        # The default site is always resident and served by the global models
+        self.default = SiteModels(
+            DEFAULT_SITE, rf=predictor, lr=network_load_predictor,
+            profile=seasonal_predictor, optimizer=ml_optimizer
+        )
+
+        self._sites = OrderedDict()  # site -> SiteModels, least recently used first
+        self._loading = {}  # site -> lock, so concurrent misses load a site once
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_errors = 0
+
+    def get(self, site=None):
+        """
+        Models of a site, loading them on a miss
+
+        Raises:
+            ValueError: malformed site ID
+            RuntimeError: the site has no load history to build models from
+        """
+        site = validate_site(site)
+        if site == DEFAULT_SITE:
+            return self.default
+
+        with self._lock:
+            models = self._sites.get(site)
+            if models is not None:
+                self._sites.move_to_end(site)
+                self.hits += 1
+                return models
+            self.misses += 1
+            site_lock = self._loading.setdefault(site, threading.Lock())
+
+        with site_lock:
+            # Another request may have loaded the site while this one waited
+            with self._lock:
+                models = self._sites.get(site)
+                if models is not None:
+                    self._sites.move_to_end(site)
+                    return models
+
+            try:
+                models = self._load(site)
+            except Exception:
+                with self._lock:
+                    self.load_errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self._loading.pop(site, None)
+
+            self._insert(site, models)
+        return models
+
+    def _load(self, site):
+        """Build a site's models from its artifacts or load history"""
+        network_loads = self.fetch_loads(site)
+        if not network_loads:
+            raise RuntimeError(f"No load history for site {site}")
+
+        models = SiteModels(site).load(network_loads, self.store)
+        print(f"Loaded models of site {site} in {models.load_seconds:.2f}s ({models.sources})")
+        return models
+
+    def _insert(self, site, models):
+        """Add a site as most recently used, evicting the least recently used beyond capacity"""
+        evicted = []
+        with self._lock:
+            self._sites[site] = models
+            self._sites.move_to_end(site)
+            while len(self._sites) > self.capacity:
+                evicted.append(self._sites.popitem(last=False)[1])
+                self.evictions += 1
+
+        for old in evicted:
+            old.release()
+            print(f"Evicted models of site {old.site}")
+
+    def evict(self, site):
+        """Drop a site from memory (its artifacts stay on disk); True if it was resident"""
+        site = validate_site(site)
+        with self._lock:
+            models = self._sites.pop(site, None)
+            if models is not None:
+                self.evictions += 1
+        if models is None:
+            return False
+        models.release()
+        return True
+
+    def resident_sites(self):
+        """Sites in memory, least recently used first"""
+        with self._lock:
+            return list(self._sites)
+
+    def get_stats(self):
+        """Capacity, resident sites (least recently used first) and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._sites),
+                'sites': [models.get_stats() for models in self._sites.values()],
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'load_errors': self.load_errors,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+# Global model registry instance
+model_registry = ModelRegistry()
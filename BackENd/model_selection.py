@@ -0,0 +1,287 @@
+"""
+Latency-Aware Model Selection Harness
+Trains candidate configurations of the forest models in parallel, measures
+cross-validated quality, single-row and batch latency and model memory,
+and reports the Pareto front of the quality/cost tradeoff
+
+Usage:
+    python model_selection.py                       # report for every model
+    python model_selection.py patch_classifier      # report for one model
+    python model_selection.py patch_classifier --pin --tolerance 0.005
+"""
+
+import json
+import multiprocessing
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.model_selection import cross_val_score
+from forest_engine import FlatForest
+from model_config import SERVABLE_ESTIMATORS, MODEL_TASKS, DEFAULT_CONFIGS, pin_config
+
+# Quality metric cross-validated for every task (higher is better)
+SCORING = {'classifier': 'accuracy', 'regressor': 'r2'}
+
+# Rows of a batch prediction: one week of hourly slots, as the optimizer scores
+BATCH_ROWS = 168
+
+# Estimators evaluated for reference only; they cannot be pinned for serving
+REFERENCE_ESTIMATORS = {
+    'hist_gradient_boosting': {
+        'classifier': HistGradientBoostingClassifier,
+        'regressor': HistGradientBoostingRegressor
+    }
+}
+
+
+def candidate_configs(name):
+    """Candidate (estimator, params) configurations of a model, the current default first"""
+    default = DEFAULT_CONFIGS[name]
+    seed = default['params']['random_state']
+    candidates = [(default['estimator'], dict(default['params']))]
+
+    for estimator in SERVABLE_ESTIMATORS:
+        for n_estimators in (25, 50, 100, 200, 500, 1000):
+            for max_depth in (None, 8, 12):
+                for min_samples_leaf in (1, 5):
+                    params = {
+                        'n_estimators': n_estimators,
+                        'max_depth': max_depth,
+                        'min_samples_leaf': min_samples_leaf,
+                        'random_state': seed
+                    }
+                    candidates.append((estimator, params))
+
+    for max_iter in (50, 100, 200):
+        candidates.append(('hist_gradient_boosting', {'max_iter': max_iter, 'random_state': seed}))
+
+    return candidates
+
+
+def _build_candidate(name, estimator, params, n_jobs):
+    """Unfitted estimator of a candidate configuration"""
+    task = MODEL_TASKS[name]
+    if estimator in SERVABLE_ESTIMATORS:
+        return SERVABLE_ESTIMATORS[estimator][task](n_jobs=n_jobs, **params)
+    return REFERENCE_ESTIMATORS[estimator][task](**params)
+
+
+def _training_data(name, network_loads=None, n_samples=1000):
+    """Training set of a model, built the same way the model builds it"""
+    if name == 'patch_classifier':
+        from patch_classifier import PatchClassifier
+        return PatchClassifier().training_arrays(n_samples)
+
+    from ml_predictor import NetworkLoadPredictor
+    if network_loads is None:
+        from supabase_client import supabase_fetcher
+        network_loads = supabase_fetcher.fetch_network_loads()
+    return NetworkLoadPredictor().training_arrays(network_loads)
+
+
+def _fit_candidate(name, estimator, params, X, y, cv, n_jobs):
+    """
+    Cross-validate and fit one candidate inside a worker process
+    Runs at module level so it can be pickled by the process pool
+    """
+    model = _build_candidate(name, estimator, params, n_jobs)
+
+    start_time = time.time()
+    scores = cross_val_score(model, X, y, cv=cv, scoring=SCORING[MODEL_TASKS[name]])
+    model.fit(X, y)
+
+    return {
+        'estimator': estimator,
+        'params': params,
+        'cv_score': round(float(scores.mean()), 4),
+        'cv_std': round(float(scores.std()), 4),
+        'train_seconds': round(time.time() - start_time, 3),
+        'model': model
+    }
+
+
+def _median_latency_ms(predict, X, repeats):
+    """Median wall time of predict(X) over repeats calls, in milliseconds"""
+    predict(X)  # Warm-up call
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start_time)
+    return round(float(np.median(timings)) * 1000, 3)
+
+
+def _serving_predict(name, estimator, model):
+    """Prediction function of the path that would serve the model in production"""
+    is_classifier = MODEL_TASKS[name] == 'classifier'
+    if estimator in SERVABLE_ESTIMATORS:
+        flat_forest = FlatForest.from_sklearn(model)
+        return flat_forest.predict_proba if is_classifier else flat_forest.predict
+    return model.predict_proba if is_classifier else model.predict
+
+
+def measure_cost(name, result, X, repeats=20):
+    """Add single-row latency, batch latency and memory to a fitted candidate"""
+    model = result.pop('model')
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    predict = _serving_predict(name, result['estimator'], model)
+
+    rng = np.random.RandomState(0)
+    batch = X[rng.randint(0, len(X), BATCH_ROWS)]
+
+    result['single_row_ms'] = _median_latency_ms(predict, batch[:1], repeats)
+    result['batch_ms'] = _median_latency_ms(predict, batch, repeats)
+    result['model_bytes'] = len(pickle.dumps(model))
+    result['servable'] = result['estimator'] in SERVABLE_ESTIMATORS
+    return result
+
+
+def pareto_front(results):
+    """
+    Flag the candidates no other candidate beats on every axis at once
+    Axes: cv_score (higher), single_row_ms, batch_ms and model_bytes (lower)
+    """
+    def dominates(a, b):
+        no_worse = (a['cv_score'] >= b['cv_score'] and a['single_row_ms'] <= b['single_row_ms'] and
+                    a['batch_ms'] <= b['batch_ms'] and a['model_bytes'] <= b['model_bytes'])
+        better = (a['cv_score'] > b['cv_score'] or a['single_row_ms'] < b['single_row_ms'] or
+                  a['batch_ms'] < b['batch_ms'] or a['model_bytes'] < b['model_bytes'])
+        return no_worse and better
+
+    for candidate in results:
+        candidate['pareto'] = not any(dominates(other, candidate) for other in results)
+    return results
+
+
+def recommend(results, tolerance=0.005):
+    """
+    Cheapest servable Pareto candidate whose score is within tolerance of the best
+
+    Returns:
+        the chosen result dict, or None if no servable candidate qualifies
+    """
+    best_score = max(r['cv_score'] for r in results)
+    eligible = [
+        r for r in results
+        if r['pareto'] and r['servable'] and r['cv_score'] >= best_score - tolerance
+    ]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r['single_row_ms'], r['batch_ms'], r['model_bytes']))
+
+
+def select_model(name, candidates=None, network_loads=None, n_samples=1000, cv=5,
+                 max_workers=None, n_jobs=1, tolerance=0.005):
+    """
+    Evaluate every candidate configuration of one model
+
+    Candidates are trained and cross-validated in a process pool; latency
+    and memory are then measured one candidate at a time in this process,
+    so timings are not distorted by concurrent training.
+
+    Args:
+        name: 'patch_classifier' or 'network_load_rf'
+        candidates: list of (estimator, params), defaults to candidate_configs(name)
+        n_jobs: Tree-building threads per candidate (1 keeps workers independent)
+        tolerance: Score drop accepted for the recommended configuration
+
+    Returns:
+        dict report with every candidate, the Pareto flags and a recommendation
+    """
+    if name not in MODEL_TASKS:
+        raise ValueError(f"Unknown model: {name}")
+
+    candidates = candidates or candidate_configs(name)
+    X, y = _training_data(name, network_loads, n_samples)
+
+    print(f"Evaluating {len(candidates)} configurations of {name}...")
+    start_time = time.time()
+
+    fitted = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(_fit_candidate, name, estimator, params, X, y, cv, n_jobs)
+            for estimator, params in candidates
+        ]
+        for (estimator, params), future in zip(candidates, futures):
+            try:
+                fitted.append(future.result())
+            except Exception as e:
+                print(f"Candidate {estimator} {params} failed: {e}")
+
+    results = pareto_front([measure_cost(name, result, X) for result in fitted])
+    results.sort(key=lambda r: (-r['cv_score'], r['single_row_ms']))
+
+    default = DEFAULT_CONFIGS[name]
+    baseline = next(
+        (r for r in results if r['estimator'] == default['estimator'] and r['params'] == default['params']),
+        None
+    )
+
+    report = {
+        'model': name,
+        'scoring': SCORING[MODEL_TASKS[name]],
+        'n_rows': int(len(X)),
+        'cv_folds': cv,
+        'baseline': baseline,
+        'recommended': recommend(results, tolerance),
+        'candidates': results,
+        'wall_seconds': round(time.time() - start_time, 3)
+    }
+    print(f"Evaluated {len(results)} configurations in {report['wall_seconds']:.2f}s")
+    return report
+
+
+def format_report(report):
+    """Plain-text table of the Pareto front of a selection report"""
+    lines = [
+        f"{report['model']} ({report['scoring']}, {report['cv_folds']}-fold CV, {report['n_rows']} rows)",
+        f"{'estimator':<24}{'params':<58}{'score':>8}{'1-row ms':>10}{'batch ms':>10}{'KB':>10}"
+    ]
+    for r in report['candidates']:
+        if not r['pareto']:
+            continue
+        params = json.dumps({k: v for k, v in r['params'].items() if k != 'random_state'})
+        lines.append(
+            f"{r['estimator']:<24}{params:<58}{r['cv_score']:>8.4f}"
+            f"{r['single_row_ms']:>10.3f}{r['batch_ms']:>10.3f}{r['model_bytes'] / 1024:>10.0f}"
+        )
+
+    for label in ('baseline', 'recommended'):
+        r = report[label]
+        if r:
+            lines.append(
+                f"{label}: {r['estimator']} {r['params']} score={r['cv_score']:.4f} "
+                f"1-row={r['single_row_ms']:.3f}ms batch={r['batch_ms']:.3f}ms"
+            )
+    return '\n'.join(lines)
+
+
+def pin_recommended(report):
+    """Pin the recommended configuration of a report (used from the next start on)"""
+    r = report['recommended']
+    if r is None:
+        print(f"No servable configuration of {report['model']} to pin")
+        return None
+
+    metrics = {k: r[k] for k in ('cv_score', 'single_row_ms', 'batch_ms', 'model_bytes')}
+    config = pin_config(report['model'], r['estimator'], r['params'], metrics)
+    print(f"Pinned {report['model']}: {r['estimator']} {r['params']}")
+    return config
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    names = [a for a in args if a in MODEL_TASKS] or list(MODEL_TASKS)
+    tolerance = float(args[args.index('--tolerance') + 1]) if '--tolerance' in args else 0.005
+
+    for model_name in names:
+        selection = select_model(model_name, tolerance=tolerance)
+        print(format_report(selection))
+        if '--pin' in args:
+            pin_recommended(selection)
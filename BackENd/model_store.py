@@ -0,0 +1,174 @@
+"""
+Model Artifact Store
+Persists trained models and their metadata on disk so restarts and new
+workers load them memory-mapped instead of training again
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import joblib
+import sklearn
+
+# Bump when the layout of saved payloads changes so old artifacts are rebuilt
+ARTIFACT_FORMAT_VERSION = 3
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_artifacts')
+
+
+def fingerprint(*parts):
+    """
+    Content hash of the training data and configuration of a model
+
+    Accepts NumPy arrays (hashed by dtype, shape and raw bytes) and any
+    JSON-serializable values. The artifact format version and the
+    scikit-learn version are always mixed in, so artifacts pickled by an
+    incompatible build are never reused.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={ARTIFACT_FORMAT_VERSION};sklearn={sklearn.__version__}".encode())
+
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype}{part.shape}".encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+
+    return digest.hexdigest()[:16]
+
+
+# Estimator params that change how a model is trained or served, not what it learns
+RUNTIME_ONLY_PARAMS = ('n_jobs', 'verbose')
+
+
+def estimator_params(model):
+    """Estimator class and params relevant to the fingerprint (runtime-only params dropped)"""
+    params = {k: v for k, v in model.get_params().items() if k not in RUNTIME_ONLY_PARAMS}
+    params['estimator_class'] = type(model).__name__
+    return params
+
+
+class ModelStore:
+    """Versioned on-disk store: <directory>/<model name>/<fingerprint>/"""
+
+    def __init__(self, directory=None, keep_versions=3):
+        self.directory = directory or os.getenv('MODEL_ARTIFACT_DIR', DEFAULT_ARTIFACT_DIR)
+        self.enabled = os.getenv('MODEL_ARTIFACTS', '1') != '0'
+        self.keep_versions = keep_versions
+
+    def _artifact_dir(self, name, key):
+        return os.path.join(self.directory, name, key)
+
+    def load(self, name, key, mmap=True):
+        """
+        Load an artifact
+
+        Large NumPy arrays in the payload are memory-mapped read-only, so
+        workers loading the same artifact share the pages.
+
+        Returns:
+            (payload, metadata) or None if no artifact exists for this key
+        """
+        if not self.enabled:
+            return None
+
+        path = self._artifact_dir(name, key)
+        model_path = os.path.join(path, 'model.joblib')
+        metadata_path = os.path.join(path, 'metadata.json')
+        if not (os.path.exists(model_path) and os.path.exists(metadata_path)):
+            return None
+
+        try:
+            payload = joblib.load(model_path, mmap_mode='r' if mmap else None)
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except Exception as e:
+            print(f"Error loading model artifact {name}/{key}: {e}")
+            return None
+
+        return payload, metadata
+
+    def save(self, name, key, payload, metadata):
+        """Save an artifact atomically (write to a temp dir, then rename)"""
+        if not self.enabled:
+            return False
+
+        final_path = self._artifact_dir(name, key)
+        tmp_path = f"{final_path}.tmp-{os.getpid()}"
+
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            # Uncompressed so the arrays can be memory-mapped on load
+            joblib.dump(payload, os.path.join(tmp_path, 'model.joblib'))
+
+            metadata = dict(metadata)
+            metadata.update({
+                'name': name,
+                'fingerprint': key,
+                'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'sklearn_version': sklearn.__version__,
+                'format_version': ARTIFACT_FORMAT_VERSION
+            })
+            with open(os.path.join(tmp_path, 'metadata.json'), 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+
+            if os.path.exists(final_path):
+                # Another worker saved the same artifact first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            else:
+                os.rename(tmp_path, final_path)
+        except Exception as e:
+            print(f"Error saving model artifact {name}/{key}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+
+        self._prune(name)
+        return True
+
+    def load_or_train(self, name, predictor, key, train_fn, force=False):
+        """
+        Restore a predictor from its artifact, or train it and save one
+
+        The predictor must implement get_artifact() -> (payload, metadata)
+        and load_artifact(payload, metadata). force=True always retrains and
+        overwrites the artifact.
+
+        Returns:
+            'loaded' or 'trained'
+        """
+        if force:
+            shutil.rmtree(self._artifact_dir(name, key), ignore_errors=True)
+
+        artifact = None if force else self.load(name, key)
+        if artifact is not None:
+            predictor.load_artifact(*artifact)
+            print(f"Loaded {name} model from artifact {key}")
+            return 'loaded'
+
+        start_time = time.time()
+        train_fn()
+        payload, metadata = predictor.get_artifact()
+        metadata['training_seconds'] = round(time.time() - start_time, 3)
+        self.save(name, key, payload, metadata)
+        return 'trained'
+
+    def list_artifacts(self, name):
+        """List saved fingerprints for a model, newest first"""
+        model_dir = os.path.join(self.directory, name)
+        if not os.path.isdir(model_dir):
+            return []
+        keys = [k for k in os.listdir(model_dir) if '.tmp-' not in k]
+        return sorted(keys, key=lambda k: os.path.getmtime(os.path.join(model_dir, k)), reverse=True)
+
+    def _prune(self, name):
+        """Keep only the newest keep_versions artifacts of a model"""
+        for key in self.list_artifacts(name)[self.keep_versions:]:
+            shutil.rmtree(self._artifact_dir(name, key), ignore_errors=True)
+
+
+# Global model store instance
+model_store = ModelStore()
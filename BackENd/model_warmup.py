@@ -0,0 +1,111 @@
+"""
+Background Model Warm-up
+Trains or loads every ML model in a background thread pool at startup so
+requests are served immediately, and reports the warm state of each model
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ml_predictor import predictor
+from network_load_predictor import network_load_predictor
+from patch_classifier import patch_classifier
+from seasonal_predictor import seasonal_predictor
+from supabase_client import supabase_fetcher
+
+# PATCH_CLASSIFIER_COMPILE=1 serves the classifier from its lookup table (see
+# PatchClassifier.compile) once it is warm; off by default, compiling takes a while
+COMPILE_PATCH_CLASSIFIER = os.getenv('PATCH_CLASSIFIER_COMPILE', '0') == '1'
+
+
+class ModelWarmup:
+    """Warms up all models without blocking the request path"""
+
+    def __init__(self, max_workers=None, compile_classifier=None):
+        self.compile_classifier = COMPILE_PATCH_CLASSIFIER if compile_classifier is None else compile_classifier
+        self.tasks = {
+            # Near-zero cost: ready first and served as the fallback forecast meanwhile
+            'seasonal_profile': self._warm_seasonal_profile,
+            'network_load_rf': lambda: predictor.warm_start(supabase_fetcher.fetch_network_loads()),
+            'network_load_lr': lambda: network_load_predictor.ensure_trained(),
+            'patch_classifier': self._warm_patch_classifier
+        }
+        self.max_workers = max_workers or len(self.tasks)
+        self.status = {name: {'state': 'pending'} for name in self.tasks}
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Submit every warm-up task to the thread pool (only the first call does anything)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='model-warmup')
+            for name, task in self.tasks.items():
+                self._futures[name] = self._executor.submit(self._run, name, task)
+
+        print(f"Warming up {len(self.tasks)} ML models in the background...")
+
+    def _warm_seasonal_profile(self):
+        """Build the seasonal profile from the load history"""
+        if seasonal_predictor.train_from_loads(supabase_fetcher.fetch_network_loads()):
+            return 'trained'
+        return seasonal_predictor.ensure_trained()
+    
+    def _warm_patch_classifier(self):
+        """Train or load the classifier, then compile its lookup table if enabled"""
+        source = patch_classifier.ensure_trained()
+        if not self.compile_classifier:
+            return source
+        report = patch_classifier.compile()
+        return f"{source}, {'compiled' if report['enabled'] else 'not compiled'}"
+    
+    def _run(self, name, task):
+        """Run one warm-up task and record its outcome"""
+        start_time = time.time()
+        with self._lock:
+            self.status[name] = {'state': 'warming', 'started_at': start_time}
+
+        try:
+            source = task()
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            with self._lock:
+                self.status[name] = {
+                    'state': 'failed',
+                    'error': str(e),
+                    'seconds': round(time.time() - start_time, 3)
+                }
+            return
+
+        elapsed = time.time() - start_time
+        with self._lock:
+            self.status[name] = {
+                'state': 'ready',
+                'source': source,
+                'seconds': round(elapsed, 3)
+            }
+        print(f"✅ {name} ready in {elapsed:.2f}s")
+
+    def is_ready(self, name=None):
+        """Whether one model (or every model when name is None) is warm"""
+        with self._lock:
+            names = [name] if name else list(self.status)
+            return all(self.status[n]['state'] == 'ready' for n in names)
+
+    def get_status(self):
+        """Warm state of every model"""
+        with self._lock:
+            return {name: dict(state) for name, state in self.status.items()}
+
+    def wait(self, timeout=None):
+        """Block until every warm-up task has finished (for scripts and tests)"""
+        for future in list(self._futures.values()):
+            future.result(timeout=timeout)
+        return self.is_ready()
+
+
+# Global warm-up instance
+model_warmup = ModelWarmup()
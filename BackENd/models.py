@@ -65,12 +65,18 @@ class ScheduledPatch:
     assigned_crew: List[str]
     network_load: int
     score: float
+    day: str = None  # Weekday the patch starts on
+    day_number: int = None  # 0=Monday, 6=Sunday
+    horizon_day: int = None  # Day of the scheduling horizon (0 = its first day)
     
     def to_dict(self):
         return {
             'patch': self.patch.to_dict(),
             'start_hour': self.start_hour,
             'end_hour': self.end_hour,
+            'day': self.day,
+            'day_number': self.day_number,
+            'horizon_day': self.horizon_day,
             'assigned_crew': self.assigned_crew,
             'network_load': self.network_load,
             'score': self.score
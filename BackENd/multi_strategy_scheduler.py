@@ -1,68 +1,134 @@
 """
 Multi-Strategy Scheduler
 Provides multiple scheduling strategies based on different priorities
+The strategies run concurrently in a thread pool over one immutable snapshot
+of the inputs, so all options together take as long as the slowest one
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from scheduler import PatchScheduler
 from ml_optimizer import ml_optimizer
 
+STRATEGIES = ('network_optimized', 'urgency_first', 'balanced')
+
 class MultiStrategyScheduler:
-    def __init__(self):
+    def __init__(self, max_workers=None):
         self.basic_scheduler = PatchScheduler()
+        # Threads, not processes: every strategy reads the same in-memory models
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(STRATEGIES), thread_name_prefix='schedule-strategy'
+        )
     
-    def generate_multiple_schedules(self, patches, crew, network_loads):
+    def generate_multiple_schedules(self, patches, crew, network_loads, local_search=None, optimizer=None):
         """
         Generate multiple schedule options with different strategies
         Returns 3 schedules: Network-Optimized, Urgency-First, and Balanced
+        
+        The strategies run in parallel; each result carries its runtime_ms
+        (including its local search), or an error if that strategy failed.
+        
+        local_search: Optional improve_strategy() options (iterations,
+                      time_limit, seed) to run on every schedule
+        optimizer: MLOptimizer of the site (the global one if None)
         """
-        strategies = {
-            'network_optimized': self._network_optimized_schedule(patches, crew, network_loads),
-            'urgency_first': self._urgency_first_schedule(patches, crew, network_loads),
-            'balanced': self._balanced_schedule(patches, crew, network_loads)
+        # Shared read-only snapshot: no strategy can change another's inputs, and
+        # loads and crew availability are preprocessed once for all of them
+        patches = tuple(patches)
+        context = self.basic_scheduler.context(network_loads, crew)
+        crew, network_loads = context.crew, context.network_loads
+        runners = {
+            'network_optimized': lambda: self._network_optimized_schedule(patches, crew, network_loads, optimizer, context),
+            'urgency_first': lambda: self._urgency_first_schedule(patches, crew, network_loads, context),
+            'balanced': lambda: self._balanced_schedule(patches, crew, network_loads, context)
         }
         
-        return strategies
+        futures = {
+            name: self._executor.submit(self._run_strategy, name, runners[name], context, local_search)
+            for name in STRATEGIES
+        }
+        return {name: futures[name].result() for name in STRATEGIES}
+    
+    def _run_strategy(self, name, runner, context, local_search):
+        """Run one strategy (and its local search) and time it"""
+        start_time = time.perf_counter()
+        try:
+            strategy = runner()
+            if local_search is not None:
+                self.improve_strategy(strategy, context.crew, context.network_loads, context=context, **local_search)
+        except Exception as e:
+            print(f"Strategy {name} failed: {e}")
+            strategy = {'strategy': name, 'error': str(e), 'schedule': []}
+        strategy['runtime_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+        return strategy
+    
+    def improve_strategy(self, strategy, crew, network_loads, iterations=None, time_limit=None, seed=0, context=None):
+        """
+        Improve a strategy's schedule in place by local search (PatchScheduler.improve)
+        
+        The search stays on the strategy's own horizon: the single-day
+        strategies (horizon_days 1) are searched over one hourly day that
+        wraps at midnight, like their crew bookings, so they are not spread
+        over a week. Moves are scored with the balanced objective, which
+        tightens a schedule rather than keeping its ordering rule. The run
+        statistics are stored under 'local_search'.
+        """
+        horizon_days = strategy.get('horizon_days')
+        if horizon_days == 1:
+            context = self.basic_scheduler.context(network_loads, crew, 60, 1, cyclic=True)
+        result = self.basic_scheduler.improve(
+            strategy['schedule'], network_loads, crew,
+            iterations=iterations, time_limit=time_limit, seed=seed,
+            horizon_days=horizon_days, context=context
+        )
+        
+        if horizon_days == 1:
+            # Single-day plans: keep the strategy's own day labels instead of the horizon's Monday
+            days = {entry['patch']['id']: entry.get('day') for entry in strategy['schedule']}
+            for entry in result['schedule']:
+                if 'start_hour' in entry:
+                    entry.pop('day_number', None)
+                    entry.pop('horizon_day', None)
+                    entry['day'] = days.get(entry['patch']['id'])
+                    if entry['day'] is None:
+                        del entry['day']
+        
+        strategy['schedule'] = result['schedule']
+        strategy['local_search'] = result['local_search']
+        return strategy
     
-    def _network_optimized_schedule(self, patches, crew, network_loads):
+    def _network_optimized_schedule(self, patches, crew, network_loads, optimizer=None, context=None):
         """
         Strategy 1: Prioritize lowest network load times
         Best for: Minimizing system impact
         """
+        optimizer = optimizer or ml_optimizer
+        context = self.basic_scheduler.context(network_loads, crew, context=context)
         # Sort patches by priority (handle high priority first, but optimize for load)
         sorted_patches = sorted(patches, key=lambda p: -p.priority)
         
         scheduled = []
-        already_scheduled = {}
+        # Hourly crew bookings for the day (windows wrap at midnight)
+        index = context.crew_index(days=1, resolution_minutes=60, cyclic=True)
         
         for patch in sorted_patches:
             # Use ML optimizer to find optimal time based on network load
-            optimal_times = ml_optimizer.find_optimal_hours_for_patch(patch, len(crew), top_n=10)
+            optimal_times = optimizer.find_optimal_hours_for_patch(patch, len(crew), top_n=10, context=context)
             
             # Find first available time slot with sufficient crew
             scheduled_patch = None
             for time_slot in optimal_times:
                 hour = time_slot['hour']
                 
-                # Check crew availability
+                # Check crew availability: enough crew each not yet booked for the whole patch
                 duration_hours = int(patch.duration)
-                crew_available = True
-                
-                for i in range(duration_hours):
-                    check_hour = (hour + i) % 24
-                    if check_hour in already_scheduled:
-                        busy_crew = already_scheduled[check_hour]
-                        available_crew = [c for c in crew if c.name not in busy_crew]
-                    else:
-                        available_crew = crew
-                    
-                    if len(available_crew) < patch.min_crew:
-                        crew_available = False
-                        break
+                idle = index.idle_crew(hour, max(1, duration_hours))
+                crew_available = len(idle) >= patch.min_crew
                 
                 if crew_available:
                     # Schedule here
-                    available_crew_list = [c for c in crew if hour not in already_scheduled or c.name not in already_scheduled.get(hour, [])]
-                    assigned_crew = available_crew_list[:patch.min_crew]
+                    assigned = idle[:patch.min_crew]
+                    assigned_crew = [crew[i] for i in assigned]
                     
                     scheduled_patch = {
                         'patch': patch.to_dict(),
@@ -77,11 +143,7 @@ class MultiStrategyScheduler:
                     }
                     
                     # Mark crew as busy
-                    for i in range(duration_hours):
-                        busy_hour = (hour + i) % 24
-                        if busy_hour not in already_scheduled:
-                            already_scheduled[busy_hour] = []
-                        already_scheduled[busy_hour].extend([c.name for c in assigned_crew])
+                    index.book(assigned, hour, duration_hours)
                     
                     break
             
@@ -99,62 +161,43 @@ class MultiStrategyScheduler:
             'strategy': 'Network Optimized',
             'description': 'Prioritizes lowest network load times to minimize system impact',
             'icon': '📊',
+            'horizon_days': 1,
             'schedule': scheduled
         }
     
-    def _urgency_first_schedule(self, patches, crew, network_loads):
+    def _urgency_first_schedule(self, patches, crew, network_loads, context=None):
         """
         Strategy 2: Prioritize high-priority patches ASAP
         Best for: Critical patches that need immediate attention
         """
+        context = self.basic_scheduler.context(network_loads, crew, context=context)
         # Sort by priority first, then by duration
         sorted_patches = sorted(patches, key=lambda p: (-p.priority, p.duration))
         
         scheduled = []
-        already_scheduled = {}
+        # Hourly crew availability and bookings for the day (windows wrap at midnight)
+        index = context.crew_index(days=1, resolution_minutes=60, cyclic=True)
         
         for patch in sorted_patches:
             # Find earliest possible time (prioritize urgency over network load)
-            best_hour = None
             best_score = -1
             best_crew = None
             best_load = 0
+            duration_hours = int(patch.duration)
             
-            # Start from hour 0 and find first available slot
-            for start_hour in range(24):
-                duration_hours = int(patch.duration)
-                crew_available = True
-                
-                # Check crew availability
-                for i in range(duration_hours):
-                    check_hour = (start_hour + i) % 24
-                    if check_hour in already_scheduled:
-                        busy_crew = already_scheduled[check_hour]
-                        available_crew = [c for c in crew if c.name not in busy_crew and check_hour in [h for start, end in c.available_hours for h in range(start, end)]]
-                    else:
-                        available_crew = [c for c in crew if check_hour in [h for start, end in c.available_hours for h in range(start, end)]]
-                    
-                    if len(available_crew) < patch.min_crew:
-                        crew_available = False
-                        break
+            # Start from hour 0: the first hour with enough crew each free for the whole patch
+            best_hour = next(
+                (h for h in range(24) if len(index.free_crew(h, max(1, duration_hours))) >= patch.min_crew),
+                None
+            )
+            
+            if best_hour is not None:
+                best_load = context.hour_load(best_hour, 40)
                 
-                if crew_available:
-                    # Calculate score for this time
-                    network_load = next(
-                        (l.load_kilowatts for l in network_loads if l.hour == start_hour),
-                        40
-                    )
-                    
-                    # Score favors early hours for urgent patches
-                    score = 100 - start_hour  # Earlier = higher score
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_hour = start_hour
-                        best_load = network_load
-                        
-                        available_crew_list = [c for c in crew if start_hour not in already_scheduled or c.name not in already_scheduled.get(start_hour, [])]
-                        best_crew = available_crew_list[:patch.min_crew]
+                # Score favors early hours for urgent patches
+                best_score = 100 - best_hour  # Earlier = higher score
+                best_members = index.free_crew(best_hour, max(1, duration_hours))[:patch.min_crew]
+                best_crew = [crew[i] for i in best_members]
             
             if best_hour is not None and best_crew:
                 scheduled_patch = {
@@ -169,12 +212,7 @@ class MultiStrategyScheduler:
                 }
                 
                 # Mark crew as busy
-                duration_hours = int(patch.duration)
-                for i in range(duration_hours):
-                    busy_hour = (best_hour + i) % 24
-                    if busy_hour not in already_scheduled:
-                        already_scheduled[busy_hour] = []
-                    already_scheduled[busy_hour].extend([c.name for c in best_crew])
+                index.book(best_members, best_hour, duration_hours)
                 
                 scheduled.append(scheduled_patch)
             else:
@@ -188,21 +226,24 @@ class MultiStrategyScheduler:
             'strategy': 'Urgency First',
             'description': 'Schedules high-priority patches as soon as possible',
             'icon': '🚨',
+            'horizon_days': 1,
             'schedule': scheduled
         }
     
-    def _balanced_schedule(self, patches, crew, network_loads):
+    def _balanced_schedule(self, patches, crew, network_loads, context=None):
         """
         Strategy 3: Balance between network load and urgency
         Best for: General use - considers both factors
         """
         # Use the basic scheduler (already balanced)
-        schedule = self.basic_scheduler.schedule_patches(patches, crew, network_loads)
+        context = self.basic_scheduler.context(network_loads, crew, context=context)
+        schedule = self.basic_scheduler.optimize(network_loads, crew, patches, context=context)
         
         return {
             'strategy': 'Balanced',
             'description': 'Balances network load optimization with patch priority',
             'icon': '⚖️',
+            'horizon_days': context.horizon_days,
             'schedule': schedule
         }
     
@@ -3,114 +3,52 @@ Network Load Predictor using Linear Regression
 Predicts network load (kW) based on day and time
 """
 
+import copy
+import threading
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import warnings
+from slot_grid import get_slot_grid
+from forecast_service import DAYS
+from seasonal_predictor import seasonal_predictor
+from model_store import model_store, fingerprint
+from synthetic_data import (
+    SYNTHETIC_DATA_VERSION, generate_network_load_columns, network_load_columns_to_frame
+)
 warnings.filterwarnings('ignore')
 
 class NetworkLoadPredictor:
-    def __init__(self):
+    def __init__(self, fallback=None):
         self.model = LinearRegression()
         self.is_trained = False
+        self._train_lock = threading.Lock()
+        self.fallback = fallback or seasonal_predictor  # Served while the model warms up
+        self.model_version = 0  # Bumped on every (re)train so cached forecasts are rebuilt
         self.feature_names = ['day_num', 'hour', 'minute', 'is_weekend', 'is_business_hours']
         self.accuracy = 0
         self.r2_score = 0
         self.mae = 0
         self.rmse = 0
         
-    def generate_synthetic_training_data(self, n_samples=1000):
-        """Generate synthetic network load training data"""
-        np.random.seed(42)
-        
-        # Generate time-series data for a week
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        hours = list(range(24))
-        minutes = [0, 15, 30, 45]
-        
-        data_rows = []
-        
-        for day in days:
-            for hour in hours:
-                for minute in minutes:
-                    # Base load pattern
-                    base_load = 30  # kW
-                    
-                    # Time-of-day pattern
-                    if 0 <= hour < 6:  # Night (low load)
-                        time_factor = 0.7 + np.random.uniform(-0.1, 0.1)
-                    elif 6 <= hour < 9:  # Morning ramp-up
-                        time_factor = 0.9 + np.random.uniform(-0.1, 0.1)
-                    elif 9 <= hour < 17:  # Business hours (high load)
-                        time_factor = 1.3 + np.random.uniform(-0.1, 0.1)
-                    elif 17 <= hour < 22:  # Evening (moderate load)
-                        time_factor = 1.1 + np.random.uniform(-0.1, 0.1)
-                    else:  # Late evening
-                        time_factor = 0.8 + np.random.uniform(-0.1, 0.1)
-                    
-                    # Day-of-week pattern
-                    if day in ['Saturday', 'Sunday']:
-                        day_factor = 0.6 + np.random.uniform(-0.1, 0.1)
-                    else:
-                        day_factor = 1.0
-                    
-                    # Calculate load
-                    load_kw = base_load * time_factor * day_factor
-                    load_kw = max(5, load_kw)  # Minimum 5 kW
-                    
-                    data_rows.append({
-                        'day': day,
-                        'time': f"{hour:02d}:{minute:02d}",
-                        'load_kw': round(load_kw, 2)
-                    })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data_rows)
-        
-        # Add some random samples to reach n_samples
-        if len(df) < n_samples:
-            extra_samples = n_samples - len(df)
-            extra_rows = []
-            for _ in range(extra_samples):
-                day = np.random.choice(days)
-                hour = np.random.randint(0, 24)
-                minute = np.random.choice(minutes)
-                
-                # Similar logic as above
-                base_load = 30
-                if 0 <= hour < 6:
-                    time_factor = 0.7 + np.random.uniform(-0.1, 0.1)
-                elif 6 <= hour < 9:
-                    time_factor = 0.9 + np.random.uniform(-0.1, 0.1)
-                elif 9 <= hour < 17:
-                    time_factor = 1.3 + np.random.uniform(-0.1, 0.1)
-                elif 17 <= hour < 22:
-                    time_factor = 1.1 + np.random.uniform(-0.1, 0.1)
-                else:
-                    time_factor = 0.8 + np.random.uniform(-0.1, 0.1)
-                
-                if day in ['Saturday', 'Sunday']:
-                    day_factor = 0.6 + np.random.uniform(-0.1, 0.1)
-                else:
-                    day_factor = 1.0
-                
-                load_kw = base_load * time_factor * day_factor
-                load_kw = max(5, load_kw)
-                
-                extra_rows.append({
-                    'day': day,
-                    'time': f"{hour:02d}:{minute:02d}",
-                    'load_kw': round(load_kw, 2)
-                })
-            
-            df = pd.concat([df, pd.DataFrame(extra_rows)], ignore_index=True)
+        # Sufficient statistics (X'X, X'y with an intercept column) for incremental updates
+        self.xtx = None
+        self.xty = None
+        self.n_observations = 0
+        self.n_updates = 0
         
-        return df
+    def generate_synthetic_training_data(self, n_samples=1000, seed=42):
+        """Generate synthetic network load training data (string-formatted DataFrame)"""
+        return network_load_columns_to_frame(generate_network_load_columns(n_samples, seed))
     
     def preprocess_data(self, df):
-        """Preprocess the data for training"""
+        """
+        Preprocess string-formatted data (day names, "HH:MM" times) for training
+        Thin adapter: parses the strings, then uses the numeric feature path
+        """
         # Create a copy
         df_processed = df.copy()
         
@@ -133,40 +71,107 @@ class NetworkLoadPredictor:
         df_processed['minute'] = time_split[1].astype(float)
         
         # Add engineered features
-        df_processed['is_weekend'] = (df_processed['day_num'] >= 5).astype(int)
-        df_processed['is_business_hours'] = (
-            (df_processed['hour'] >= 9) & (df_processed['hour'] < 17) & 
-            (df_processed['day_num'] < 5)
-        ).astype(int)
+        features = self.feature_matrix(df_processed['day_num'], df_processed['hour'], df_processed['minute'])
+        df_processed['is_weekend'] = features[:, 3].astype(int)
+        df_processed['is_business_hours'] = features[:, 4].astype(int)
         
         return df_processed
     
-    def train(self, df=None, n_samples=1000):
-        """Train the Linear Regression model"""
-        print("Training Network Load Linear Regression model...")
+    def feature_matrix(self, day_nums, hours, minutes=0):
+        """
+        Numeric feature matrix in feature_names order, no string parsing
+        
+        Args:
+            day_nums: Array-like of day numbers (0=Monday, 6=Sunday)
+            hours: Array-like of hours (0-23)
+            minutes: Scalar or array-like of minutes (0-59)
+        """
+        day_nums = np.asarray(day_nums, dtype=float)
+        hours = np.asarray(hours, dtype=float)
+        minutes = np.broadcast_to(np.asarray(minutes, dtype=float), day_nums.shape)
+        
+        is_weekend = (day_nums >= 5).astype(float)
+        is_business_hours = ((hours >= 9) & (hours < 17) & (day_nums < 5)).astype(float)
+        
+        return np.column_stack([day_nums, hours, minutes, is_weekend, is_business_hours])
+    
+    def preprocess_columns(self, columns):
+        """
+        Numeric ingestion fast path
+        
+        Args:
+            columns: Anything indexable by column name - dict of arrays,
+                     structured NumPy array, DataFrame or Arrow table - with
+                     day_num, hour, optional minute and load_kw (or load)
+        
+        Returns:
+            (X, y) NumPy arrays
+        """
+        day_nums = self._column(columns, 'day_num')
+        hours = self._column(columns, 'hour')
+        minutes = self._column(columns, 'minute')
+        loads = self._column(columns, 'load_kw', 'load')
+        
+        if day_nums is None or hours is None or loads is None:
+            raise ValueError("columns need day_num, hour and load_kw (or load)")
+        
+        X = self.feature_matrix(day_nums, hours, 0 if minutes is None else minutes)
+        return X, loads
+    
+    def _column(self, columns, *names):
+        """First of names present in columns, as a float array (None if missing)"""
+        for name in names:
+            try:
+                return np.asarray(columns[name], dtype=float)
+            except (KeyError, ValueError, IndexError):
+                continue
+        return None
+    
+    def _training_arrays(self, df=None, columns=None):
+        """(X, y) from numeric columns, or from a string-formatted DataFrame"""
+        if columns is not None:
+            return self.preprocess_columns(columns)
+        return self.preprocess_columns(self.preprocess_data(df))
+    
+    def train(self, df=None, n_samples=1000, columns=None):
+        """
+        Train the Linear Regression model
         
-        # Generate or use provided data
-        if df is None:
-            df = self.generate_synthetic_training_data(n_samples)
+        Args:
+            df: String-formatted DataFrame (day, time, load_kw)
+            n_samples: Size of the synthetic set used when no data is given
+            columns: Numeric columns (see preprocess_columns), skips string parsing
+        """
+        print("Training Network Load Linear Regression model...")
         
-        # Preprocess
-        df_processed = self.preprocess_data(df)
+        # Generate or use provided data (synthetic data skips string parsing)
+        if df is None and columns is None:
+            columns = generate_network_load_columns(n_samples)
         
-        # Prepare features and target
-        X = df_processed[self.feature_names]
-        y = df_processed['load_kw']
+        # Preprocess into feature matrix and target
+        X, y = self._training_arrays(df, columns)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=1234
         )
         
-        # Train model
-        self.model.fit(X_train, y_train)
+        # Train a fresh model and swap it in (readers keep the previous fit until then)
+        model = clone(self.model)
+        model.fit(X_train, y_train)
+        self.model = model
         self.is_trained = True
+        self.model_version += 1
+        
+        # Keep sufficient statistics so new readings can be folded in later
+        design = self._design_matrix(X_train)
+        self.xtx = design.T @ design
+        self.xty = design.T @ y_train
+        self.n_observations = len(y_train)
+        self.n_updates = 0
         
         # Calculate metrics
-        y_pred = self.model.predict(X_test)
+        y_pred = model.predict(X_test)
         self.r2_score = r2_score(y_test, y_pred)
         self.mae = mean_absolute_error(y_test, y_pred)
         self.rmse = np.sqrt(mean_squared_error(y_test, y_pred))
@@ -179,6 +184,114 @@ class NetworkLoadPredictor:
         
         return self.accuracy
     
+    def _design_matrix(self, X):
+        """Feature matrix with a leading intercept column"""
+        X = np.asarray(X, dtype=float)
+        return np.column_stack([np.ones(len(X)), X])
+    
+    def update(self, df=None, columns=None):
+        """
+        Fold newly ingested load readings into the model without a full refit
+        
+        Adds the batch to the stored sufficient statistics (X'X and X'y) and
+        re-solves the normal equations, so the cost depends only on the batch
+        size, not on the training history.
+        
+        Args:
+            df: DataFrame in the training format (day, time, load_kw)
+            columns: Numeric columns (see preprocess_columns), skips string parsing
+        
+        Returns:
+            Total number of observations the model is now fitted on
+        """
+        self.ensure_trained()
+        if columns is None and (df is None or len(df) == 0):
+            return self.n_observations
+        
+        X, y = self._training_arrays(df, columns)
+        if len(y) == 0:
+            return self.n_observations
+        design = self._design_matrix(X)
+        
+        with self._train_lock:
+            if self.xtx is None:
+                raise ValueError("Model has no sufficient statistics; retrain it before updating")
+            
+            self.xtx = self.xtx + design.T @ design
+            self.xty = self.xty + design.T @ y
+            self.n_observations += len(y)
+            self.n_updates += 1
+            
+            # Solve into a copy and swap it in: predictions never see a half-updated model
+            coefficients = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+            model = copy.copy(self.model)
+            model.intercept_ = coefficients[0]
+            model.coef_ = coefficients[1:]
+            self.model = model
+            self.model_version += 1
+        
+        return self.n_observations
+    
+    def ensure_trained(self):
+        """Train or load the model once, even when several threads ask at the same time"""
+        if self.is_trained:
+            return 'ready'
+        with self._train_lock:
+            if not self.is_trained:
+                return self.warm_start()
+        return 'ready'
+    
+    def warm_start(self, df=None, n_samples=1000, store=None, force=False, columns=None,
+                   artifact_name='network_load_lr'):
+        """
+        Load the trained model from the artifact store
+        Trains (and saves a new artifact) only if the training data changed
+        artifact_name keeps the artifacts of different sites apart
+        """
+        store = store or model_store
+        if columns is not None:
+            key = fingerprint('network_load_lr', *self.preprocess_columns(columns))
+        elif df is None:
+            # Synthetic data is fully determined by its configuration
+            key = fingerprint('network_load_lr', 'synthetic', SYNTHETIC_DATA_VERSION, n_samples)
+        else:
+            key = fingerprint('network_load_lr', pd.util.hash_pandas_object(df, index=False).values)
+        return store.load_or_train(
+            artifact_name, self, key, lambda: self.train(df, n_samples, columns=columns), force=force
+        )
+    
+    def get_artifact(self):
+        """Return (payload, metadata) for the model artifact store"""
+        payload = {
+            'model': self.model,
+            'xtx': self.xtx,
+            'xty': self.xty
+        }
+        metadata = {
+            'model_type': 'Linear Regression',
+            'n_observations': self.n_observations,
+            'feature_names': self.feature_names,
+            'r2_score': self.r2_score,
+            'accuracy': self.accuracy,
+            'mae': self.mae,
+            'rmse': self.rmse
+        }
+        return payload, metadata
+    
+    def load_artifact(self, payload, metadata):
+        """Restore the trained model and its metrics from an artifact"""
+        self.model = payload['model']
+        self.xtx = None if payload.get('xtx') is None else np.array(payload['xtx'])
+        self.xty = None if payload.get('xty') is None else np.array(payload['xty'])
+        self.n_observations = metadata.get('n_observations', 0)
+        self.n_updates = 0
+        self.r2_score = metadata.get('r2_score', 0)
+        self.accuracy = metadata.get('accuracy', 0)
+        self.mae = metadata.get('mae', 0)
+        self.rmse = metadata.get('rmse', 0)
+        self.is_trained = True
+        self.model_version += 1
+    
     def predict(self, day, hour, minute=0):
         """
         Predict network load for a specific day and time
@@ -192,7 +305,10 @@ class NetworkLoadPredictor:
             Predicted load in kW
         """
         if not self.is_trained:
-            self.train()
+            if self._train_lock.locked():
+                # Warming up in another thread: answer from the seasonal profile instead of waiting
+                return max(5, self.fallback.predict(day, hour, minute))
+            self.ensure_trained()
         
         # Convert day name to number if needed
         if isinstance(day, str):
@@ -215,20 +331,48 @@ class NetworkLoadPredictor:
         
         return max(5, round(prediction, 2))  # Minimum 5 kW
     
-    def predict_week(self):
-        """Predict network load for an entire week (168 hours)"""
+    def predict_batch(self, day_nums, hours, minutes=0):
+        """
+        Predict network load for many (day, hour, minute) slots in one model call
+        
+        Args:
+            day_nums: Array-like of day numbers (0=Monday, 6=Sunday)
+            hours: Array-like of hours (0-23), same length as day_nums
+            minutes: Scalar or array-like of minutes (0-59)
+        
+        Returns:
+            NumPy array of predicted loads in kW (same rounding and 5 kW floor as predict)
+        """
+        if not self.is_trained:
+            if self._train_lock.locked():
+                return np.maximum(5, self.fallback.predict_batch(day_nums, hours, minutes))
+            self.ensure_trained()
+        
+        X = self.feature_matrix(day_nums, hours, minutes)
+        
+        predictions = self.model.predict(X)
+        
+        return np.maximum(5, np.round(predictions, 2))  # Minimum 5 kW
+    
+    def predict_grid(self, day_nums, hours, minutes):
+        """Forecast hook used by the shared ForecastService"""
+        return self.predict_batch(day_nums, hours, minutes)
+    
+    def predict_week(self, resolution_minutes=60):
+        """Predict network load for an entire week (168 hours, or 672 quarter-hour slots)"""
         predictions = []
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        for day_idx, day in enumerate(days):
-            for hour in range(24):
-                load = self.predict(day_idx, hour, 0)
-                predictions.append({
-                    'day': day,
-                    'day_num': day_idx,
-                    'hour': hour,
-                    'load_kw': load
-                })
+        grid = get_slot_grid(resolution_minutes)
+        loads = grid.forecast(self)
+        
+        for slot in range(grid.n_slots):
+            day_idx = int(grid.day_nums[slot])
+            predictions.append({
+                'day': DAYS[day_idx],
+                'day_num': day_idx,
+                'hour': int(grid.hours[slot]),
+                'minute': int(grid.minutes[slot]),
+                'load_kw': float(loads[slot])
+            })
         
         return predictions
     
@@ -277,6 +421,7 @@ class NetworkLoadPredictor:
         if not self.is_trained:
             return {'trained': False}
         
+        model = self.model  # One fit's coefficients and intercept, even during an update
         return {
             'trained': True,
             'model_type': 'Linear Regression',
@@ -287,9 +432,11 @@ class NetworkLoadPredictor:
             'feature_names': self.feature_names,
             'coefficients': {
                 name: round(coef, 4) 
-                for name, coef in zip(self.feature_names, self.model.coef_)
+                for name, coef in zip(self.feature_names, model.coef_)
             },
-            'intercept': round(self.model.intercept_, 4)
+            'intercept': round(model.intercept_, 4),
+            'n_observations': self.n_observations,
+            'n_updates': self.n_updates
         }
 
 
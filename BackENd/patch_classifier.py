@@ -3,16 +3,37 @@ Patch Emergency Status and Priority Classifier
 Uses Random Forest to predict patch type: Emergency, Manual, or Automated
 """
 
+import time
+import threading
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
+from models import Patch
+from model_store import model_store, fingerprint, estimator_params
+from forest_engine import FlatForest, FLAT_FOREST_MAX_BATCH
+from model_config import build_estimator, get_memory_budget, model_type, fit_threads, FIT_N_JOBS, SERVING_N_JOBS
+from memory_budget import fit_within_budget, memory_report
+from synthetic_data import SYNTHETIC_DATA_VERSION, generate_patch_classifier_data
 import warnings
 warnings.filterwarnings('ignore')
 
 class PatchClassifier:
     def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=1000, random_state=0)
+        # Random forest (1000 trees) unless model_selection.py pinned another configuration
+        self.model, self.config_source = build_estimator('patch_classifier')
+        self.memory_budget = get_memory_budget('patch_classifier')  # bytes, None = unlimited
+        self.fit_n_jobs = FIT_N_JOBS  # Tree-building threads while fitting (predictions use one)
+        self.memory_report = None
         self.is_trained = False
+        self._train_lock = threading.Lock()
+        self.training_accuracy = 0
+        
+        # Flattened copy of the forest for low-overhead small-batch inference
+        self.flat_forest = None
+        
+        # Optional compiled mode: class probabilities precomputed over an input grid,
+        # published as one (table, grid) pair so predictions never see half of it
+        self.compiled = None
+        self.compile_report = None
         self.feature_names = [
             'risk_indicator', 'tasks_count', 'personnel_involved',
             'average_load_MW', 'average_active_users', 'duration_minutes',
@@ -36,77 +57,91 @@ class PatchClassifier:
             'Emergency': 2
         }
     
-    def generate_synthetic_training_data(self, n_samples=1000):
+    def generate_synthetic_training_data(self, n_samples=1000, seed=0):
         """Generate synthetic training data based on realistic patterns"""
-        np.random.seed(0)
-        
-        data = {
-            'risk_indicator': np.random.randint(1, 6, n_samples),
-            'tasks_count': np.random.randint(1, 21, n_samples),
-            'personnel_involved': np.random.randint(1, 11, n_samples),
-            'average_load_MW': np.random.normal(45, 20, n_samples).clip(5, 85),
-            'average_active_users': np.random.normal(150, 50, n_samples).clip(10, 300),
-            'duration_minutes': np.random.randint(15, 241, n_samples),
-            'hour': np.random.randint(0, 24, n_samples),
-            'assigned_crew_id': np.random.randint(1, 6, n_samples)
-        }
-        
-        # Generate patch_type based on risk_indicator and duration (logical bias)
-        conditions = [
-            (data['risk_indicator'] >= 4) & (data['duration_minutes'] <= 60),
-            (data['risk_indicator'] == 3) | ((data['risk_indicator'] >= 4) & (data['duration_minutes'] > 60)),
-            (data['risk_indicator'] <= 2)
-        ]
-        choices = [2, 1, 0]  # Emergency, Manual, Automated
-        data['patch_type'] = np.select(conditions, choices, default=1)
-        
-        # Add engineered features
-        data['load_per_task'] = data['average_load_MW'] / np.maximum(data['tasks_count'], 1)
-        data['users_per_personnel'] = data['average_active_users'] / np.maximum(data['personnel_involved'], 1)
-        data['tasks_per_personnel'] = data['tasks_count'] / np.maximum(data['personnel_involved'], 1)
-        data['load_per_personnel'] = data['average_load_MW'] / np.maximum(data['personnel_involved'], 1)
-        data['load_per_minute'] = data['average_load_MW'] / np.maximum(data['duration_minutes'], 1)
-        data['users_per_minute'] = data['average_active_users'] / np.maximum(data['duration_minutes'], 1)
-        data['is_night'] = np.where((data['hour'] < 6) | (data['hour'] >= 18), 1, 0)
-        data['hour_sin'] = np.sin(2 * np.pi * data['hour'] / 24)
-        data['hour_cos'] = np.cos(2 * np.pi * data['hour'] / 24)
-        data['risk_load_ratio'] = data['risk_indicator'] / np.maximum(data['average_load_MW'], 1)
-        data['risk_task_ratio'] = data['risk_indicator'] / np.maximum(data['tasks_count'], 1)
-        data['risk_personnel_ratio'] = data['risk_indicator'] / np.maximum(data['personnel_involved'], 1)
-        data['efficiency_index'] = (
-            (data['tasks_count'] / np.maximum(data['duration_minutes'], 1)) *
-            (data['average_load_MW'] / np.maximum(data['average_active_users'], 1))
-        )
-        data['crew_task_density'] = data['tasks_count'] / np.maximum(data['assigned_crew_id'], 1)
-        
-        # Clean up invalid values
-        for key in data:
-            data[key] = np.nan_to_num(data[key], nan=0.0, posinf=0.0, neginf=0.0)
-        
-        return data
+        return generate_patch_classifier_data(n_samples, seed)
+    
+    def training_arrays(self, n_samples=1000, seed=0):
+        """Feature matrix and labels of the synthetic training set"""
+        data = self.generate_synthetic_training_data(n_samples, seed)
+        X = np.column_stack([data[feature] for feature in self.feature_names])
+        return X, data['patch_type']
     
     def train(self, n_samples=1000):
         """Train the patch classifier with synthetic data"""
         print("Training Patch Emergency Classifier...")
         
-        # Generate synthetic training data
-        data = self.generate_synthetic_training_data(n_samples)
+        X, y = self.training_arrays(n_samples)
         
-        # Prepare features and labels
-        X = np.column_stack([data[feature] for feature in self.feature_names])
-        y = data['patch_type']
-        
-        # Train model
-        self.model.fit(X, y)
+        # Train model (sized to the memory budget, if any)
+        with fit_threads(self.model, self.fit_n_jobs):
+            fit_within_budget(self.model, X, y, self.memory_budget)
+        self.flat_forest = FlatForest.from_sklearn(self.model)
+        self.memory_report = memory_report(self.model, self.memory_budget)
         self.is_trained = True
         
+        # A retrained forest invalidates any compiled lookup table
+        self.compiled = None
+        self.compile_report = None
+        
         # Calculate accuracy on training data (for monitoring)
         accuracy = self.model.score(X, y) * 100
+        self.training_accuracy = accuracy
         print(f"Patch Classifier trained successfully!")
         print(f"Training accuracy: {accuracy:.2f}%")
         
         return accuracy
     
+    def ensure_trained(self):
+        """Train or load the model once, even when several threads ask at the same time"""
+        if self.is_trained:
+            return 'ready'
+        with self._train_lock:
+            if not self.is_trained:
+                return self.warm_start()
+        return 'ready'
+    
+    def warm_start(self, n_samples=1000, store=None, force=False):
+        """
+        Load the trained model from the artifact store
+        Trains (and saves a new artifact) only if none matches this configuration
+        """
+        store = store or model_store
+        key = fingerprint(
+            'patch_classifier', SYNTHETIC_DATA_VERSION, n_samples,
+            estimator_params(self.model), self.memory_budget
+        )
+        return store.load_or_train('patch_classifier', self, key, lambda: self.train(n_samples), force=force)
+    
+    def get_artifact(self):
+        """Return (payload, metadata) for the model artifact store"""
+        payload = {
+            'model': self.model,
+            'flat_forest': self.flat_forest.to_arrays()
+        }
+        metadata = {
+            'model_type': model_type(self.model),
+            'training_accuracy': self.training_accuracy,
+            'feature_names': self.feature_names,
+            'memory': self.memory_report
+        }
+        return payload, metadata
+    
+    def load_artifact(self, payload, metadata):
+        """Restore the trained model from an artifact"""
+        self.model = payload['model']
+        self.model.set_params(n_jobs=SERVING_N_JOBS)  # Older artifacts were saved with every core
+        if payload.get('flat_forest') is not None:
+            # Node arrays stay memory-mapped and shared between workers
+            self.flat_forest = FlatForest.from_arrays(payload['flat_forest'])
+        else:
+            self.flat_forest = FlatForest.from_sklearn(self.model)
+        self.memory_report = memory_report(self.model, self.memory_budget)
+        self.training_accuracy = metadata.get('training_accuracy', 0)
+        self.is_trained = True
+        self.compiled = None
+        self.compile_report = None
+    
     def extract_features(self, patch, network_load, crew_available, hour):
         """Extract features from patch, network load, and crew data"""
         # Base features
@@ -147,6 +182,63 @@ class PatchClassifier:
         
         return np.array(features).reshape(1, -1)
     
+    def extract_features_batch(self, patch, network_loads, crew_available, hours):
+        """
+        Extract the feature matrix for one patch across many time slots
+        
+        Same features as extract_features, one row per (network_load, hour) pair.
+        """
+        hours = np.asarray(hours, dtype=float)
+        return self._features_from_arrays(
+            patch.priority, patch.duration, patch.min_crew, crew_available, network_loads, hours
+        )
+    
+    def _features_from_arrays(self, priority, duration, min_crew, crew_available, network_load, hour):
+        """
+        Vectorized feature extraction from raw inputs (scalars or broadcastable arrays)
+        Mirrors extract_features exactly, one row per broadcast element
+        """
+        priority, duration, min_crew, crew_available, network_load, hour = np.broadcast_arrays(
+            *[np.asarray(v, dtype=float) for v in (priority, duration, min_crew, crew_available, network_load, hour)]
+        )
+        
+        # Base features
+        risk_indicator = priority
+        tasks_count = np.maximum((duration * 2).astype(int), 1)
+        personnel_involved = min_crew
+        average_load_MW = network_load
+        average_active_users = np.maximum((network_load * 3).astype(int), 10)
+        duration_minutes = (duration * 60).astype(int)
+        assigned_crew_id = np.minimum(crew_available, 5)
+        
+        # Engineered features
+        load_per_task = average_load_MW / np.maximum(tasks_count, 1)
+        users_per_personnel = average_active_users / np.maximum(personnel_involved, 1)
+        tasks_per_personnel = tasks_count / np.maximum(personnel_involved, 1)
+        load_per_personnel = average_load_MW / np.maximum(personnel_involved, 1)
+        load_per_minute = average_load_MW / np.maximum(duration_minutes, 1)
+        users_per_minute = average_active_users / np.maximum(duration_minutes, 1)
+        is_night = ((hour < 6) | (hour >= 18)).astype(int)
+        hour_sin = np.sin(2 * np.pi * hour / 24)
+        hour_cos = np.cos(2 * np.pi * hour / 24)
+        risk_load_ratio = risk_indicator / np.maximum(average_load_MW, 1)
+        risk_task_ratio = risk_indicator / np.maximum(tasks_count, 1)
+        risk_personnel_ratio = risk_indicator / np.maximum(personnel_involved, 1)
+        efficiency_index = (tasks_count / np.maximum(duration_minutes, 1)) * (average_load_MW / np.maximum(average_active_users, 1))
+        crew_task_density = tasks_count / np.maximum(assigned_crew_id, 1)
+        
+        features = [
+            risk_indicator, tasks_count, personnel_involved, average_load_MW,
+            average_active_users, duration_minutes, hour, assigned_crew_id,
+            load_per_task, users_per_personnel, tasks_per_personnel,
+            load_per_personnel, load_per_minute, users_per_minute,
+            is_night, hour_sin, hour_cos, risk_load_ratio,
+            risk_task_ratio, risk_personnel_ratio, efficiency_index,
+            crew_task_density
+        ]
+        
+        return np.column_stack([np.ravel(f) for f in features]).astype(float)
+    
     def predict(self, patch, network_load, crew_available, hour):
         """
         Predict patch type (Emergency, Manual, or Automated)
@@ -160,18 +252,30 @@ class PatchClassifier:
         Returns:
             dict with prediction, confidence, and reasoning
         """
+        if self._warming():
+            return self._rule_predictions(patch, [network_load], crew_available, [hour], include_reasoning=True)[0]
         if not self.is_trained:
-            self.train()
+            self.ensure_trained()
         
         # Convert kW to MW for model
         network_load_mw = network_load / 1000
         
-        # Extract features
-        X = self.extract_features(patch, network_load_mw, crew_available, hour)
+        # Compiled mode: O(1) table lookup when the inputs fall on the grid
+        probabilities = None
+        compiled = self.compiled
+        if compiled is not None:
+            table_probs, on_grid = self._lookup_probabilities(patch, [network_load], crew_available, [hour], compiled)
+            if on_grid[0]:
+                probabilities = table_probs[0]
+                prediction = self.model.classes_[np.argmax(probabilities)]
         
-        # Make prediction
-        prediction = self.model.predict(X)[0]
-        probabilities = self.model.predict_proba(X)[0]
+        if probabilities is None:
+            # Extract features
+            X = self.extract_features(patch, network_load_mw, crew_available, hour)
+            
+            # Make prediction (predict() is the argmax of predict_proba)
+            probabilities = self._forest_proba(X)[0]
+            prediction = self.model.classes_[np.argmax(probabilities)]
         
         # Get label
         predicted_label = self.label_map[prediction]
@@ -192,6 +296,257 @@ class PatchClassifier:
             'recommended_priority': int(prediction) + 3  # Convert to priority scale (3-5)
         }
     
+    def _warming(self):
+        """Whether another thread is training or loading the model right now (warm-up in progress)"""
+        return not self.is_trained and self._train_lock.locked()
+    
+    def _rule_predictions(self, patch, network_loads, crew_available, hours, include_reasoning=False):
+        """
+        Predictions from the rule the training labels follow (priority and duration),
+        served while the forest warms up instead of waiting for it; same format as predict_batch
+        """
+        if patch.priority >= 4 and patch.duration <= 1:
+            prediction = 2  # Emergency
+        elif patch.priority >= 3:
+            prediction = 1  # Manual
+        else:
+            prediction = 0  # Automated
+        predicted_label = self.label_map[prediction]
+        
+        results = []
+        for network_load, hour in zip(np.asarray(network_loads, dtype=float), np.asarray(hours)):
+            result = {
+                'patch_type': predicted_label,
+                'confidence': 100.0,
+                'probabilities': {label: 100.0 if label == predicted_label else 0.0
+                                  for label in ('Automated', 'Manual', 'Emergency')},
+                'recommended_priority': prediction + 3,
+                'source': 'rule'
+            }
+            if include_reasoning:
+                result['reasoning'] = self._generate_reasoning(
+                    patch, float(network_load), crew_available, int(hour), predicted_label
+                )
+            results.append(result)
+        return results
+    
+    def _forest_proba(self, X):
+        """Forest class probabilities: flat engine for small batches, sklearn for large ones"""
+        if self.flat_forest is not None and len(X) <= FLAT_FOREST_MAX_BATCH:
+            return self.flat_forest.predict_proba(X)
+        return self.model.predict_proba(X)
+    
+    def predict_batch(self, patch, network_loads, crew_available, hours, include_reasoning=False):
+        """
+        Predict patch type for one patch across many time slots with a single model call
+        
+        Args:
+            patch: Patch object with priority, duration, min_crew
+            network_loads: Array-like of network loads in kW, one per slot
+            crew_available: Number of available crew members
+            hours: Array-like of hours (0-23), one per slot
+            include_reasoning: Also generate the human-readable reasoning per slot
+        
+        Returns:
+            list of dicts in the same format as predict, one per slot
+        """
+        if self._warming():
+            return self._rule_predictions(patch, network_loads, crew_available, hours, include_reasoning)
+        if not self.is_trained:
+            self.ensure_trained()
+        
+        network_loads = np.asarray(network_loads, dtype=float)
+        hours = np.asarray(hours)
+        
+        compiled = self.compiled
+        if compiled is not None:
+            # Compiled mode: table lookups, forest only for off-grid slots
+            probabilities, on_grid = self._lookup_probabilities(patch, network_loads, crew_available, hours, compiled)
+            off_grid = ~on_grid
+        else:
+            probabilities = np.zeros((len(hours), len(self.model.classes_)))
+            off_grid = np.ones(len(hours), dtype=bool)
+        
+        if off_grid.any():
+            # Convert kW to MW for model
+            X = self.extract_features_batch(patch, network_loads[off_grid] / 1000, crew_available, hours[off_grid])
+            # predict() is the argmax of predict_proba, so one forest pass is enough
+            probabilities[off_grid] = self._forest_proba(X)
+        
+        predictions = self.model.classes_[np.argmax(probabilities, axis=1)]
+        
+        results = []
+        for i, prediction in enumerate(predictions):
+            predicted_label = self.label_map[prediction]
+            probs = probabilities[i]
+            result = {
+                'patch_type': predicted_label,
+                'confidence': round(float(probs[prediction] * 100), 2),
+                'probabilities': {
+                    'Automated': round(float(probs[0]) * 100, 2),
+                    'Manual': round(float(probs[1]) * 100, 2),
+                    'Emergency': round(float(probs[2]) * 100, 2)
+                },
+                'recommended_priority': int(prediction) + 3
+            }
+            if include_reasoning:
+                result['reasoning'] = self._generate_reasoning(
+                    patch, float(network_loads[i]), crew_available, int(hours[i]), predicted_label
+                )
+            results.append(result)
+        
+        return results
+    
+    def compile(self, load_step_kw=10, max_load_kw=100, duration_step_hours=0.25,
+                max_duration_hours=4, max_min_crew=5, validation_samples=500,
+                min_agreement=0.98, seed=0):
+        """
+        Precompute class probabilities over a discretized input grid
+        
+        Grid axes: priority 1-5, min_crew 1..max_min_crew, crew_available 0-5
+        (the model caps it at 5), hour 0-23, duration in duration_step_hours
+        steps and network load in load_step_kw buckets. After compiling,
+        predict/predict_batch answer on-grid inputs with an array lookup and
+        fall back to the forest for anything outside the grid.
+        
+        The table is only enabled if its predicted class agrees with the full
+        forest on at least min_agreement of validation_samples random inputs.
+        
+        Returns:
+            dict report with grid shape, table size, timing and agreement
+        """
+        if not self.is_trained:
+            self.ensure_trained()
+        
+        print("Compiling Patch Classifier lookup table...")
+        start_time = time.time()
+        
+        grid = {
+            'priority': np.arange(1, 6),
+            'min_crew': np.arange(1, max_min_crew + 1),
+            'crew_available': np.arange(0, 6),
+            'hour': np.arange(24),
+            'duration': np.arange(1, int(round(max_duration_hours / duration_step_hours)) + 1) * duration_step_hours,
+            'load_kw': np.arange(0, int(round(max_load_kw / load_step_kw)) + 1) * load_step_kw
+        }
+        axes = [grid[name] for name in ('priority', 'min_crew', 'crew_available', 'hour', 'duration', 'load_kw')]
+        mesh = np.meshgrid(*axes, indexing='ij')
+        
+        X = self._features_from_arrays(
+            mesh[0], mesh[4], mesh[1], mesh[2], mesh[5] / 1000, mesh[3]
+        )
+        table = self.model.predict_proba(X).astype(np.float32)
+        table = table.reshape(tuple(len(a) for a in axes) + (table.shape[1],))
+        
+        lookup_grid = {
+            'load_step_kw': float(load_step_kw),
+            'max_load_kw': float(grid['load_kw'][-1]),
+            'duration_step_hours': float(duration_step_hours),
+            'max_duration_hours': float(grid['duration'][-1]),
+            'max_min_crew': int(max_min_crew)
+        }
+        
+        # Validated before it is published: predictions keep using the forest meanwhile
+        agreement = self._validate_lookup_table(validation_samples, seed, (table, lookup_grid))
+        enabled = agreement >= min_agreement
+        self.compiled = (table, lookup_grid) if enabled else None
+        
+        elapsed = time.time() - start_time
+        self.compile_report = {
+            'enabled': enabled,
+            'grid_shape': list(table.shape[:-1]),
+            'table_entries': int(np.prod(table.shape[:-1])),
+            'table_bytes': int(table.nbytes),
+            'agreement_percent': round(agreement * 100, 2),
+            'min_agreement_percent': round(min_agreement * 100, 2),
+            'validation_samples': validation_samples,
+            'compile_seconds': round(elapsed, 2)
+        }
+        
+        if enabled:
+            print(f"Lookup table compiled in {elapsed:.2f}s ({agreement * 100:.2f}% agreement with forest)")
+        else:
+            print(f"Lookup table disabled: {agreement * 100:.2f}% agreement is below {min_agreement * 100:.2f}%")
+        
+        return self.compile_report
+    
+    @property
+    def lookup_table(self):
+        """Compiled class probabilities (None if not compiled)"""
+        return None if self.compiled is None else self.compiled[0]
+    
+    @property
+    def lookup_grid(self):
+        """Input grid of the compiled table (None if not compiled)"""
+        return None if self.compiled is None else self.compiled[1]
+    
+    def _lookup_probabilities(self, patch, network_loads, crew_available, hours, compiled=None):
+        """
+        Look up class probabilities in a compiled (table, grid), the published one by default
+        Returns (probabilities, on_grid mask); off-grid rows are left as zeros
+        """
+        table, grid = compiled or self.compiled
+        network_loads = np.asarray(network_loads, dtype=float)
+        hours = np.asarray(hours)
+        probabilities = np.zeros((len(hours), table.shape[-1]))
+        
+        duration_idx = int(round(patch.duration / grid['duration_step_hours'])) - 1
+        patch_on_grid = (
+            1 <= patch.priority <= 5 and float(patch.priority).is_integer()
+            and 1 <= patch.min_crew <= grid['max_min_crew']
+            and 0 <= crew_available
+            and 0 < patch.duration <= grid['max_duration_hours'] + grid['duration_step_hours'] / 2
+            and duration_idx >= 0
+        )
+        if not patch_on_grid:
+            return probabilities, np.zeros(len(hours), dtype=bool)
+        
+        hour_idx = np.asarray(hours, dtype=float)
+        on_grid = (
+            (network_loads >= 0)
+            & (network_loads <= grid['max_load_kw'] + grid['load_step_kw'] / 2)
+            & (hour_idx >= 0) & (hour_idx < 24) & (hour_idx == np.floor(hour_idx))
+        )
+        load_idx = np.rint(network_loads[on_grid] / grid['load_step_kw']).astype(int)
+        
+        probabilities[on_grid] = table[
+            int(patch.priority) - 1,
+            int(patch.min_crew) - 1,
+            int(min(crew_available, 5)),
+            hour_idx[on_grid].astype(int),
+            duration_idx,
+            load_idx
+        ]
+        
+        return probabilities, on_grid
+    
+    def _validate_lookup_table(self, n_samples, seed, compiled):
+        """Fraction of random on-grid inputs where a compiled (table, grid) and the forest agree"""
+        rng = np.random.RandomState(seed)
+        grid = compiled[1]
+        
+        priority = rng.randint(1, 6, n_samples)
+        min_crew = rng.randint(1, grid['max_min_crew'] + 1, n_samples)
+        crew_available = rng.randint(0, 8, n_samples)
+        hour = rng.randint(0, 24, n_samples)
+        # Durations on quarter hours, loads continuous: exercises the bucketing
+        duration = rng.randint(1, int(grid['max_duration_hours'] * 4) + 1, n_samples) / 4
+        load_kw = rng.uniform(0, grid['max_load_kw'], n_samples)
+        
+        X = self._features_from_arrays(priority, duration, min_crew, crew_available, load_kw / 1000, hour)
+        forest_predictions = self.model.predict(X)
+        
+        agree = 0
+        for i in range(n_samples):
+            patch = Patch(id=0, name="", duration=float(duration[i]), priority=int(priority[i]), min_crew=int(min_crew[i]))
+            probs, on_grid = self._lookup_probabilities(
+                patch, load_kw[i:i + 1], crew_available[i], hour[i:i + 1], compiled
+            )
+            if on_grid[0] and self.model.classes_[np.argmax(probs[0])] == forest_predictions[i]:
+                agree += 1
+        
+        return agree / n_samples if n_samples else 1.0
+    
     def _generate_reasoning(self, patch, network_load, crew_available, hour, prediction):
         """Generate human-readable reasoning for the prediction"""
         reasons = []
@@ -227,11 +582,16 @@ class PatchClassifier:
         
         return {
             'trained': True,
-            'model_type': 'Random Forest Classifier',
-            'n_estimators': self.model.n_estimators,
+            'model_type': model_type(self.model),
+            'n_estimators': len(self.model.estimators_),
+            'estimator': type(self.model).__name__,
+            'config_source': self.config_source,
+            'memory': self.memory_report,
             'n_features': len(self.feature_names),
             'classes': list(self.label_map.values()),
-            'feature_names': self.feature_names[:10]  # First 10 for brevity
+            'feature_names': self.feature_names[:10],  # First 10 for brevity
+            'compiled': self.compiled is not None,
+            'compile_report': self.compile_report
         }
 
 
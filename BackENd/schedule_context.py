@@ -0,0 +1,221 @@
+"""
+Shared Schedule Context
+Precomputes one request's view of the scheduling inputs: a dense load table,
+the load of every slot of the horizon, crew availability and crew bitsets,
+crew in skill order and the week's load forecasts.
+Contexts are immutable (read-only arrays; schedulers book crew on copies of
+the crew index) and cached by a hash of their inputs, so every strategy of a
+request reads the same arrays instead of rebuilding them
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from crew_index import CrewIndex
+from forecast_service import DAYS_PER_WEEK
+from network_load_predictor import network_load_predictor
+from seasonal_predictor import seasonal_predictor
+from slot_grid import get_slot_grid
+
+# Load assumed for slots without a reading (kW)
+MISSING_LOAD_KW = 50.0
+
+# Contexts kept when no capacity is given
+DEFAULT_CONTEXT_CAPACITY = 16
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+def build_load_table(network_loads, grid):
+    """
+    Dense (7, slots_per_day) load of every slot of the week
+
+    A slot takes the first reading of its day and hour (MISSING_LOAD_KW if none)
+    """
+    hourly = np.full((DAYS_PER_WEEK, 24), MISSING_LOAD_KW)
+    for load in reversed(network_loads):
+        hourly[load.day_number % DAYS_PER_WEEK, load.hour % 24] = load.load_kilowatts
+    return np.repeat(hourly, grid.slots_per_hour, axis=1)
+
+
+def context_key(network_loads, crew, resolution_minutes, horizon_days, cyclic=None):
+    """Hash of everything a context is built from"""
+    data = (
+        resolution_minutes,
+        horizon_days,
+        horizon_days == DAYS_PER_WEEK if cyclic is None else cyclic,
+        [(l.day_number, l.hour, l.load_kilowatts) for l in network_loads],
+        [(c.name, [tuple(r) for r in c.available_hours], c.skill_level) for c in crew]
+    )
+    return hashlib.sha1(repr(data).encode()).hexdigest()
+
+
+class ScheduleContext:
+    """Read-only precomputed loads and crew availability of one scheduling request"""
+
+    def __init__(self, network_loads, crew, resolution_minutes=None, horizon_days=DAYS_PER_WEEK, key=None,
+                 cyclic=None):
+        """
+        Args:
+            network_loads: List of NetworkLoad (the week's readings)
+            crew: List of CrewMember
+            resolution_minutes: Slot size (the default grid's if None)
+            horizon_days: Days scheduled from Monday on (longer horizons repeat the week's
+                          loads); exactly a week is a recurring cycle, any other
+                          horizon is real and patches may not run past its end
+            key: Input hash, when already computed
+            cyclic: Override whether the horizon recurs (e.g. a single day that
+                    wraps at midnight); None means exactly a week recurs
+        """
+        start_time = time.perf_counter()
+        self.grid = get_slot_grid(resolution_minutes)
+        self.horizon_days = horizon_days
+        self.cyclic = horizon_days == DAYS_PER_WEEK if cyclic is None else cyclic
+        self.network_loads = tuple(network_loads)
+        self.crew = tuple(crew)
+        self.key = key or context_key(self.network_loads, self.crew, self.grid.resolution_minutes, horizon_days,
+                                      self.cyclic)
+
+        # 1. Loads: the week's (day, slot) table and every slot of the horizon
+        self.load_table = _read_only(build_load_table(self.network_loads, self.grid))
+        self.slot_loads = _read_only(np.resize(self.load_table.ravel(), horizon_days * self.grid.slots_per_day))
+
+        # 2. First reading of every hour of the day, any day (NaN if none)
+        hour_loads = np.full(24, np.nan)
+        for load in reversed(self.network_loads):
+            hour_loads[load.hour % 24] = load.load_kilowatts
+        self.hour_loads = _read_only(hour_loads)
+
+        # 3. Crew: daily availability and the unbooked index of the horizon
+        self.crew_availability = _read_only(self.grid.crew_availability(self.crew))
+        self._crew_indexes = {}
+        self._lock = threading.Lock()
+        self._crew_indexes[(self.grid.resolution_minutes, horizon_days, self.cyclic)] = CrewIndex(
+            self.crew, self.grid, days=horizon_days, cyclic=self.cyclic
+        )
+
+        # 4. Crew indices by skill level, most skilled first (input order on ties)
+        self.crew_by_skill = tuple(sorted(range(len(self.crew)), key=lambda i: -self.crew[i].skill_level))
+
+        # 5. Weekly load forecasts, fetched on first use (see forecast())
+        self._forecasts = {}
+
+        self.build_ms = round((time.perf_counter() - start_time) * 1000, 3)
+
+    def hour_load(self, hour, default):
+        """First reading of an hour of the day (default if there is none)"""
+        load = self.hour_loads[hour % 24]
+        return default if np.isnan(load) else float(load)
+
+    def crew_index(self, days=None, resolution_minutes=None, cyclic=None):
+        """
+        Fresh (unbooked) CrewIndex to book on; the horizon's by default
+
+        cyclic defaults to the context's own for its horizon, else to whether
+        the days are exactly a week. Every (resolution, days, cyclic) index
+        is built once per context and copied.
+        """
+        grid = self.grid if resolution_minutes is None else get_slot_grid(resolution_minutes)
+        days = days or self.horizon_days
+        if cyclic is None:
+            cyclic = self.cyclic if days == self.horizon_days else days == DAYS_PER_WEEK
+        key = (grid.resolution_minutes, days, cyclic)
+        with self._lock:
+            template = self._crew_indexes.get(key)
+            if template is None:
+                template = self._crew_indexes[key] = CrewIndex(self.crew, grid, days=days, cyclic=cyclic)
+        return template.copy()
+
+    def forecast(self, predictor=None, fallback=None, resolution_minutes=None):
+        """
+        Flat (n_slots,) week of predicted loads, None if no model can forecast yet
+
+        network_load_predictor (the seasonal profile while it is not trained)
+        unless a site's predictors are given, at the context's resolution by
+        default. Fetched once per context and model version, so every strategy
+        of a request reads the same array.
+        """
+        predictor = predictor or network_load_predictor
+        fallback = fallback or seasonal_predictor
+        grid = self.grid if resolution_minutes is None else get_slot_grid(resolution_minutes)
+        key = (grid.resolution_minutes, id(predictor), id(fallback))
+        versions = (getattr(predictor, 'model_version', 0), getattr(fallback, 'model_version', 0))
+
+        with self._lock:
+            entry = self._forecasts.get(key)
+        if entry is not None and entry[0] is predictor and entry[1] is fallback and entry[2] == versions:
+            return entry[3]
+
+        loads = grid.forecast(predictor, fallback=fallback)
+        if loads is not None:
+            with self._lock:
+                self._forecasts[key] = (predictor, fallback, versions, loads)
+        return loads
+
+    def get_stats(self):
+        """Input hash, shape and build time"""
+        return {
+            'key': self.key,
+            'resolution_minutes': self.grid.resolution_minutes,
+            'horizon_days': self.horizon_days,
+            'cyclic': self.cyclic,
+            'slots': len(self.slot_loads),
+            'crew': len(self.crew),
+            'build_ms': self.build_ms
+        }
+
+
+class ScheduleContextCache:
+    """Bounded LRU of contexts by input hash, with hit/miss counters and build time"""
+
+    def __init__(self, capacity=DEFAULT_CONTEXT_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._contexts = OrderedDict()  # key -> ScheduleContext, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.build_ms = 0.0
+
+    def get(self, network_loads, crew, resolution_minutes=None, horizon_days=DAYS_PER_WEEK, cyclic=None):
+        """Context of the inputs, built on a miss"""
+        resolution_minutes = get_slot_grid(resolution_minutes).resolution_minutes
+        key = context_key(network_loads, crew, resolution_minutes, horizon_days, cyclic)
+
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                self._contexts.move_to_end(key)
+                self.hits += 1
+                return context
+            self.misses += 1
+
+        context = ScheduleContext(network_loads, crew, resolution_minutes, horizon_days, key=key, cyclic=cyclic)
+        with self._lock:
+            self.build_ms += context.build_ms
+            self._contexts[key] = context
+            self._contexts.move_to_end(key)
+            while len(self._contexts) > self.capacity:
+                self._contexts.popitem(last=False)
+        return context
+
+    def get_stats(self):
+        """Capacity, size, hit/miss counters and total build time"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._contexts),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'build_ms': round(self.build_ms, 3)
+            }
+
+
+# Global schedule context cache
+context_cache = ScheduleContextCache()
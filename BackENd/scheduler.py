@@ -1,68 +1,55 @@
 from typing import List, Dict
 from models import NetworkLoad, CrewMember, Patch, ScheduledPatch
-import math
+import numpy as np
+from slot_grid import get_slot_grid
+from forecast_service import DAYS, DAYS_PER_WEEK
+from scoring import get_kernel
+from exact_scheduler import BranchAndBoundScheduler, DEFAULT_TIME_BUDGET
+from local_search import LocalSearch, entry_slot
+from incremental_scheduler import IncrementalSchedule
+from schedule_context import ScheduleContext, build_load_table, context_cache, MISSING_LOAD_KW
+
+# Longest horizon scheduled at once (8 weeks); bounds the crew bitsets and slot arrays
+MAX_HORIZON_DAYS = 56
 
 class PatchScheduler:
     """Optimizes patch scheduling based on network load, crew availability, and patch requirements"""
     
-    def __init__(self):
-        pass
+    def __init__(self, resolution_minutes=None, horizon_days=DAYS_PER_WEEK):
+        # Slot size of the horizon being scheduled (60, 30 or 15 minutes)
+        self.grid = get_slot_grid(resolution_minutes)
+        # Days scheduled from Monday on: a recurring week by default; other
+        # horizons are real (patches may not run past their end) and repeat the week's loads
+        self.horizon_days = horizon_days
+    
+    def load_table(self, network_loads: List[NetworkLoad], grid=None) -> np.ndarray:
+        """Dense (7, slots_per_day) load of every slot of the week
+        
+        A slot takes the first reading of its day and hour (MISSING_LOAD_KW if
+        none), so scoring looks loads up by index instead of scanning the list.
+        """
+        return build_load_table(network_loads, grid or self.grid)
     
     def calculate_score(self, patch: Patch, start_hour: int, network_loads: List[NetworkLoad], 
-                       available_crew: List[CrewMember]) -> float:
+                       available_crew: List[CrewMember], day_number: int = 0) -> float:
         """Calculate a score for scheduling a patch at a specific time
         
+        network_loads may also be an hourly load_table() for O(1) lookups
+        when scoring many times.
+        
         Higher score = better scheduling window
         Score is based on THREE key factors:
         1. Network Load (kW at that hour) - Lower is better (40 points max)
         2. Crew Available - More is better (30 points max)
         3. Priority - Higher priority gets higher score (30 points max)
+        (points of the 'basic' profile in scoring.WEIGHT_PROFILES)
         """
-        score = 0
-        
-        # 1. NETWORK LOAD FACTOR (40 points max)
-        # Get network load at the start hour (in kilowatts)
-        load_kw = next((l.load_kilowatts for l in network_loads if l.hour == start_hour), 50)
-        
-        # Lower load = higher score
-        if load_kw < 20:
-            load_score = 40
-        elif load_kw < 30:
-            load_score = 30
-        elif load_kw < 40:
-            load_score = 20
-        elif load_kw < 50:
-            load_score = 10
-        else:
-            load_score = 5  # High load, not ideal
-        
-        score += load_score
-        
-        # 2. CREW AVAILABILITY FACTOR (30 points max)
-        crew_count = len(available_crew)
-        crew_needed = patch.min_crew
-        
-        if crew_count >= crew_needed * 2:
-            crew_score = 30  # Plenty of crew available
-        elif crew_count >= crew_needed + 2:
-            crew_score = 25  # Good crew availability
-        elif crew_count >= crew_needed + 1:
-            crew_score = 20  # Extra crew available
-        elif crew_count >= crew_needed:
-            crew_score = 15  # Just enough crew
-        else:
-            crew_score = 0   # Not enough crew
-        
-        score += crew_score
-        
-        # 3. PRIORITY FACTOR (30 points max)
-        # Higher priority = higher score
-        priority_score = (patch.priority / 5.0) * 30
-        
-        score += priority_score
-        
-        # Return score (0-100 scale)
-        return round(min(100, max(0, score)), 2)
+        # Get network load at the start day and hour (in kilowatts)
+        if not isinstance(network_loads, np.ndarray):
+            network_loads = self.load_table(network_loads, get_slot_grid(60))
+        load_kw = network_loads[day_number % DAYS_PER_WEEK, start_hour]
+        
+        return get_kernel('basic').score_one(patch, load_kw, crew_count=len(available_crew))
     
     def get_available_crew_at_hour(self, hour: int, crew: List[CrewMember], 
                                    already_scheduled: Dict[int, List[str]]) -> List[CrewMember]:
@@ -73,83 +60,102 @@ class PatchScheduler:
             if member.is_available(hour) and member.name not in scheduled_names
         ]
     
+    def score_slots(self, patch: Patch, slot_loads: np.ndarray, crew_counts: np.ndarray) -> np.ndarray:
+        """calculate_score for every slot at once (the 'basic' profile of the scoring kernel)"""
+        return get_kernel('basic').score_matrix([patch], slot_loads, crew_counts=crew_counts)[0]
+    
+    def context(self, network_loads: List[NetworkLoad], crew: List[CrewMember],
+                resolution_minutes: int = None, horizon_days: int = None,
+                context: ScheduleContext = None, cyclic: bool = None) -> ScheduleContext:
+        """Shared precomputed inputs of a schedule: the given context, else the cached one
+        
+        resolution_minutes and horizon_days default to the scheduler's own;
+        cyclic overrides whether the horizon recurs (only a week by default).
+        """
+        if context is not None:
+            return context
+        grid = self.grid if resolution_minutes is None else get_slot_grid(resolution_minutes)
+        horizon_days = self.horizon_days if horizon_days is None else horizon_days
+        if not isinstance(horizon_days, int) or not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+            raise ValueError(f"horizon_days must be an integer from 1 to {MAX_HORIZON_DAYS}, got {horizon_days!r}")
+        return context_cache.get(network_loads, crew, grid.resolution_minutes, horizon_days, cyclic)
+    
     def optimize(self, network_loads: List[NetworkLoad], crew: List[CrewMember], 
-                patches: List[Patch]) -> List[Dict]:
+                patches: List[Patch], resolution_minutes: int = None,
+                horizon_days: int = None, context: ScheduleContext = None) -> List[Dict]:
         """Find optimal schedule for all patches
         
         Uses a greedy algorithm:
         1. Sort patches by priority (highest first)
         2. For each patch, find the best time window
         3. Schedule it and mark crew as busy
+        
+        The horizon (horizon_days from Monday, the scheduler's default if None)
+        is divided into slots of resolution_minutes, so a 1.5-hour patch
+        occupies exactly 6 slots at 15 minutes. Every start slot of the
+        horizon is checked and scored at once; loads come from the dense
+        (day, slot) table, so each day is scored with its own readings.
+        
+        A given context (see schedule_context) replaces network_loads, crew,
+        resolution_minutes and horizon_days.
         """
+        context = self.context(network_loads, crew, resolution_minutes, horizon_days, context)
+        grid, crew, slot_loads = context.grid, context.crew, context.slot_loads
         scheduled_patches = []
-        already_scheduled = {}  # hour -> list of crew names
+        
+        # Crew availability and assignments over the horizon (windows wrap at its end)
+        index = context.crew_index()
         
         # Sort patches by priority (highest first)
         sorted_patches = sorted(patches, key=lambda p: p.priority, reverse=True)
         
-        for patch in sorted_patches:
-            best_score = -1
-            best_hour = None
-            best_crew = None
+        # Load and priority points of every (patch, slot) in one pass; only the
+        # crew points change as crew get booked
+        kernel = get_kernel('basic')
+        base_scores = kernel.base_scores(sorted_patches, slot_loads)
+        
+        for patch_num, patch in enumerate(sorted_patches):
+            duration_slots = grid.duration_slots(patch.duration)
+            crew_counts = index.free_counts
             
-            # Try each hour of the day
-            for start_hour in range(24):
-                # Check if enough crew available for entire patch duration
-                patch_duration_hours = int(math.ceil(patch.duration))
-                crew_available = True
-                min_crew_count = float('inf')
-                
-                for i in range(patch_duration_hours):
-                    hour = (start_hour + i) % 24
-                    available = self.get_available_crew_at_hour(hour, crew, already_scheduled)
-                    if len(available) < patch.min_crew:
-                        crew_available = False
-                        break
-                    min_crew_count = min(min_crew_count, len(available))
-                
-                if not crew_available:
-                    continue
-                
-                # Get available crew for scoring
-                available = self.get_available_crew_at_hour(start_hour, crew, already_scheduled)
-                
-                # Calculate score for this time slot
-                score = self.calculate_score(patch, start_hour, network_loads, available)
-                
-                if score > best_score:
-                    best_score = score
-                    best_hour = start_hour
-                    best_crew = available[:patch.min_crew]  # Assign minimum needed crew
+            # Enough crew in every slot of the patch (windows run across midnight, and
+            # from Sunday into Monday only in a recurring week)
+            fits = grid.window_min(crew_counts, duration_slots) >= patch.min_crew
+            fits &= grid.valid_starts(len(crew_counts), duration_slots, context.cyclic)
             
-            if best_hour is not None and best_crew:
+            best_slot = None
+            best_crew = []
+            if fits.any():
+                # Calculate score for every start slot; the earliest best slot wins among
+                # those where enough crew are each free for the whole window
+                slot_scores = kernel.finish(base_scores[patch_num] + kernel.crew_scores(patch.min_crew, crew_counts))
+                best_slot, best_crew = index.best_staffable(np.where(fits, slot_scores, -1), duration_slots,
+                                                            patch.min_crew)
+                if best_slot is not None:
+                    best_score = float(slot_scores[best_slot])
+            
+            if best_slot is not None and len(best_crew):
                 # Schedule the patch
-                end_hour = best_hour + patch.duration
-                
-                # Get network load at start hour
-                network_load = next(
-                    (l.load_kilowatts for l in network_loads if l.hour == best_hour), 
-                    50
-                )
+                horizon_day, day_slot = divmod(best_slot, grid.slots_per_day)
+                start_hour = grid.hour_of_day(day_slot)
+                end_hour = start_hour + patch.duration
                 
                 scheduled = ScheduledPatch(
                     patch=patch,
-                    start_hour=best_hour,
+                    start_hour=start_hour,
                     end_hour=end_hour,
-                    assigned_crew=[member.name for member in best_crew],
-                    network_load=network_load,
-                    score=best_score
+                    assigned_crew=[crew[i].name for i in best_crew],
+                    network_load=float(slot_loads[best_slot]),
+                    score=best_score,
+                    day=DAYS[horizon_day % DAYS_PER_WEEK],
+                    day_number=horizon_day % DAYS_PER_WEEK,
+                    horizon_day=horizon_day
                 )
                 
                 scheduled_patches.append(scheduled.to_dict())
                 
                 # Mark crew as busy for the duration
-                patch_duration_hours = int(math.ceil(patch.duration))
-                for i in range(patch_duration_hours):
-                    hour = (best_hour + i) % 24
-                    if hour not in already_scheduled:
-                        already_scheduled[hour] = []
-                    already_scheduled[hour].extend([member.name for member in best_crew])
+                index.book(best_crew, best_slot, duration_slots)
             else:
                 # Could not schedule this patch
                 unscheduled = {
@@ -160,4 +166,89 @@ class PatchScheduler:
                 scheduled_patches.append(unscheduled)
         
         return scheduled_patches
-
+    
+    def optimize_exact(self, network_loads: List[NetworkLoad], crew: List[CrewMember],
+                       patches: List[Patch], time_budget: float = None,
+                       resolution_minutes: int = None, horizon_days: int = None,
+                       context: ScheduleContext = None) -> Dict:
+        """Find the best schedule by branch-and-bound within a wall-clock budget
+        
+        Unlike the greedy optimize(), patches are reordered and choices
+        revisited, so patches the greedy leaves unscheduled can still fit.
+        Stops after time_budget seconds (exact_scheduler.DEFAULT_TIME_BUDGET
+        if None) with the best schedule found so far. Crew are only assigned
+        for a patch's whole window, and 'optimal' is only reported when the
+        staffed schedule reaches the search's upper bound.
+        
+        Returns:
+            {'schedule': entries like optimize(), 'optimizer': objective,
+             upper_bound, gap, optimal, search_complete, nodes, seconds,
+             greedy_objective}
+        """
+        context = self.context(network_loads, crew, resolution_minutes, horizon_days, context)
+        solver = BranchAndBoundScheduler(
+            context.grid, context.crew, context.slot_loads, context.horizon_days, index=context.crew_index()
+        )
+        result = solver.solve(patches, DEFAULT_TIME_BUDGET if time_budget is None else time_budget)
+        schedule = solver.build_schedule(result.pop('starts'), result.pop('members'))
+        
+        return {'schedule': schedule, 'optimizer': result}
+    
+    def improve(self, schedule: List[Dict], network_loads: List[NetworkLoad], crew: List[CrewMember],
+                iterations: int = None, time_limit: float = None, seed: int = 0,
+                resolution_minutes: int = None, horizon_days: int = None,
+                context: ScheduleContext = None) -> Dict:
+        """Improve a finished schedule by local search (simulated annealing)
+        
+        schedule may come from any scheduler: entries with a 'patch' and, when
+        scheduled, a 'start_hour' and 'horizon_day', 'day_number' or 'day'.
+        The objective is optimize_exact()'s (a placement bonus plus the 'basic'
+        score of every scheduled patch) and the best schedule seen is kept.
+        The search runs on crew counts and is staffed afterwards; if the staffed
+        input scores higher, it is returned instead ('kept_input').
+        The same seed and iteration limit give the same schedule.
+        
+        Returns:
+            {'schedule': entries like optimize() in the input's order,
+             'local_search': run statistics (see local_search.LocalSearch.run)
+             and kept_input}
+        """
+        context = self.context(network_loads, crew, resolution_minutes, horizon_days, context)
+        patches = [Patch(**entry['patch']) for entry in schedule]
+        starts = [entry_slot(entry, context.grid, context.horizon_days) for entry in schedule]
+        
+        solver = BranchAndBoundScheduler(
+            context.grid, context.crew, context.slot_loads, context.horizon_days, index=context.crew_index()
+        )
+        solver.prepare(patches)
+        search = LocalSearch(solver.values, solver.durations, solver.min_crews, solver.capacity)
+        result = search.run(starts, iterations=iterations, time_limit=time_limit, seed=seed)
+        
+        # The search checks crew counts; patches nobody is free to staff end up unscheduled
+        improved, members = solver.staff(result.pop('starts'))
+        
+        # Never return less than the input, staffed the same way (starts it may not use dropped)
+        kept, kept_members = solver.staff([
+            slot if slot is not None and np.isfinite(solver.values[patch_num][slot]) else None
+            for patch_num, slot in enumerate(starts)
+        ])
+        result['kept_input'] = solver.objective(kept) > solver.objective(improved)
+        if result['kept_input']:
+            improved, members = kept, kept_members
+        result['objective'] = round(solver.objective(improved), 2)
+        return {'schedule': solver.build_schedule(improved, members), 'local_search': result}
+    
+    def incremental(self, network_loads: List[NetworkLoad], crew: List[CrewMember],
+                    patches: List[Patch] = (), resolution_minutes: int = None,
+                    horizon_days: int = None, context: ScheduleContext = None) -> IncrementalSchedule:
+        """Live schedule of the patches that later patches are inserted into and removed from
+        
+        Starts from the same schedule as optimize(); see incremental_scheduler.
+        """
+        context = self.context(network_loads, crew, resolution_minutes, horizon_days, context)
+        live = IncrementalSchedule(
+            context.grid, context.crew, context.slot_loads, context.horizon_days, index=context.crew_index()
+        )
+        for patch in sorted(patches, key=lambda p: p.priority, reverse=True):
+            live.insert(patch, repair=False)
+        return live
@@ -0,0 +1,163 @@
+"""
+Unified Scoring Kernel
+One vectorized implementation of the piecewise patch scores used by every
+scheduler. A weight profile per strategy sets the points of each factor, and
+a whole patches x slots score matrix is evaluated in one NumPy pass
+"""
+
+import numpy as np
+
+# Points of each factor per strategy. Piecewise factors give points[i] below
+# thresholds[i] (first match wins) and default above the last threshold. Crew
+# rules (multiplier, offset, points) give points when
+# crew >= min_crew * multiplier + offset (first match wins).
+WEIGHT_PROFILES = {
+    # PatchScheduler: network load, crew availability and priority
+    'basic': {
+        'load': {'thresholds': (20, 30, 40, 50), 'points': (40, 30, 20, 10), 'default': 5},
+        'crew': {'rules': ((2, 0, 30), (1, 2, 25), (1, 1, 20), (1, 0, 15)), 'default': 0},
+        'priority': 30
+    },
+    # MLOptimizer: adds time of day and a weekend bonus
+    'ml_optimizer': {
+        'load': {'thresholds': (20, 30, 40, 50), 'points': (40, 30, 20, 10), 'default': 0},
+        'time_of_day': {'thresholds': (6, 9, 17, 22), 'points': (20, 15, 5, 12), 'default': 18},
+        'crew': {'rules': ((1, 2, 15), (1, 1, 12), (1, 0, 8)), 'default': 0},
+        'priority': 15,
+        'weekend': 10
+    },
+    # MockScheduler: no crew factor, shorter patches score higher
+    'mock': {
+        'load': {'thresholds': (20, 30, 40), 'points': (40, 30, 20), 'default': 10},
+        'time_of_day': {'thresholds': (6, 9, 17, 22), 'points': (20, 15, 5, 12), 'default': 18},
+        'priority': 15,
+        'weekend': 10,
+        'duration': {'points': 15, 'per_hour': 3}
+    }
+}
+
+PROFILE_FACTORS = ('load', 'time_of_day', 'crew', 'priority', 'weekend', 'duration')
+
+
+class ScoringKernel:
+    """Scores every (patch, slot) pair of a weight profile at once (0-100, higher is better)"""
+
+    def __init__(self, profile='basic'):
+        """
+        Args:
+            profile: Name of a WEIGHT_PROFILES entry or a profile dict
+        """
+        if isinstance(profile, str):
+            if profile not in WEIGHT_PROFILES:
+                raise ValueError(f"Unknown scoring profile {profile!r}, expected one of {list(WEIGHT_PROFILES)}")
+            profile = WEIGHT_PROFILES[profile]
+        unknown = set(profile) - set(PROFILE_FACTORS)
+        if unknown:
+            raise ValueError(f"Unknown scoring factors {sorted(unknown)}, expected {PROFILE_FACTORS}")
+
+        self.profile = profile
+        self.load_table = self._piecewise_table(profile.get('load'))
+        self.time_table = self._piecewise_table(profile.get('time_of_day'))
+
+    @staticmethod
+    def _piecewise_table(factor):
+        """(thresholds, points + default) of a piecewise factor, or None if unused"""
+        if factor is None:
+            return None
+        return np.asarray(factor['thresholds']), np.asarray(factor['points'] + (factor['default'],))
+
+    @staticmethod
+    def _piecewise(table, values):
+        """Points of every value: one binary search instead of a chain of comparisons"""
+        thresholds, points = table
+        return points[np.searchsorted(thresholds, values, side='right')]
+
+    def base_scores(self, patches, loads, hours=None, day_nums=None):
+        """
+        Unrounded (n_patches, n_slots) scores of every factor except crew
+
+        Args:
+            patches: List of Patch
+            loads: (n_slots,) network load of every slot in kW
+            hours: (n_slots,) hour of day of every slot (time-of-day profiles)
+            day_nums: (n_slots,) weekday of every slot, 0=Monday (weekend profiles)
+        """
+        loads = np.asarray(loads, dtype=float)
+        total = np.zeros((len(patches), len(loads)))
+
+        if self.load_table is not None:
+            total += self._piecewise(self.load_table, loads)
+
+        if self.time_table is not None:
+            if hours is None:
+                raise ValueError("This scoring profile needs the hour of every slot")
+            total += self._piecewise(self.time_table, hours)
+
+        if self.profile.get('priority'):
+            priorities = np.array([p.priority for p in patches], dtype=float)
+            total += ((priorities / 5) * self.profile['priority'])[:, None]
+
+        if self.profile.get('weekend'):
+            if day_nums is None:
+                raise ValueError("This scoring profile needs the weekday of every slot")
+            total += np.where(np.asarray(day_nums) >= 5, self.profile['weekend'], 0)
+
+        duration = self.profile.get('duration')
+        if duration:
+            durations = np.array([p.duration for p in patches], dtype=float)
+            total += np.maximum(0, duration['points'] - durations * duration['per_hour'])[:, None]
+
+        return total
+
+    def crew_scores(self, min_crew, crew_counts):
+        """Crew factor for crew_counts free crew against min_crew (broadcasts; 0 if unused)"""
+        crew = self.profile.get('crew')
+        if crew is None:
+            return 0
+        min_crew = np.asarray(min_crew)
+        crew_counts = np.asarray(crew_counts)
+        return np.select(
+            [crew_counts >= min_crew * multiplier + offset for multiplier, offset, _ in crew['rules']],
+            [points for _, _, points in crew['rules']],
+            default=crew['default']
+        )
+
+    @staticmethod
+    def finish(total):
+        """Clip to 0-100 and round to 2 decimals, like the scalar scores"""
+        return np.round(np.clip(total, 0, 100), 2)
+
+    def score_matrix(self, patches, loads, hours=None, day_nums=None, crew_counts=None):
+        """
+        Final (n_patches, n_slots) score matrix
+
+        crew_counts: Free crew per slot, (n_slots,) or a scalar; needed by
+                     profiles with a crew factor
+        """
+        total = self.base_scores(patches, loads, hours, day_nums)
+        if self.profile.get('crew') is not None:
+            if crew_counts is None:
+                raise ValueError("This scoring profile needs the free crew of every slot")
+            min_crew = np.array([p.min_crew for p in patches])[:, None]
+            total = total + self.crew_scores(min_crew, crew_counts)
+        return self.finish(total)
+
+    def score_one(self, patch, load, hour=None, day_num=None, crew_count=None):
+        """Score of one patch in one slot"""
+        return float(self.score_matrix(
+            [patch], [load],
+            None if hour is None else [hour],
+            None if day_num is None else [day_num],
+            crew_count
+        )[0, 0])
+
+
+_kernels = {}
+
+
+def get_kernel(profile='basic'):
+    """Shared ScoringKernel of a named profile"""
+    kernel = _kernels.get(profile)
+    if kernel is None:
+        kernel = _kernels.setdefault(profile, ScoringKernel(profile))
+    return kernel
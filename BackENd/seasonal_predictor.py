@@ -0,0 +1,271 @@
+"""
+Seasonal Profile Load Predictor
+Forecasts network load as a robust per-(day, hour, minute bucket) profile of
+the observed readings, with exponential smoothing for new readings. Training
+is one vectorized group-by and prediction an array lookup, so it serves as
+the instant fallback while the heavier models warm up
+"""
+
+import threading
+import numpy as np
+from forecast_service import DAYS, DAYS_PER_WEEK
+from slot_grid import get_slot_grid
+from synthetic_data import generate_network_load_columns
+
+
+class SeasonalProfilePredictor:
+    """Median (or mean) load of every 15-minute slot of the week"""
+
+    def __init__(self, bucket_minutes=15, statistic='median', alpha=0.2):
+        if 60 % bucket_minutes != 0:
+            raise ValueError(f"bucket_minutes must divide an hour, got {bucket_minutes}")
+        if statistic not in ('median', 'mean'):
+            raise ValueError(f"statistic must be 'median' or 'mean', got {statistic}")
+
+        self.bucket_minutes = bucket_minutes
+        self.buckets_per_hour = 60 // bucket_minutes
+        self.statistic = statistic
+        self.alpha = alpha  # Weight of a new batch of readings in update()
+
+        self.profile = None  # (7, 24, buckets_per_hour) load in kW
+        self.counts = None   # Readings behind every profile cell
+        self.is_trained = False
+        self.model_version = 0  # Bumped on every (re)train so cached forecasts are rebuilt
+        self.n_observations = 0
+        self.n_updates = 0
+        self.mae = 0
+        self._train_lock = threading.Lock()
+
+    def _slot_index(self, day_nums, hours, minutes=0):
+        """Flat profile cell of every (day, hour, minute)"""
+        day_nums = np.asarray(day_nums, dtype=int) % DAYS_PER_WEEK
+        hours = np.asarray(hours, dtype=int)
+        buckets = np.asarray(minutes, dtype=int) // self.bucket_minutes
+        return (day_nums * 24 + hours) * self.buckets_per_hour + buckets
+
+    def _columns_to_arrays(self, columns):
+        """(slots, loads) from numeric columns: day_num, hour, optional minute, load_kw (or load)"""
+        def column(*names):
+            for name in names:
+                try:
+                    return np.asarray(columns[name], dtype=float)
+                except (KeyError, ValueError, IndexError):
+                    continue
+            return None
+
+        day_nums, hours, minutes = column('day_num'), column('hour'), column('minute')
+        loads = column('load_kw', 'load')
+        if day_nums is None or hours is None or loads is None:
+            raise ValueError("columns need day_num, hour and load_kw (or load)")
+
+        slots = self._slot_index(day_nums, hours, 0 if minutes is None else minutes)
+        return slots, loads
+
+    def _loads_to_columns(self, network_loads):
+        """Numeric columns from a list of NetworkLoad objects"""
+        return {
+            'day_num': np.array([l.day_number for l in network_loads]),
+            'hour': np.array([l.hour for l in network_loads]),
+            'load_kw': np.array([l.load_kilowatts for l in network_loads], dtype=float)
+        }
+
+    def _group_statistic(self, slots, loads, statistic):
+        """Per-cell median or mean and reading count, in one sort/bincount pass"""
+        n_cells = DAYS_PER_WEEK * 24 * self.buckets_per_hour
+        counts = np.bincount(slots, minlength=n_cells)
+        values = np.full(n_cells, np.nan)
+        observed = counts > 0
+
+        if statistic == 'mean':
+            totals = np.bincount(slots, weights=loads, minlength=n_cells)
+            values[observed] = totals[observed] / counts[observed]
+        else:
+            # Sort by (cell, load); the median sits in the middle of each cell's run
+            sorted_loads = loads[np.lexsort((loads, slots))]
+            starts = np.cumsum(counts) - counts
+            low = sorted_loads[(starts + (counts - 1) // 2)[observed]]
+            high = sorted_loads[(starts + counts // 2)[observed]]
+            values[observed] = (low + high) / 2
+
+        return values, counts
+
+    def _fill_missing(self, values, counts):
+        """
+        Fill cells without readings: from the other buckets of the same hour,
+        then from the same hour on days of the same kind (weekday/weekend),
+        then from the overall mean
+        """
+        profile = values.reshape(DAYS_PER_WEEK, 24, self.buckets_per_hour).copy()
+        observed = counts.reshape(profile.shape) > 0
+        if not observed.any():
+            return None
+
+        # 1. Other buckets of the same hour
+        hour_n = observed.sum(axis=2)
+        hour_mean = np.where(observed, profile, 0).sum(axis=2) / np.maximum(hour_n, 1)
+        hour_observed = hour_n > 0
+
+        # 2. Same hour on days of the same kind
+        for kind in (slice(0, 5), slice(5, 7)):
+            n = hour_observed[kind].sum(axis=0)
+            kind_mean = np.where(hour_observed[kind], hour_mean[kind], 0).sum(axis=0) / np.maximum(n, 1)
+            fill = ~hour_observed[kind] & (n > 0)
+            hour_mean[kind] = np.where(fill, kind_mean, hour_mean[kind])
+            hour_observed[kind] |= fill
+
+        # 3. Overall mean
+        hour_mean[~hour_observed] = profile[observed].mean()
+
+        return np.where(observed, profile, hour_mean[:, :, None])
+
+    def train(self, columns=None, n_samples=1000):
+        """
+        Build the profile in one vectorized group-by
+
+        Args:
+            columns: Numeric columns (day_num, hour, optional minute, load_kw);
+                     synthetic readings are generated when None
+            n_samples: Size of the synthetic set used when no data is given
+
+        Returns:
+            True if the profile was built
+        """
+        if columns is None:
+            columns = generate_network_load_columns(n_samples)
+
+        slots, loads = self._columns_to_arrays(columns)
+        if len(loads) == 0:
+            return False
+
+        values, counts = self._group_statistic(slots, loads, self.statistic)
+        profile = self._fill_missing(values, counts)
+
+        self.profile = profile
+        self.counts = counts.reshape(profile.shape)
+        self.n_observations = int(len(loads))
+        self.n_updates = 0
+        self.mae = float(np.abs(profile.ravel()[slots] - loads).mean())
+        self.is_trained = True
+        self.model_version += 1
+        return True
+
+    def train_from_loads(self, network_loads):
+        """Build the profile from a list of NetworkLoad objects"""
+        if len(network_loads) == 0:
+            return False
+        return self.train(self._loads_to_columns(network_loads))
+
+    def update(self, columns=None, network_loads=None):
+        """
+        Blend new readings into the profile with exponential smoothing
+
+        Every cell with new readings moves alpha of the way towards their
+        mean; cells seen for the first time take the new value directly.
+
+        Returns:
+            Number of profile cells updated
+        """
+        if columns is None:
+            if not network_loads:
+                return 0
+            columns = self._loads_to_columns(network_loads)
+        if not self.is_trained:
+            self.train(columns)
+            return int((self.counts > 0).sum()) if self.is_trained else 0
+
+        slots, loads = self._columns_to_arrays(columns)
+        if len(loads) == 0:
+            return 0
+
+        with self._train_lock:
+            values, counts = self._group_statistic(slots, loads, 'mean')
+            observed = counts > 0
+
+            profile = self.profile.ravel().copy()
+            seen = self.counts.ravel() > 0
+            blend = observed & seen
+            profile[blend] = (1 - self.alpha) * profile[blend] + self.alpha * values[blend]
+            profile[observed & ~seen] = values[observed & ~seen]
+
+            self.profile = profile.reshape(self.profile.shape)
+            self.counts = self.counts + counts.reshape(self.profile.shape)
+            self.n_observations += int(len(loads))
+            self.n_updates += 1
+            self.model_version += 1
+
+        return int(observed.sum())
+
+    def ensure_trained(self):
+        """Build the profile once, even when several threads ask at the same time"""
+        if self.is_trained:
+            return 'ready'
+        with self._train_lock:
+            if not self.is_trained:
+                self.train()
+                return 'trained'
+        return 'ready'
+
+    def predict(self, day, hour, minute=0):
+        """
+        Predict network load for a specific day and time
+
+        Args:
+            day: Day of week (0=Monday, 6=Sunday) or day name
+            hour: Hour of day (0-23)
+            minute: Minute (0-59)
+
+        Returns:
+            Predicted load in kW
+        """
+        if not self.is_trained:
+            self.ensure_trained()
+
+        day_num = DAYS.index(day) if isinstance(day, str) and day in DAYS else day
+        return round(float(self.profile.ravel()[self._slot_index(day_num, hour, minute)]), 2)
+
+    def predict_batch(self, day_nums, hours, minutes=0):
+        """Predict network load for many (day, hour, minute) slots with one array lookup"""
+        if not self.is_trained:
+            self.ensure_trained()
+
+        return np.round(self.profile.ravel()[self._slot_index(day_nums, hours, minutes)], 2)
+
+    def predict_grid(self, day_nums, hours, minutes):
+        """Forecast hook used by the shared ForecastService"""
+        return self.predict_batch(day_nums, hours, minutes)
+
+    def predict_week(self, resolution_minutes=60):
+        """Predict network load for an entire week (168 hours, or 672 quarter-hour slots)"""
+        grid = get_slot_grid(resolution_minutes)
+        loads = grid.forecast(self)
+        return [
+            {
+                'day': DAYS[grid.day_nums[slot]],
+                'day_num': int(grid.day_nums[slot]),
+                'hour': int(grid.hours[slot]),
+                'minute': int(grid.minutes[slot]),
+                'load_kw': float(loads[slot])
+            }
+            for slot in range(grid.n_slots)
+        ]
+
+    def get_model_stats(self):
+        """Return model statistics"""
+        if not self.is_trained:
+            return {'trained': False}
+
+        return {
+            'trained': True,
+            'model_type': 'Seasonal Profile',
+            'statistic': self.statistic,
+            'bucket_minutes': self.bucket_minutes,
+            'alpha': self.alpha,
+            'coverage_percent': round(float((self.counts > 0).mean()) * 100, 2),
+            'mae_kw': round(self.mae, 2),
+            'n_observations': self.n_observations,
+            'n_updates': self.n_updates
+        }
+
+
+# Global seasonal predictor instance
+seasonal_predictor = SeasonalProfilePredictor()
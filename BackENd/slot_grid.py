@@ -0,0 +1,202 @@
+"""
+Slot Grid
+Divides the week into fixed-size time slots (60, 30 or 15 minutes) backed by
+compact NumPy arrays, so forecasts, crew availability and scheduling all run
+at the same sub-hour resolution
+"""
+
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from forecast_service import forecast_service, DAYS, DAYS_PER_WEEK, MINUTES_PER_DAY
+
+SUPPORTED_RESOLUTIONS = (60, 30, 15)
+
+# Resolution used when a consumer does not ask for one
+DEFAULT_RESOLUTION_MINUTES = int(os.getenv('SLOT_RESOLUTION_MINUTES', '60'))
+
+
+class SlotGrid:
+    """A week of equal slots; slot i starts at minute i * resolution_minutes of the week"""
+
+    def __init__(self, resolution_minutes=DEFAULT_RESOLUTION_MINUTES):
+        if resolution_minutes not in SUPPORTED_RESOLUTIONS:
+            raise ValueError(f"resolution_minutes must be one of {SUPPORTED_RESOLUTIONS}, got {resolution_minutes}")
+
+        self.resolution_minutes = resolution_minutes
+        self.slots_per_hour = 60 // resolution_minutes
+        self.slots_per_day = MINUTES_PER_DAY // resolution_minutes
+        self.n_slots = DAYS_PER_WEEK * self.slots_per_day
+
+        # Calendar of every slot of the week (small ints, read-only)
+        slot_minutes = np.arange(self.n_slots) * resolution_minutes
+        self.day_nums = self._read_only(slot_minutes // MINUTES_PER_DAY, np.int8)
+        self.hours = self._read_only((slot_minutes % MINUTES_PER_DAY) // 60, np.int8)
+        self.minutes = self._read_only(slot_minutes % 60, np.int8)
+
+    @staticmethod
+    def _read_only(values, dtype):
+        array = np.asarray(values, dtype=dtype)
+        array.setflags(write=False)
+        return array
+
+    def slot(self, day_num, hour, minute=0):
+        """Slot index of a day and time of day (minute rounded down to the slot)"""
+        return ((day_num % DAYS_PER_WEEK) * self.slots_per_day
+                + hour * self.slots_per_hour + minute // self.resolution_minutes)
+
+    def duration_slots(self, duration_hours):
+        """Slots a patch of duration_hours occupies (partial slots count whole)"""
+        # Round first so 1.5 h at 15 minutes is exactly 6 slots, not 7 from float noise
+        exact = round(duration_hours * 60 / self.resolution_minutes, 6)
+        return max(1, int(np.ceil(exact)))
+
+    def hour_of_day(self, slot):
+        """Start of a slot as a (fractional) hour of its day, e.g. 14.25"""
+        hour = int(self.hours[slot])
+        minute = int(self.minutes[slot])
+        return hour if minute == 0 else hour + minute / 60
+
+    def label(self, slot):
+        """Human-readable start of a slot, e.g. 'Monday 14:15'"""
+        return f"{DAYS[self.day_nums[slot]]} {self.hours[slot]:02d}:{self.minutes[slot]:02d}"
+
+    def forecast(self, predictor, fallback=None):
+        """Flat (n_slots,) load forecast of a predictor at this resolution (None if unavailable)"""
+        week = forecast_service.get_week(predictor, self.resolution_minutes, fallback)
+        return None if week is None else week.ravel()
+
+    def day_slots(self, hour_ranges):
+        """
+        Boolean (slots_per_day,) mask of the slots inside any (start_hour, end_hour) range
+        A slot is inside if it starts in [start_hour, end_hour)
+        """
+        slot_hours = np.arange(self.slots_per_day) / self.slots_per_hour
+        mask = np.zeros(self.slots_per_day, dtype=bool)
+        for start, end in hour_ranges:
+            mask |= (slot_hours >= start) & (slot_hours < end)
+        return mask
+
+    def crew_availability(self, crew):
+        """Boolean (n_crew, slots_per_day) matrix of when every crew member is available"""
+        if not crew:
+            return np.zeros((0, self.slots_per_day), dtype=bool)
+        return np.array([self.day_slots(member.available_hours) for member in crew])
+
+    def window_min(self, values, duration_slots, wrap=None):
+        """
+        Minimum of values over the window of duration_slots starting at every slot
+
+        Args:
+            values: 1-D array (a day or the whole week of slots)
+            duration_slots: Window length in slots
+            wrap: Length of the cycle windows wrap around; defaults to len(values)
+
+        Returns:
+            Array with one minimum per start slot
+        """
+        values = np.asarray(values)
+        n = len(values)
+        wrap = wrap or n
+        if duration_slots <= 1:
+            return values.copy()
+
+        # Windows starting near the end of each cycle continue at its start
+        cycles = values.reshape(-1, wrap)
+        repeats = 1 + -(-(duration_slots - 1) // wrap)
+        extended = np.tile(cycles, (1, repeats))
+        windows = sliding_window_view(extended, duration_slots, axis=1)[:, :wrap]
+        return windows.min(axis=2).ravel()
+
+    def valid_starts(self, n_slots, duration_slots, cyclic=True):
+        """
+        Boolean (n_slots,) mask of the start slots a window of duration_slots may use:
+        every slot of a recurring cycle, or those ending by the last slot of a real horizon
+        """
+        valid = np.ones(n_slots, dtype=bool)
+        if not cyclic:
+            valid[max(0, n_slots - duration_slots + 1):] = False
+        return valid
+
+    def window_slots(self, start_slot, duration_slots, wrap=None):
+        """Slot indices covered by a window (wrapping within cycles of length wrap)"""
+        wrap = wrap or self.n_slots
+        base = (start_slot // wrap) * wrap
+        return base + (start_slot - base + np.arange(duration_slots)) % wrap
+
+
+class HorizonGrid:
+    """
+    Consecutive weeks of slots starting at a real date and time
+
+    Slot i starts at start + i * resolution_minutes. Each slot maps onto the
+    abstract week of a SlotGrid, which is what the weekly models forecast.
+    The start decides the convention: a naive start takes naive datetimes
+    (local wall-clock time), an aware start takes aware ones (any zone).
+    """
+
+    def __init__(self, start=None, weeks=4, resolution_minutes=None):
+        if weeks < 1:
+            raise ValueError(f"weeks must be at least 1, got {weeks}")
+
+        self.week_grid = get_slot_grid(resolution_minutes)
+        self.resolution_minutes = self.week_grid.resolution_minutes
+        self.step = timedelta(minutes=self.resolution_minutes)
+        self.start = self.floor(start or datetime.now())
+        self.end = self.start + weeks * timedelta(days=DAYS_PER_WEEK)
+        self.weeks = weeks
+        self.n_slots = weeks * self.week_grid.n_slots
+
+        # Slot of the abstract week the horizon starts in
+        self.week_offset = self.week_grid.slot(self.start.weekday(), self.start.hour, self.start.minute)
+
+    def floor(self, when):
+        """Round a datetime down to the start of its slot"""
+        return when.replace(
+            minute=when.minute - when.minute % self.resolution_minutes, second=0, microsecond=0
+        )
+
+    def check_time(self, when):
+        """ValueError for a naive datetime on an aware horizon or the other way round"""
+        if (when.tzinfo is None) != (self.start.tzinfo is None):
+            kind = 'naive' if self.start.tzinfo is None else 'timezone-aware'
+            raise ValueError(f"{when.isoformat()} does not match the horizon's {kind} start {self.start.isoformat()}")
+        return when
+
+    def slot_at(self, when):
+        """Horizon slot containing a datetime (may fall outside 0..n_slots)"""
+        return (self.check_time(when) - self.start) // self.step
+
+    def time_at(self, slot):
+        """Start datetime of a horizon slot"""
+        return self.start + int(slot) * self.step
+
+    def times(self, first, last):
+        """datetime64[m] start times of slots first..last-1"""
+        return np.datetime64(self.start, 'm') + np.arange(first, last) * self.resolution_minutes
+
+    def week_slots(self, first, last):
+        """Abstract-week slot of every horizon slot first..last-1"""
+        return (self.week_offset + np.arange(first, last)) % self.week_grid.n_slots
+
+    def slot_range(self, t0=None, t1=None):
+        """
+        (first, last) horizon slots overlapping [t0, t1), clipped to the horizon
+        Defaults to the whole horizon
+        """
+        first = 0 if t0 is None else max(0, self.slot_at(t0))
+        last = self.n_slots if t1 is None else min(self.n_slots, -((self.start - self.check_time(t1)) // self.step))
+        return first, max(first, last)
+
+
+_grids = {}
+
+
+def get_slot_grid(resolution_minutes=None):
+    """Shared SlotGrid of a resolution (the grids are immutable, so one per resolution)"""
+    resolution_minutes = resolution_minutes or DEFAULT_RESOLUTION_MINUTES
+    grid = _grids.get(resolution_minutes)
+    if grid is None:
+        grid = _grids.setdefault(resolution_minutes, SlotGrid(resolution_minutes))
+    return grid
@@ -33,15 +33,22 @@ class SupabaseDataFetcher:
             else:
                 print("Supabase credentials not found in environment variables")
     
-    def fetch_network_loads(self) -> List[NetworkLoad]:
+    def fetch_network_loads(self, site: str = None) -> List[NetworkLoad]:
         """
         Fetch network load predictions from Supabase.
         Expected table: network_loads
-        Columns: id, day_of_week, day_number, hour, load_kilowatts, timestamp
+        Columns: id, day_of_week, day_number, hour, load_kilowatts, timestamp,
+        site_id (only needed when a site is requested)
+        
+        Only the unfiltered table falls back to sample data; a requested site
+        without rows (or without a Supabase connection) gets an empty list.
         """
         if self.client:
             try:
-                response = self.client.table('network_loads').select('*').execute()
+                query = self.client.table('network_loads').select('*')
+                if site is not None:
+                    query = query.eq('site_id', site)
+                response = query.execute()
                 network_loads = []
                 for row in response.data:
                     network_loads.append(NetworkLoad(
@@ -53,16 +60,19 @@ class SupabaseDataFetcher:
                 print(f"Fetched {len(network_loads)} network load records from Supabase")
                 
                 # Use fallback if Supabase table is empty
-                if not network_loads:
+                if not network_loads and site is None:
                     print("Supabase table is empty. Using fallback data.")
                     return self._generate_fallback_network_loads()
                 
                 return network_loads
             except Exception as e:
                 print(f"Error fetching network loads from Supabase: {e}")
-                return self._generate_fallback_network_loads()
-        else:
+                return self._generate_fallback_network_loads() if site is None else []
+        elif site is None:
             return self._generate_fallback_network_loads()
+        else:
+            print(f"Supabase not connected. No load history for site {site}.")
+            return []
     
     def fetch_crew_members(self) -> List[CrewMember]:
         """
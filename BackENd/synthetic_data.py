@@ -0,0 +1,177 @@
+"""
+Vectorized Synthetic Data Generators
+Seeded, loop-free generators for the network load and patch classifier
+training sets, able to produce millions of rows and stream them to disk
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from forecast_service import DAYS
+
+# Bump when the generated distributions change so cached models are rebuilt
+SYNTHETIC_DATA_VERSION = 2
+
+MINUTES = np.array([0, 15, 30, 45])
+
+# Base time-of-day factor for every hour:
+# night 0.7, morning ramp-up 0.9, business hours 1.3, evening 1.1, late evening 0.8
+HOURLY_TIME_FACTOR = np.array(
+    [0.7] * 6 + [0.9] * 3 + [1.3] * 8 + [1.1] * 5 + [0.8] * 2
+)
+
+
+def generate_network_load_columns(n_samples=1000, seed=42, include_week_grid=True):
+    """
+    Generate synthetic network load readings as numeric columns
+
+    The first 7 x 24 x 4 rows cover every 15-minute slot of the week once
+    (when include_week_grid is True); the rest are random slots, up to
+    n_samples rows in total.
+
+    Returns:
+        dict with day_num, hour, minute (int8) and load_kw (float64) arrays
+    """
+    rng = np.random.RandomState(seed)
+
+    if include_week_grid:
+        grid_day, grid_hour, grid_minute = np.meshgrid(
+            np.arange(7), np.arange(24), MINUTES, indexing='ij'
+        )
+        day_num = grid_day.ravel()
+        hour = grid_hour.ravel()
+        minute = grid_minute.ravel()
+    else:
+        day_num = hour = minute = np.empty(0, dtype=int)
+
+    extra = max(0, n_samples - len(day_num))
+    if extra:
+        day_num = np.concatenate([day_num, rng.randint(0, 7, extra)])
+        hour = np.concatenate([hour, rng.randint(0, 24, extra)])
+        minute = np.concatenate([minute, MINUTES[rng.randint(0, len(MINUTES), extra)]])
+
+    n_rows = len(day_num)
+    base_load = 30  # kW
+
+    # Time-of-day and day-of-week patterns with +/-0.1 noise
+    time_factor = HOURLY_TIME_FACTOR[hour] + rng.uniform(-0.1, 0.1, n_rows)
+    day_factor = np.where(day_num >= 5, 0.6 + rng.uniform(-0.1, 0.1, n_rows), 1.0)
+
+    load_kw = np.maximum(5, base_load * time_factor * day_factor)  # Minimum 5 kW
+
+    return {
+        'day_num': day_num.astype(np.int8),
+        'hour': hour.astype(np.int8),
+        'minute': minute.astype(np.int8),
+        'load_kw': np.round(load_kw, 2)
+    }
+
+
+def network_load_columns_to_frame(columns):
+    """String-formatted DataFrame (day, "HH:MM" time, load_kw) from numeric columns"""
+    hours = pd.Series(columns['hour']).astype(str).str.zfill(2)
+    minutes = pd.Series(columns['minute']).astype(str).str.zfill(2)
+    return pd.DataFrame({
+        'day': np.array(DAYS)[columns['day_num']],
+        'time': hours + ':' + minutes,
+        'load_kw': columns['load_kw']
+    })
+
+
+def generate_patch_classifier_data(n_samples=1000, seed=0):
+    """
+    Generate synthetic patch classification data based on realistic patterns
+
+    Draws from a dedicated RandomState in the same order as the original
+    generator, so seed=0 reproduces the historical training set exactly.
+
+    Returns:
+        dict of feature arrays plus the 'patch_type' label
+    """
+    rng = np.random.RandomState(seed)
+
+    data = {
+        'risk_indicator': rng.randint(1, 6, n_samples),
+        'tasks_count': rng.randint(1, 21, n_samples),
+        'personnel_involved': rng.randint(1, 11, n_samples),
+        'average_load_MW': rng.normal(45, 20, n_samples).clip(5, 85),
+        'average_active_users': rng.normal(150, 50, n_samples).clip(10, 300),
+        'duration_minutes': rng.randint(15, 241, n_samples),
+        'hour': rng.randint(0, 24, n_samples),
+        'assigned_crew_id': rng.randint(1, 6, n_samples)
+    }
+
+    # Generate patch_type based on risk_indicator and duration (logical bias)
+    conditions = [
+        (data['risk_indicator'] >= 4) & (data['duration_minutes'] <= 60),
+        (data['risk_indicator'] == 3) | ((data['risk_indicator'] >= 4) & (data['duration_minutes'] > 60)),
+        (data['risk_indicator'] <= 2)
+    ]
+    choices = [2, 1, 0]  # Emergency, Manual, Automated
+    data['patch_type'] = np.select(conditions, choices, default=1)
+
+    # Add engineered features
+    data['load_per_task'] = data['average_load_MW'] / np.maximum(data['tasks_count'], 1)
+    data['users_per_personnel'] = data['average_active_users'] / np.maximum(data['personnel_involved'], 1)
+    data['tasks_per_personnel'] = data['tasks_count'] / np.maximum(data['personnel_involved'], 1)
+    data['load_per_personnel'] = data['average_load_MW'] / np.maximum(data['personnel_involved'], 1)
+    data['load_per_minute'] = data['average_load_MW'] / np.maximum(data['duration_minutes'], 1)
+    data['users_per_minute'] = data['average_active_users'] / np.maximum(data['duration_minutes'], 1)
+    data['is_night'] = np.where((data['hour'] < 6) | (data['hour'] >= 18), 1, 0)
+    data['hour_sin'] = np.sin(2 * np.pi * data['hour'] / 24)
+    data['hour_cos'] = np.cos(2 * np.pi * data['hour'] / 24)
+    data['risk_load_ratio'] = data['risk_indicator'] / np.maximum(data['average_load_MW'], 1)
+    data['risk_task_ratio'] = data['risk_indicator'] / np.maximum(data['tasks_count'], 1)
+    data['risk_personnel_ratio'] = data['risk_indicator'] / np.maximum(data['personnel_involved'], 1)
+    data['efficiency_index'] = (
+        (data['tasks_count'] / np.maximum(data['duration_minutes'], 1)) *
+        (data['average_load_MW'] / np.maximum(data['average_active_users'], 1))
+    )
+    data['crew_task_density'] = data['tasks_count'] / np.maximum(data['assigned_crew_id'], 1)
+
+    # Clean up invalid values
+    for key in data:
+        data[key] = np.nan_to_num(data[key], nan=0.0, posinf=0.0, neginf=0.0)
+
+    return data
+
+
+def write_chunks(generator, directory, n_samples, chunk_size=1_000_000, seed=0, **kwargs):
+    """
+    Stream a large synthetic set to disk as .npz chunks
+
+    Every chunk gets its own seed (seed + chunk index), so the whole set is
+    reproducible and never has to fit in memory at once.
+
+    Args:
+        generator: generate_network_load_columns or generate_patch_classifier_data
+        directory: Output directory (created if missing)
+        n_samples: Total number of rows
+        chunk_size: Rows per chunk
+
+    Returns:
+        List of written chunk paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    for index, start in enumerate(range(0, n_samples, chunk_size)):
+        size = min(chunk_size, n_samples - start)
+        if generator is generate_network_load_columns:
+            # Only the first chunk carries the full weekly grid
+            kwargs['include_week_grid'] = index == 0
+        columns = generator(size, seed=seed + index, **kwargs)
+
+        path = os.path.join(directory, f"chunk_{index:05d}.npz")
+        np.savez(path, **columns)
+        paths.append(path)
+
+    return paths
+
+
+def read_chunks(directory):
+    """Iterate over the chunks written by write_chunks, in order, as column dicts"""
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('chunk_') and name.endswith('.npz'):
+            with np.load(os.path.join(directory, name)) as chunk:
+                yield {key: chunk[key] for key in chunk.files}
@@ -0,0 +1,81 @@
+"""
+Shared test fixtures
+The backend modules import each other by module name, so the backend
+directory goes on sys.path; artifacts are disabled so tests never write
+model files next to the code
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MODEL_ARTIFACTS', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import NetworkLoad, CrewMember, Patch  # noqa: E402
+from forecast_service import DAYS, DAYS_PER_WEEK  # noqa: E402
+
+
+@pytest.fixture
+def network_loads():
+    """A week of hourly readings: a daily curve, lighter on weekends"""
+    loads = []
+    for day_number, day in enumerate(DAYS):
+        for hour in range(24):
+            load = 35 + 25 * np.sin((hour - 6) / 24 * 2 * np.pi) - (8 if day_number >= 5 else 0)
+            loads.append(NetworkLoad(hour=hour, load_kilowatts=round(float(load), 2),
+                                     day_of_week=day, day_number=day_number))
+    return loads
+
+
+@pytest.fixture
+def crew():
+    """Five crew members with overlapping shifts (one split shift)"""
+    return [
+        CrewMember(name='Ana', available_hours=[(0, 8)], skill_level=5),
+        CrewMember(name='Ben', available_hours=[(6, 14)], skill_level=4),
+        CrewMember(name='Cleo', available_hours=[(12, 20)], skill_level=3),
+        CrewMember(name='Dev', available_hours=[(18, 24)], skill_level=4),
+        CrewMember(name='Eli', available_hours=[(0, 4), (20, 24)], skill_level=2),
+    ]
+
+
+@pytest.fixture
+def patches():
+    """Patches of mixed priority, duration (including sub-hour) and crew need"""
+    return [
+        Patch(id=1, name='Kernel update', duration=2, priority=5, min_crew=2),
+        Patch(id=2, name='Firewall rules', duration=1, priority=4, min_crew=1),
+        Patch(id=3, name='Database migration', duration=3, priority=4, min_crew=2),
+        Patch(id=4, name='Router firmware', duration=1.5, priority=3, min_crew=1),
+        Patch(id=5, name='Certificate rotation', duration=0.5, priority=2, min_crew=1),
+        Patch(id=6, name='Log cleanup', duration=1, priority=1, min_crew=1),
+    ]
+
+
+@pytest.fixture
+def assert_staffed():
+    """
+    assert_staffed(schedule, crew, grid, horizon_days, cyclic): every assigned member is
+    free for the patch's whole window and never booked twice
+    """
+    from crew_index import CrewIndex
+    from local_search import entry_slot
+
+    def check(schedule, crew, grid, horizon_days=DAYS_PER_WEEK, cyclic=None):
+        cyclic = horizon_days == DAYS_PER_WEEK if cyclic is None else cyclic
+        index = CrewIndex(crew, grid, days=horizon_days, cyclic=cyclic)
+        names = [member.name for member in crew]
+        for entry in schedule:
+            if entry.get('status') == 'unscheduled':
+                continue
+            slot = entry_slot(entry, grid, horizon_days)
+            duration_slots = grid.duration_slots(entry['patch']['duration'])
+            members = [names.index(name) for name in entry['assigned_crew']]
+            assert len(members) >= entry['patch']['min_crew']
+            assert all(index.is_free(m, slot, duration_slots) for m in members), entry
+            index.book(members, slot, duration_slots)
+
+    return check
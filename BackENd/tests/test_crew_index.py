@@ -0,0 +1,101 @@
+"""
+CrewIndex tests
+Booking and releasing must keep the bitsets and the per-slot counts in step
+with a plain scan of every member's hours
+"""
+
+import numpy as np
+import pytest
+
+from crew_index import CrewIndex
+from slot_grid import get_slot_grid
+
+
+def _free_counts_by_scan(index):
+    """Free crew of every slot from the free matrix (one member at a time)"""
+    return index.free_matrix().sum(axis=0)
+
+
+def test_initial_counts_match_available_hours(crew):
+    grid = get_slot_grid(30)
+    index = CrewIndex(crew, grid)
+    for slot in range(0, index.n_slots, 7):
+        hour = grid.hour_of_day(slot % grid.slots_per_day)
+        expected = [i for i, member in enumerate(crew) if member.is_available(int(hour))]
+        assert index.free_crew(slot) == expected
+        assert index.free_counts[slot] == len(expected)
+    np.testing.assert_array_equal(_free_counts_by_scan(index), index.free_counts)
+
+
+def test_book_release_round_trip(crew):
+    index = CrewIndex(crew, get_slot_grid(15))
+    before = (list(index.busy), index.free_counts.copy(), index.booked_counts.copy())
+
+    # 02:00-05:00 on Monday: Ana for all of it, Eli only for the first two hours
+    start, duration = index.grid.slot(0, 2), index.grid.duration_slots(3)
+    assert index.free_crew(start, duration) == [0]
+    index.book([0, 4], start, duration)
+
+    assert not index.is_free(0, start)
+    assert index.min_idle(start, duration) == len(crew) - 2
+    assert index.free_counts[start] == before[1][start] - 2
+    np.testing.assert_array_equal(_free_counts_by_scan(index), index.free_counts)
+
+    # Booking twice changes nothing
+    counts = index.free_counts.copy()
+    index.book([0], start, duration)
+    np.testing.assert_array_equal(index.free_counts, counts)
+
+    index.release([0, 4], start, duration)
+    assert index.busy == before[0]
+    np.testing.assert_array_equal(index.free_counts, before[1])
+    np.testing.assert_array_equal(index.booked_counts, before[2])
+
+
+def test_cyclic_windows_wrap_and_real_horizons_do_not(crew):
+    grid = get_slot_grid(60)
+    last_slot = 7 * grid.slots_per_day - 1
+    cyclic = CrewIndex(crew, grid)
+    cyclic.book([4], last_slot, 3)  # Sunday 23:00 into Monday 02:00
+    assert list(cyclic.window_slots(last_slot, 3)) == [last_slot, 0, 1]
+    assert not cyclic.is_free(4, 0)
+
+    real = CrewIndex(crew, grid, days=7, cyclic=False)
+    with pytest.raises(ValueError):
+        real.book([4], last_slot, 3)
+
+
+def test_copy_is_independent(crew):
+    index = CrewIndex(crew)
+    other = index.copy()
+    other.book([1], 8, 2)
+    assert index.is_free(1, 8, 2)
+    assert not other.is_free(1, 8, 2)
+    assert index.free_counts[8] == other.free_counts[8] + 1
+
+
+def test_window_free_matches_free_crew(crew):
+    index = CrewIndex(crew, get_slot_grid(30))
+    index.book([1], 20, 6)
+    index.book([3, 4], index.n_slots - 2, 5)  # Wraps into Monday
+    for duration in (1, 3, 8, index.n_slots + 5):
+        window_free = index.window_free(duration)
+        for slot in range(0, index.n_slots, 5):
+            assert list(np.flatnonzero(window_free[:, slot])) == index.free_crew(slot, duration)
+        np.testing.assert_array_equal(index.staffable_counts(duration), window_free.sum(axis=0))
+
+
+def test_best_staffable_needs_crew_free_for_the_whole_window():
+    # B is free 00:00-03:00 only, A all day: at 02:00 a 3-hour patch can only have A
+    from models import CrewMember
+    crew = [CrewMember(name='B', available_hours=[(0, 3)], skill_level=3),
+            CrewMember(name='A', available_hours=[(0, 24)], skill_level=3)]
+    index = CrewIndex(crew, get_slot_grid(60))
+    scores = np.zeros(index.n_slots)
+    scores[2] = 50
+
+    assert index.best_staffable(scores, 3, 1) == (2, [1])
+    # Two crew for 02:00-05:00 do not exist, so the next best (earliest) slot wins
+    assert index.best_staffable(scores, 3, 2) == (0, [0, 1])
+    index.book([1], 0, index.n_slots)  # A booked all week
+    assert index.best_staffable(scores, 3, 2) == (None, [])
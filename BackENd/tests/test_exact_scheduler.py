@@ -0,0 +1,99 @@
+"""
+BranchAndBoundScheduler tests
+The exact optimizer must never lose to its greedy, report an objective its
+schedule actually scores and staff every patch for its whole window
+"""
+
+import random
+
+import pytest
+
+from exact_scheduler import BranchAndBoundScheduler
+from forecast_service import DAYS, DAYS_PER_WEEK
+from local_search import entry_slot
+from models import NetworkLoad, CrewMember, Patch
+from scheduler import PatchScheduler
+
+
+def _random_case(seed, all_day=False):
+    """Crew with random shifts (all day if all_day) and a random set of patches"""
+    rng = random.Random(seed)
+    crew = []
+    for i in range(rng.randint(1, 4)):
+        start = 0 if all_day else rng.randint(0, 16)
+        crew.append(CrewMember(name=f'crew{i}', available_hours=[(start, 24 if all_day else start + rng.randint(2, 8))],
+                               skill_level=3))
+    patches = [
+        Patch(id=i, name=f'patch{i}', duration=rng.choice([0.5, 1, 2, 3, 4]),
+              priority=rng.randint(1, 5), min_crew=rng.randint(1, 3))
+        for i in range(rng.randint(3, 10))
+    ]
+    return crew, patches
+
+
+def _objective(schedule, context):
+    """The exact optimizer's objective of any schedule"""
+    solver = BranchAndBoundScheduler(context.grid, context.crew, context.slot_loads, context.horizon_days,
+                                     index=context.crew_index())
+    solver.prepare([Patch(**entry['patch']) for entry in schedule])
+    return solver.objective([entry_slot(entry, context.grid, context.horizon_days) for entry in schedule])
+
+
+def test_exact_beats_greedy_when_the_greedy_blocks_the_shift():
+    # One member works 00:00-06:00 and 02:00 has the lowest load: the greedy puts
+    # the 2-hour patch there and has no room left for the 3-hour one
+    loads = [NetworkLoad(hour=h, load_kilowatts=10.0 if h == 2 else 45.0, day_of_week=DAYS[d], day_number=d)
+             for d in range(DAYS_PER_WEEK) for h in range(24)]
+    crew = [CrewMember(name='Ana', available_hours=[(0, 6)], skill_level=3)]
+    patches = [Patch(id=1, name='short', duration=2, priority=5, min_crew=1),
+               Patch(id=2, name='long', duration=3, priority=4, min_crew=1)]
+    scheduler = PatchScheduler()
+
+    greedy = scheduler.optimize(loads, crew, patches, horizon_days=1)
+    assert [entry.get('status') for entry in greedy] == [None, 'unscheduled']
+
+    result = scheduler.optimize_exact(loads, crew, patches, horizon_days=1)
+    assert [entry.get('status') for entry in result['schedule']] == [None, None]
+    assert result['optimizer']['optimal']
+    assert result['optimizer']['objective'] > result['optimizer']['greedy_objective']
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('horizon_days', [1, 7])
+def test_exact_never_worse_than_greedy(network_loads, assert_staffed, seed, horizon_days):
+    crew, patches = _random_case(seed)
+    scheduler = PatchScheduler()
+    context = scheduler.context(network_loads, crew, 60, horizon_days)
+
+    result = scheduler.optimize_exact(network_loads, crew, patches, time_budget=2, context=context)
+    optimizer = result['optimizer']
+    assert optimizer['objective'] >= optimizer['greedy_objective']
+    assert optimizer['objective'] <= optimizer['upper_bound'] + 1e-6
+    assert optimizer['objective'] == pytest.approx(_objective(result['schedule'], context), abs=0.01)
+    assert_staffed(result['schedule'], crew, context.grid, horizon_days)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_exact_never_worse_than_optimize(network_loads, seed):
+    crew, patches = _random_case(seed, all_day=seed % 2 == 0)
+    scheduler = PatchScheduler()
+    context = scheduler.context(network_loads, crew, 60, 1)
+
+    greedy = scheduler.optimize(network_loads, crew, patches, context=context)
+    result = scheduler.optimize_exact(network_loads, crew, patches, time_budget=2, context=context)
+    assert result['optimizer']['objective'] >= round(_objective(greedy, context), 2)
+
+
+def test_time_budget_stops_the_search(network_loads):
+    crew = [CrewMember(name=f'crew{i}', available_hours=[(0, 24)], skill_level=3) for i in range(3)]
+    patches = [Patch(id=i, name=f'p{i}', duration=1 + i % 4, priority=1 + i % 5, min_crew=1 + i % 2)
+               for i in range(40)]
+    result = PatchScheduler().optimize_exact(network_loads, crew, patches, resolution_minutes=15,
+                                             time_budget=0.05)
+    optimizer = result['optimizer']
+    assert optimizer['seconds'] < 2
+    assert optimizer['objective'] >= optimizer['greedy_objective']
+    assert 0 <= optimizer['gap'] <= 1
+    if not optimizer['search_complete']:
+        assert not optimizer['optimal']
+        assert optimizer['upper_bound'] >= optimizer['objective']
@@ -0,0 +1,91 @@
+"""
+ForecastHorizon / HorizonGrid tests
+Horizon slots are real calendar times that map onto the weekly forecast;
+streaming, range queries and window search all read the same loads
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from forecast_horizon import ForecastHorizon
+from slot_grid import HorizonGrid
+
+START = datetime(2026, 1, 7, 10, 20)  # A Wednesday
+
+
+class WeekPredictor:
+    """A trained weekly model whose load identifies the slot: day * 100 + hour + minute / 60"""
+
+    def __init__(self, is_trained=True):
+        self.is_trained = is_trained
+        self.model_version = 1
+
+    def predict_grid(self, day_nums, hours, minutes):
+        if not self.is_trained:
+            return None
+        return np.asarray(day_nums) * 100 + np.asarray(hours) + np.asarray(minutes) / 60
+
+
+def test_grid_starts_on_a_slot_of_the_week():
+    grid = HorizonGrid(START, weeks=2, resolution_minutes=30)
+    assert grid.start == datetime(2026, 1, 7, 10, 0)
+    assert grid.end == grid.start + timedelta(days=14)
+    assert grid.n_slots == 2 * 7 * 48
+    assert grid.week_offset == 2 * 48 + 20
+    assert grid.slot_at(datetime(2026, 1, 7, 11, 29)) == 2
+    assert grid.time_at(3) == datetime(2026, 1, 7, 11, 30)
+    assert grid.slot_range(datetime(2026, 1, 7, 10, 15), datetime(2026, 1, 7, 11, 10)) == (0, 3)
+    assert grid.slot_range(datetime(2025, 1, 1), datetime(2027, 1, 1)) == (0, grid.n_slots)
+
+
+def test_grid_rejects_mixed_time_zones_and_empty_horizons():
+    aware = HorizonGrid(START.replace(tzinfo=timezone.utc), weeks=1, resolution_minutes=60)
+    with pytest.raises(ValueError):
+        aware.slot_at(START)
+    with pytest.raises(ValueError):
+        HorizonGrid(START, weeks=0)
+
+
+def test_loads_follow_the_weekly_forecast_across_weeks():
+    horizon = ForecastHorizon(WeekPredictor(), START, weeks=3, resolution_minutes=30)
+    np.testing.assert_allclose(horizon.loads(0, 3), [210, 210.5, 211])
+
+    week = horizon.grid.week_grid.n_slots
+    np.testing.assert_array_equal(horizon.loads(week, 2 * week), horizon.loads(0, week))
+    # Sunday 23:30 is followed by Monday 00:00
+    sunday_end = horizon.grid.slot_at(datetime(2026, 1, 11, 23, 30))
+    np.testing.assert_allclose(horizon.loads(sunday_end, sunday_end + 2), [623.5, 0])
+
+
+def test_chunks_and_range_queries_read_the_same_loads():
+    horizon = ForecastHorizon(WeekPredictor(), START, weeks=1, resolution_minutes=60)
+    chunks = list(horizon.chunks())
+    assert len(chunks) == 7
+    assert [start for start, _ in chunks][:2] == [datetime(2026, 1, 7, 10), datetime(2026, 1, 8, 10)]
+    np.testing.assert_array_equal(np.concatenate([loads for _, loads in chunks]),
+                                  horizon.loads(0, horizon.grid.n_slots))
+
+    times, loads = horizon.loads_between(datetime(2026, 1, 8, 0, 30), datetime(2026, 1, 8, 3))
+    assert list(times) == [np.datetime64('2026-01-08T00:00') + np.timedelta64(60 * i, 'm') for i in range(3)]
+    np.testing.assert_allclose(loads, [300, 301, 302])
+
+
+def test_best_windows_match_a_brute_force_search():
+    horizon = ForecastHorizon(WeekPredictor(), START, weeks=1, resolution_minutes=60)
+    t0, t1 = datetime(2026, 1, 9, 20), datetime(2026, 1, 10, 8)
+    windows = horizon.best_windows(3, top_k=2, t0=t0, t1=t1)
+
+    _, loads = horizon.loads_between(t0, t1)
+    averages = [loads[i:i + 3].mean() for i in range(len(loads) - 2)]
+    best = int(np.argmin(averages))
+    assert windows[0]['start'] == (t0 + timedelta(hours=best)).isoformat()
+    assert windows[0]['avg_load_kw'] == round(float(averages[best]), 2)
+    assert horizon.best_windows(24, t0=t0, t1=t1) == []
+
+
+def test_untrained_model_raises():
+    horizon = ForecastHorizon(WeekPredictor(is_trained=False), START, weeks=1)
+    with pytest.raises(RuntimeError):
+        horizon.loads(0, 1)
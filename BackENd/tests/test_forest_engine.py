@@ -0,0 +1,62 @@
+"""
+FlatForest tests
+The flattened engine must give sklearn's predictions, before and after a
+round trip through the artifact arrays
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor,
+    ExtraTreesClassifier, ExtraTreesRegressor
+)
+
+from forest_engine import FlatForest
+
+
+def _data(n_samples=400, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.uniform(-5, 5, size=(n_samples, 6))
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) * 3 + rng.normal(0, 0.5, n_samples)
+    return X, y
+
+
+@pytest.mark.parametrize('estimator', [RandomForestRegressor, ExtraTreesRegressor])
+def test_regressor_matches_sklearn(estimator):
+    X, y = _data()
+    forest = estimator(n_estimators=25, random_state=0).fit(X, y)
+    flat = FlatForest.from_sklearn(forest)
+
+    X_test, _ = _data(200, seed=1)
+    np.testing.assert_allclose(flat.predict(X_test), forest.predict(X_test), rtol=1e-10)
+    np.testing.assert_array_equal(flat.apply(X_test).shape, (200, 25))
+
+
+@pytest.mark.parametrize('estimator', [RandomForestClassifier, ExtraTreesClassifier])
+def test_classifier_matches_sklearn(estimator):
+    X, y = _data()
+    labels = np.digitize(y, [-3, 3])  # Three classes
+    forest = estimator(n_estimators=25, max_depth=8, random_state=0).fit(X, labels)
+    flat = FlatForest.from_sklearn(forest)
+
+    X_test, _ = _data(200, seed=1)
+    np.testing.assert_allclose(flat.predict_proba(X_test), forest.predict_proba(X_test), rtol=1e-10)
+    np.testing.assert_array_equal(flat.predict(X_test), forest.predict(X_test))
+
+
+def test_round_trip_through_arrays():
+    X, y = _data()
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    flat = FlatForest.from_sklearn(forest)
+    restored = FlatForest.from_arrays(flat.to_arrays())
+
+    assert restored.n_trees == 10
+    assert restored.nbytes == flat.nbytes
+    np.testing.assert_array_equal(restored.predict(X), flat.predict(X))
+
+
+def test_regressor_has_no_probabilities():
+    X, y = _data(50)
+    flat = FlatForest.from_sklearn(RandomForestRegressor(n_estimators=2, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        flat.predict_proba(X)
@@ -0,0 +1,75 @@
+"""
+IncrementalSchedule tests
+A live schedule must start from optimize()'s greedy, stay staffed through
+inserts and cancellations and give displaced patches their place back
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from models import CrewMember, Patch
+from scheduler import PatchScheduler
+
+
+@pytest.mark.parametrize('resolution_minutes, horizon_days', [(60, 7), (30, 7), (15, 1), (60, 14)])
+def test_incremental_matches_optimize(network_loads, crew, patches, resolution_minutes, horizon_days):
+    scheduler = PatchScheduler()
+    greedy = scheduler.optimize(network_loads, crew, patches, resolution_minutes, horizon_days)
+    live = scheduler.incremental(network_loads, crew, patches, resolution_minutes, horizon_days)
+    assert live.schedule() == greedy
+
+    # Inserting the patches one by one (highest priority first) gives the same schedule
+    live = scheduler.incremental(network_loads, crew, [], resolution_minutes, horizon_days)
+    for patch in sorted(patches, key=lambda p: p.priority, reverse=True):
+        live.insert(patch, repair=False)
+    assert live.schedule() == greedy
+
+
+def test_remove_releases_crew(network_loads, crew, patches):
+    live = PatchScheduler().incremental(network_loads, crew, patches)
+    free_before = live.index.free_counts.copy()
+    extra = Patch(id=99, name='extra', duration=2, priority=5, min_crew=1)
+
+    live.insert(extra)
+    result = live.remove(extra.id)
+    assert result['removed']['patch']['id'] == extra.id
+    np.testing.assert_array_equal(live.index.free_counts, free_before)
+    with pytest.raises(KeyError):
+        live.remove(extra.id)
+
+
+def test_repair_displaces_lower_priority_and_cancelling_restores_it(network_loads):
+    # One member working 00:00-06:00 on a single day: the 6-hour patch fills the shift
+    crew = [CrewMember(name='Ana', available_hours=[(0, 6)], skill_level=3)]
+    long_patch = Patch(id=1, name='long', duration=6, priority=1, min_crew=1)
+    urgent = Patch(id=2, name='urgent', duration=2, priority=5, min_crew=1)
+    live = PatchScheduler().incremental(network_loads, crew, [long_patch], horizon_days=1)
+
+    result = live.insert(urgent)
+    assert result['displaced'] == [long_patch.id]
+    assert result['unscheduled'] == [long_patch.id]
+    assert 'status' not in result['entry']
+    assert [entry.get('status') for entry in live.schedule()] == [None, 'unscheduled']
+
+    result = live.remove(urgent.id)
+    assert result['scheduled'] == [long_patch.id]
+    assert live.schedule()[0]['assigned_crew'] == ['Ana']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_changes_keep_the_schedule_staffed(network_loads, crew, assert_staffed, seed):
+    rng = random.Random(seed)
+    scheduler = PatchScheduler()
+    context = scheduler.context(network_loads, crew, 30, 7)
+    live = scheduler.incremental(network_loads, crew, [], context=context)
+
+    ids = []
+    for patch_id in range(40):
+        if ids and rng.random() < 0.3:
+            live.remove(ids.pop(rng.randrange(len(ids))))
+        live.insert(Patch(id=patch_id, name=f'p{patch_id}', duration=rng.choice([0.5, 1, 2, 3, 5]),
+                          priority=rng.randint(1, 5), min_crew=rng.randint(1, 2)))
+        ids.append(patch_id)
+        assert_staffed(live.schedule(), crew, context.grid)
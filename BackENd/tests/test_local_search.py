@@ -0,0 +1,105 @@
+"""
+Local search tests
+Runs must be reproducible, never break crew capacity and never return less
+than the staffed input schedule
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from exact_scheduler import BranchAndBoundScheduler
+from local_search import LocalSearch, entry_slot
+from models import CrewMember, Patch
+from scheduler import PatchScheduler
+
+
+def _shift_case(seed):
+    """Crew with random short shifts and a random set of patches"""
+    rng = random.Random(seed)
+    crew = []
+    for i in range(rng.randint(1, 4)):
+        start = rng.randint(0, 16)
+        crew.append(CrewMember(name=f'crew{i}', available_hours=[(start, start + rng.randint(2, 8))], skill_level=3))
+    patches = [
+        Patch(id=i, name=f'patch{i}', duration=rng.choice([0.5, 1, 2, 3, 4]),
+              priority=rng.randint(1, 5), min_crew=rng.randint(1, 3))
+        for i in range(rng.randint(3, 10))
+    ]
+    return crew, patches
+
+
+def _solver(context, patches):
+    solver = BranchAndBoundScheduler(context.grid, context.crew, context.slot_loads, context.horizon_days,
+                                     index=context.crew_index())
+    solver.prepare(patches)
+    return solver
+
+
+def test_local_search_is_deterministic(network_loads, crew, patches):
+    scheduler = PatchScheduler()
+    greedy = scheduler.optimize(network_loads, crew, patches)
+
+    runs = [scheduler.improve(greedy, network_loads, crew, iterations=3000, time_limit=60, seed=7)
+            for _ in range(2)]
+    assert runs[0]['schedule'] == runs[1]['schedule']
+    assert runs[0]['local_search']['objective'] == runs[1]['local_search']['objective']
+    assert runs[0]['local_search']['stopped'] == 'iterations'
+    assert runs[0]['local_search']['objective'] >= runs[0]['local_search']['initial_objective']
+
+
+def test_local_search_keeps_best_and_respects_capacity():
+    rng = np.random.RandomState(0)
+    n_patches, n_slots = 12, 48
+    values = rng.uniform(50, 150, size=(n_patches, n_slots))
+    values[:, -2:] = -np.inf  # No starts in the last slots
+    durations = rng.randint(1, 6, n_patches)
+    demands = rng.randint(1, 3, n_patches)
+    capacity = rng.randint(1, 4, n_slots)
+
+    search = LocalSearch(values, durations, demands, capacity)
+    first = search.run([None] * n_patches, iterations=5000, time_limit=60, seed=3)
+    second = search.run([None] * n_patches, iterations=5000, time_limit=60, seed=3)
+    assert first['starts'] == second['starts']
+
+    usage = np.zeros(n_slots, dtype=int)
+    for patch_num, slot in enumerate(first['starts']):
+        if slot is None:
+            continue
+        assert np.isfinite(values[patch_num, slot])
+        usage[(slot + np.arange(durations[patch_num])) % n_slots] += demands[patch_num]
+    assert (usage <= capacity).all()
+    assert first['objective'] == round(search.objective(first['starts']), 2)
+
+
+@pytest.mark.parametrize('seed', range(15))
+def test_improve_never_loses_to_the_staffed_input(network_loads, assert_staffed, seed):
+    crew, patches = _shift_case(seed)
+    scheduler = PatchScheduler()
+    context = scheduler.context(network_loads, crew, 60, 7)
+    greedy = scheduler.optimize(network_loads, crew, patches, context=context)
+
+    result = scheduler.improve(greedy, network_loads, crew, iterations=2000, time_limit=60, seed=seed,
+                               context=context)
+    solver = _solver(context, [Patch(**entry['patch']) for entry in greedy])
+    input_starts, _ = solver.staff([entry_slot(entry, context.grid, 7) for entry in greedy])
+    improved = [entry_slot(entry, context.grid, 7) for entry in result['schedule']]
+    assert solver.objective(improved) >= solver.objective(input_starts) - 1e-6
+    assert result['local_search']['objective'] == round(solver.objective(improved), 2)
+    assert_staffed(result['schedule'], crew, context.grid)
+
+
+def test_staff_reassigns_crew_off_an_overlapping_patch(network_loads):
+    # Ben (listed first) takes the 02:00 patch; the 03:00-07:00 one only fits Ben,
+    # so Ana, free 00:00-04:00, has to take over the first patch
+    crew = [CrewMember(name='Ben', available_hours=[(0, 24)], skill_level=3),
+            CrewMember(name='Ana', available_hours=[(0, 4)], skill_level=3)]
+    patches = [Patch(id=1, name='early', duration=2, priority=5, min_crew=1),
+               Patch(id=2, name='late', duration=4, priority=4, min_crew=1)]
+    context = PatchScheduler().context(network_loads, crew, 60, 1)
+    solver = _solver(context, patches)
+
+    starts, members = solver.staff([2, 3])
+    assert starts == [2, 3]
+    assert members == [[1], [0]]
@@ -0,0 +1,71 @@
+"""
+Memory budget tests
+A budgeted forest must fit its budget, keep as many trees and as much depth
+as it can and leave the estimator's configuration as it was
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from memory_budget import (
+    MIN_TREES, fit_within_budget, fitted_depth, forest_nbytes, memory_report, prune_to_budget, tree_nbytes
+)
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.RandomState(0)
+    X = rng.uniform(size=(600, 6))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0.8).astype(int)
+    return X, y
+
+
+def _forest(n_estimators=60, max_depth=None):
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=0)
+
+
+def test_without_budget_the_forest_is_fitted_as_configured(data):
+    model = fit_within_budget(_forest(), *data)
+    assert len(model.estimators_) == 60
+    assert memory_report(model)['within_budget']
+
+
+def test_budget_keeps_depth_and_drops_trees(data):
+    full = _forest().fit(*data)
+    budget = forest_nbytes(full) // 2
+
+    model = fit_within_budget(_forest(), *data, budget)
+    assert forest_nbytes(model) <= budget
+    assert MIN_TREES <= len(model.estimators_) < 60
+    assert fitted_depth(model) is None
+    # The configuration is restored for the next fit
+    assert (model.n_estimators, model.max_depth) == (60, None)
+
+
+def test_tight_budget_steps_down_the_depth(data):
+    full = _forest().fit(*data)
+    budget = forest_nbytes(full) // 10
+
+    model = fit_within_budget(_forest(), *data, budget)
+    report = memory_report(model, budget)
+    assert report['within_budget']
+    assert report['max_depth'] is not None
+    assert report['n_estimators'] >= 1
+    assert (model.n_estimators, model.max_depth) == (60, None)
+
+
+def test_prune_keeps_the_oldest_or_newest_trees(data):
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(*data)
+    trees = list(model.estimators_)
+    budget = sum(tree_nbytes(e) for e in trees[:5])
+
+    assert prune_to_budget(model, budget) == 15
+    assert model.estimators_ == trees[:5]
+    assert model.n_estimators == 5
+
+    model.estimators_ = list(trees)
+    budget = sum(tree_nbytes(e) for e in trees[-7:])
+    assert prune_to_budget(model, budget, keep_newest=True) == 13
+    assert model.estimators_ == trees[-7:]
+    assert prune_to_budget(model, None) == 0
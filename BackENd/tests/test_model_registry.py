@@ -0,0 +1,82 @@
+"""
+ModelRegistry tests
+Site models are kept in a bounded LRU; the default site is served by the
+global models and never evicted
+"""
+
+import threading
+
+import pytest
+
+from model_registry import ModelRegistry, DEFAULT_SITE, validate_site
+from ml_predictor import predictor
+
+
+@pytest.fixture
+def fetches(network_loads):
+    """fetch_loads() counting calls per site; site 'empty' has no history"""
+    calls = {}
+
+    def fetch_loads(site):
+        calls[site] = calls.get(site, 0) + 1
+        return [] if site == 'empty' else network_loads
+
+    fetch_loads.calls = calls
+    return fetch_loads
+
+
+def test_lru_eviction(fetches):
+    registry = ModelRegistry(capacity=2, fetch_loads=fetches)
+
+    north = registry.get('north')
+    registry.get('south')
+    assert registry.get('north') is north  # Hit: north becomes most recently used
+    registry.get('east')  # Evicts south, the least recently used
+    assert registry.resident_sites() == ['north', 'east']
+
+    registry.get('south')  # Reloaded, evicting north
+    assert registry.resident_sites() == ['east', 'south']
+    assert fetches.calls == {'north': 1, 'south': 2, 'east': 1}
+
+    stats = registry.get_stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 4, 2)
+
+
+def test_default_site_is_the_global_models(fetches):
+    registry = ModelRegistry(capacity=1, fetch_loads=fetches)
+    assert registry.get(None) is registry.get(DEFAULT_SITE)
+    assert registry.get(DEFAULT_SITE).rf is predictor
+    assert registry.resident_sites() == []
+    assert fetches.calls == {}
+
+
+def test_explicit_eviction(fetches):
+    registry = ModelRegistry(capacity=2, fetch_loads=fetches)
+    registry.get('north')
+    assert registry.evict('north')
+    assert not registry.evict('north')
+    assert registry.resident_sites() == []
+
+
+def test_bad_and_empty_sites(fetches):
+    registry = ModelRegistry(capacity=2, fetch_loads=fetches)
+    with pytest.raises(ValueError):
+        registry.get('../etc')
+    with pytest.raises(RuntimeError):
+        registry.get('empty')
+    assert registry.get_stats()['load_errors'] == 1
+    assert registry.resident_sites() == []
+    assert validate_site('') == DEFAULT_SITE
+
+
+def test_concurrent_misses_load_a_site_once(fetches):
+    registry = ModelRegistry(capacity=2, fetch_loads=fetches)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('north'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetches.calls == {'north': 1}
+    assert len(results) == 4 and all(models is results[0] for models in results)
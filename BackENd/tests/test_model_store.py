@@ -0,0 +1,73 @@
+"""
+ModelStore tests
+Artifacts round-trip a trained model, are keyed by the content of what they
+were trained on and only the newest versions of a model are kept
+"""
+
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from model_store import ModelStore, estimator_params, fingerprint
+from network_load_predictor import NetworkLoadPredictor
+from synthetic_data import generate_network_load_columns
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ModelStore(directory=str(tmp_path), keep_versions=2)
+    store.enabled = True
+    return store
+
+
+def test_fingerprint_follows_content():
+    data = np.arange(12.0)
+    assert fingerprint('lr', data, {'a': 1, 'b': 2}) == fingerprint('lr', data.copy(), {'b': 2, 'a': 1})
+    assert fingerprint('lr', data) != fingerprint('lr', data.reshape(3, 4))
+    assert fingerprint('lr', data) != fingerprint('lr', data.astype(np.float32))
+    # Runtime-only params do not change what a model learns
+    assert estimator_params(LinearRegression(n_jobs=1)) == estimator_params(LinearRegression(n_jobs=4))
+
+
+def test_load_or_train_round_trips_a_predictor(store):
+    columns = generate_network_load_columns(300, seed=1)
+    key = fingerprint('network_load_lr', *NetworkLoadPredictor().preprocess_columns(columns))
+
+    trained = NetworkLoadPredictor()
+    assert store.load_or_train('lr', trained, key, lambda: trained.train(columns=columns)) == 'trained'
+
+    loaded = NetworkLoadPredictor()
+    assert store.load_or_train('lr', loaded, key, lambda: pytest.fail('retrained')) == 'loaded'
+    np.testing.assert_array_equal(loaded.model.coef_, trained.model.coef_)
+    np.testing.assert_array_equal(loaded.xtx, trained.xtx)
+    assert loaded.predict(2, 14) == trained.predict(2, 14)
+
+    retrained = NetworkLoadPredictor()
+    assert store.load_or_train('lr', retrained, key, lambda: retrained.train(columns=columns), force=True) == 'trained'
+
+
+def test_arrays_load_memory_mapped(store):
+    store.save('arrays', 'k1', {'weights': np.arange(100000.0)}, {})
+    payload, metadata = store.load('arrays', 'k1')
+    assert isinstance(payload['weights'], np.memmap)
+    assert metadata['fingerprint'] == 'k1'
+    assert store.load('arrays', 'k1', mmap=False)[0]['weights'].__class__ is np.ndarray
+    assert store.load('arrays', 'missing') is None
+
+
+def test_only_the_newest_versions_are_kept(store):
+    for i, key in enumerate(['a', 'b', 'c']):
+        store.save('m', key, {'value': i}, {})
+        # One second apart, so the order does not depend on the filesystem's clock
+        os.utime(os.path.join(store.directory, 'm', key), (1000 + i, 1000 + i))
+    assert store.list_artifacts('m') == ['c', 'b']
+
+
+def test_disabled_store_never_writes(tmp_path):
+    store = ModelStore(directory=str(tmp_path))
+    store.enabled = False
+    assert store.save('m', 'k', {'value': 1}, {}) is False
+    assert store.load('m', 'k') is None
+    assert os.listdir(str(tmp_path)) == []
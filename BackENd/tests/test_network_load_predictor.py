@@ -0,0 +1,46 @@
+"""
+NetworkLoadPredictor update tests
+Folding in new readings must match a refit on the same observations and
+swap in a new estimator instead of changing the one being served
+"""
+
+import numpy as np
+
+from network_load_predictor import NetworkLoadPredictor
+from synthetic_data import generate_network_load_columns
+
+
+def test_update_swaps_in_the_refit_model():
+    predictor = NetworkLoadPredictor()
+    predictor.train(columns=generate_network_load_columns(500, seed=1))
+    served = predictor.model
+    coef, intercept, version = served.coef_.copy(), served.intercept_, predictor.model_version
+
+    batch = generate_network_load_columns(200, seed=2, include_week_grid=False)
+    n_before = predictor.n_observations
+    assert predictor.update(columns=batch) == n_before + 200
+
+    # The estimator being served before the update is left as it was
+    assert predictor.model is not served
+    np.testing.assert_array_equal(served.coef_, coef)
+    assert served.intercept_ == intercept
+    assert predictor.model_version == version + 1
+
+    # The new coefficients solve the normal equations of every observation so far
+    X, y = predictor._training_arrays(columns=batch)
+    design = predictor._design_matrix(X)
+    solution = np.linalg.lstsq(predictor.xtx, predictor.xty, rcond=None)[0]
+    np.testing.assert_allclose(predictor.model.intercept_, solution[0])
+    np.testing.assert_allclose(predictor.model.coef_, solution[1:])
+    np.testing.assert_allclose(predictor.model.predict(X), design @ solution)
+
+
+def test_retraining_replaces_the_served_model():
+    predictor = NetworkLoadPredictor()
+    predictor.train(columns=generate_network_load_columns(300, seed=1))
+    served = predictor.model
+    coef = served.coef_.copy()
+
+    predictor.train(columns=generate_network_load_columns(300, seed=3))
+    assert predictor.model is not served
+    np.testing.assert_array_equal(served.coef_, coef)
@@ -0,0 +1,92 @@
+"""
+PatchClassifier compiled-mode tests
+The lookup table holds the forest's own probabilities on the grid, so on-grid
+predictions must match the forest's and off-grid inputs must fall back to it;
+warm-up compiles it only when asked to
+"""
+
+import numpy as np
+import pytest
+
+import model_warmup
+from model_warmup import ModelWarmup
+from models import Patch
+from patch_classifier import PatchClassifier
+
+# Forest size of these tests (the served model has 1000 trees)
+TEST_TREES = 40
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    classifier = PatchClassifier()
+    classifier.model.set_params(n_estimators=TEST_TREES)
+    classifier.memory_budget = None
+    classifier.train(n_samples=600)
+    return classifier
+
+
+def _forest_predictions(classifier, patch, loads, crew_available, hours):
+    """predict_batch answered by the forest alone"""
+    compiled, classifier.compiled = classifier.compiled, None
+    try:
+        return classifier.predict_batch(patch, loads, crew_available, hours)
+    finally:
+        classifier.compiled = compiled
+
+
+def test_compiled_table_matches_forest_on_grid(classifier):
+    report = classifier.compile(min_agreement=0)
+    assert report['enabled']
+
+    hours = np.arange(24)
+    for priority in (1, 3, 5):
+        for duration, min_crew, crew_available, load in ((0.5, 1, 2, 10), (1, 2, 5, 40), (2.25, 3, 1, 90)):
+            patch = Patch(id=1, name='p', duration=duration, priority=priority, min_crew=min_crew)
+            loads = np.full(24, float(load))
+
+            probabilities, on_grid = classifier._lookup_probabilities(patch, loads, crew_available, hours)
+            assert on_grid.all()
+            X = classifier._features_from_arrays(
+                np.full(24, priority), np.full(24, duration), np.full(24, min_crew),
+                np.full(24, crew_available), loads / 1000, hours
+            )
+            np.testing.assert_allclose(probabilities, classifier.model.predict_proba(X), atol=1e-6)
+
+            compiled = classifier.predict_batch(patch, loads, crew_available, hours)
+            forest = _forest_predictions(classifier, patch, loads, crew_available, hours)
+            assert [r['patch_type'] for r in compiled] == [r['patch_type'] for r in forest]
+
+
+def test_off_grid_inputs_fall_back_to_forest(classifier):
+    classifier.compile(min_agreement=0)
+    patch = Patch(id=1, name='p', duration=7.5, priority=4, min_crew=2)  # Longer than the grid
+    loads, hours = [12.5, 250.0], [3, 15]
+
+    _, on_grid = classifier._lookup_probabilities(patch, loads, 3, hours)
+    assert not on_grid.any()
+    assert classifier.predict_batch(patch, loads, 3, hours) == _forest_predictions(classifier, patch, loads, 3, hours)
+
+
+def test_retraining_drops_the_table(classifier):
+    classifier.compile(min_agreement=0)
+    classifier.train(n_samples=200)
+    assert classifier.lookup_table is None
+    assert classifier.get_model_stats()['compiled'] is False
+
+
+def test_table_below_agreement_is_never_published(classifier):
+    classifier.compile(min_agreement=0)
+    report = classifier.compile(min_agreement=1.01)
+    assert not report['enabled']
+    assert classifier.compiled is None and classifier.lookup_grid is None
+
+
+@pytest.mark.parametrize('compile_classifier', [False, True])
+def test_warmup_compiles_only_when_enabled(classifier, monkeypatch, compile_classifier):
+    monkeypatch.setattr(model_warmup, 'patch_classifier', classifier)
+    classifier.train(n_samples=200)
+
+    source = ModelWarmup(compile_classifier=compile_classifier)._warm_patch_classifier()
+    assert classifier.get_model_stats()['compiled'] is compile_classifier
+    assert (source == 'ready, compiled') is compile_classifier
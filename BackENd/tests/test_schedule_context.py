@@ -0,0 +1,78 @@
+"""
+ScheduleContext tests
+A context is built once per input hash and every consumer reads its arrays:
+crew in skill order and one forecast per model version
+"""
+
+import numpy as np
+
+from ml_optimizer import MLOptimizer
+from models import Patch
+from schedule_context import ScheduleContext, ScheduleContextCache
+from slot_grid import SlotGrid
+
+
+class WeekPredictor:
+    """A trained model whose week of loads is its hour of the day plus its version"""
+
+    def __init__(self):
+        self.is_trained = True
+        self.model_version = 1
+
+    def predict_grid(self, day_nums, hours, minutes):
+        return np.asarray(hours, dtype=float) + self.model_version
+
+
+def _count_forecasts(monkeypatch):
+    calls = []
+    forecast = SlotGrid.forecast
+
+    def counting(grid, predictor, fallback=None):
+        calls.append(grid.resolution_minutes)
+        return forecast(grid, predictor, fallback)
+
+    monkeypatch.setattr(SlotGrid, 'forecast', counting)
+    return calls
+
+
+def test_cache_returns_the_same_context(network_loads, crew):
+    cache = ScheduleContextCache(capacity=2)
+    first = cache.get(network_loads, crew, 60)
+    assert cache.get(network_loads, crew, 60) is first
+    assert cache.get(network_loads, crew, 30) is not first
+    assert cache.get_stats()['hits'] == 1
+    assert not first.slot_loads.flags.writeable
+
+
+def test_crew_by_skill_is_most_skilled_first(network_loads, crew):
+    context = ScheduleContext(network_loads, crew, 60)
+    assert [crew[i].skill_level for i in context.crew_by_skill] == [5, 4, 4, 3, 2]
+    # Ties keep the input order
+    assert [crew[i].name for i in context.crew_by_skill] == ['Ana', 'Ben', 'Dev', 'Cleo', 'Eli']
+
+
+def test_forecast_is_fetched_once_per_model_version(network_loads, crew, monkeypatch):
+    calls = _count_forecasts(monkeypatch)
+    predictor = WeekPredictor()
+    context = ScheduleContext(network_loads, crew, 30)
+
+    loads = context.forecast(predictor)
+    assert context.forecast(predictor) is loads
+    assert calls == [30]
+    np.testing.assert_array_equal(loads[:4], [1, 1, 2, 2])
+
+    context.forecast(predictor, resolution_minutes=60)
+    predictor.model_version += 1
+    assert context.forecast(predictor)[0] == 2
+    assert calls == [30, 60, 30]
+
+
+def test_crew_recommendation_reads_the_context(network_loads, crew):
+    optimizer = MLOptimizer()
+    context = ScheduleContext(network_loads, crew, 60)
+    patch = Patch(id=1, name='p', duration=1, priority=3, min_crew=2)
+
+    # Members available at 06:00 (Ana and Ben), most skilled first
+    recommendation = optimizer.recommend_crew_for_patch(patch, list(crew), 6, 30.0, context=context)
+    assert [c['name'] for c in recommendation['recommended_crew']] == ['Ana', 'Ben']
+    assert recommendation['sufficient']
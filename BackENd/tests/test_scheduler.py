@@ -0,0 +1,95 @@
+"""
+PatchScheduler tests
+Patches are staffed by members free for their whole window, never by whoever
+happens to be free at the start slot
+"""
+
+import pytest
+
+from forecast_service import DAYS, DAYS_PER_WEEK
+from models import NetworkLoad, CrewMember, Patch
+from multi_strategy_scheduler import MultiStrategyScheduler
+from scheduler import PatchScheduler
+from slot_grid import get_slot_grid
+
+
+@pytest.fixture
+def night_loads():
+    """Lowest load at 02:00 every day"""
+    return [NetworkLoad(hour=h, load_kilowatts=10.0 if h == 2 else 45.0, day_of_week=DAYS[d], day_number=d)
+            for d in range(DAYS_PER_WEEK) for h in range(24)]
+
+
+@pytest.fixture
+def short_shift_crew():
+    """B works 00:00-03:00, A all day"""
+    return [CrewMember(name='B', available_hours=[(0, 3)], skill_level=3),
+            CrewMember(name='A', available_hours=[(0, 24)], skill_level=3)]
+
+
+def test_crew_are_free_for_the_whole_window(night_loads, short_shift_crew):
+    patch = Patch(id=1, name='Kernel update', duration=3, priority=5, min_crew=1)
+    scheduler = PatchScheduler()
+
+    entry, = scheduler.optimize(night_loads, short_shift_crew, [patch])
+    assert (entry['start_hour'], entry['assigned_crew']) == (2, ['A'])
+
+    live = scheduler.incremental(night_loads, short_shift_crew, [patch])
+    assert live.schedule() == [entry]
+
+
+def test_no_member_is_double_booked(network_loads, crew, patches, assert_staffed):
+    scheduler = PatchScheduler()
+    many = [Patch(id=p.id + 10 * k, name=p.name, duration=p.duration, priority=p.priority, min_crew=p.min_crew)
+            for k in range(4) for p in patches]
+    for resolution_minutes, horizon_days in ((60, 7), (15, 7), (30, 1), (60, 14)):
+        grid = get_slot_grid(resolution_minutes)
+        schedule = scheduler.optimize(network_loads, crew, many, resolution_minutes, horizon_days)
+        assert_staffed(schedule, crew, grid, horizon_days)
+        live = scheduler.incremental(network_loads, crew, many, resolution_minutes, horizon_days)
+        assert_staffed(live.schedule(), crew, grid, horizon_days)
+
+
+def test_strategies_staff_the_whole_window(night_loads, short_shift_crew):
+    patch = Patch(id=1, name='Kernel update', duration=4, priority=5, min_crew=1)
+    urgency = MultiStrategyScheduler()._urgency_first_schedule([patch], short_shift_crew, night_loads)
+    entry, = urgency['schedule']
+    # B is free at 00:00 but not until 04:00
+    assert (entry['start_hour'], entry['assigned_crew']) == (0, ['A'])
+
+
+def _loads_lowest_at(day_number, hour):
+    """A week of 45 kW readings with 10 kW at one (day, hour)"""
+    return [NetworkLoad(hour=h, load_kilowatts=10.0 if (d, h) == (day_number, hour) else 45.0,
+                        day_of_week=DAYS[d], day_number=d)
+            for d in range(DAYS_PER_WEEK) for h in range(24)]
+
+
+def test_each_day_is_scored_with_its_own_loads(short_shift_crew):
+    patch = Patch(id=1, name='p', duration=1, priority=3, min_crew=1)
+    entry, = PatchScheduler().optimize(_loads_lowest_at(3, 5), short_shift_crew, [patch])
+    assert (entry['day'], entry['start_hour']) == ('Thursday', 5)
+
+
+def test_only_a_recurring_week_wraps_at_its_end(short_shift_crew):
+    # Sunday 22:00 has the lowest load; a 4-hour patch there runs into Monday
+    loads = _loads_lowest_at(6, 22)
+    patch = Patch(id=1, name='p', duration=4, priority=3, min_crew=1)
+    scheduler = PatchScheduler()
+
+    entry, = scheduler.optimize(loads, short_shift_crew, [patch], horizon_days=7)
+    assert (entry['horizon_day'], entry['start_hour']) == (6, 22)
+
+    # Two real weeks: the first Sunday may run into the second Monday
+    entry, = scheduler.optimize(loads, short_shift_crew, [patch], horizon_days=14)
+    assert (entry['horizon_day'], entry['start_hour']) == (6, 22)
+
+    # A single real day: the patch has to end by midnight
+    entry, = scheduler.optimize(_loads_lowest_at(0, 22), short_shift_crew, [patch], horizon_days=1)
+    assert entry['start_hour'] + patch.duration <= 24
+
+
+@pytest.mark.parametrize('horizon_days', [0, 57, 2.5])
+def test_bad_horizons_raise(network_loads, crew, patches, horizon_days):
+    with pytest.raises(ValueError):
+        PatchScheduler().optimize(network_loads, crew, patches, horizon_days=horizon_days)
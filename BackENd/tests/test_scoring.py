@@ -0,0 +1,193 @@
+"""
+Scoring kernel tests
+Every weight profile must reproduce the scalar score it replaced; the
+reference functions below are those scalar scores, unchanged except that
+they take the load and crew count directly
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from models import Patch
+from scoring import ScoringKernel, get_kernel
+from scheduler import PatchScheduler
+from ml_optimizer import MLOptimizer
+from slot_grid import get_slot_grid
+
+LOADS = [0, 10, 19.99, 20, 25, 29.99, 30, 39.99, 40, 45, 49.99, 50, 80]
+HOURS = list(range(24))
+DAY_NUMS = list(range(7))
+CREW_COUNTS = list(range(0, 8))
+
+
+def _patches():
+    return [
+        Patch(id=i, name=f'p{i}', duration=duration, priority=priority, min_crew=min_crew)
+        for i, (duration, priority, min_crew) in enumerate(
+            itertools.product((0.25, 1, 2.5, 6), (1, 3, 5), (1, 2, 3))
+        )
+    ]
+
+
+def basic_score(patch, load_kw, crew_count):
+    """PatchScheduler.calculate_score"""
+    if load_kw < 20:
+        load_score = 40
+    elif load_kw < 30:
+        load_score = 30
+    elif load_kw < 40:
+        load_score = 20
+    elif load_kw < 50:
+        load_score = 10
+    else:
+        load_score = 5
+
+    crew_needed = patch.min_crew
+    if crew_count >= crew_needed * 2:
+        crew_score = 30
+    elif crew_count >= crew_needed + 2:
+        crew_score = 25
+    elif crew_count >= crew_needed + 1:
+        crew_score = 20
+    elif crew_count >= crew_needed:
+        crew_score = 15
+    else:
+        crew_score = 0
+
+    priority_score = (patch.priority / 5.0) * 30
+    return round(min(100, max(0, load_score + crew_score + priority_score)), 2)
+
+
+def ml_optimizer_score(patch, hour, day_num, network_load, available_crew):
+    """MLOptimizer.calculate_patch_score"""
+    if network_load < 20:
+        load_score = 40
+    elif network_load < 30:
+        load_score = 30
+    elif network_load < 40:
+        load_score = 20
+    elif network_load < 50:
+        load_score = 10
+    else:
+        load_score = 0
+
+    if 0 <= hour < 6:
+        time_score = 20
+    elif 6 <= hour < 9:
+        time_score = 15
+    elif 9 <= hour < 17:
+        time_score = 5
+    elif 17 <= hour < 22:
+        time_score = 12
+    else:
+        time_score = 18
+
+    crew_needed = patch.min_crew
+    if available_crew >= crew_needed + 2:
+        crew_score = 15
+    elif available_crew >= crew_needed + 1:
+        crew_score = 12
+    elif available_crew >= crew_needed:
+        crew_score = 8
+    else:
+        crew_score = 0
+
+    score = load_score + time_score + crew_score + (patch.priority / 5) * 15
+    if day_num >= 5:
+        score += 10
+    return round(min(100, max(0, score)), 2)
+
+
+def mock_score(patch, hour, day_num, network_load):
+    """MockScheduler._calculate_score"""
+    if network_load < 20:
+        load_score = 40
+    elif network_load < 30:
+        load_score = 30
+    elif network_load < 40:
+        load_score = 20
+    else:
+        load_score = 10
+
+    if 0 <= hour < 6:
+        time_score = 20
+    elif 6 <= hour < 9:
+        time_score = 15
+    elif 9 <= hour < 17:
+        time_score = 5
+    elif 17 <= hour < 22:
+        time_score = 12
+    else:
+        time_score = 18
+
+    weekend_score = 10 if day_num >= 5 else 0
+    priority_score = (patch.priority / 5) * 15
+    duration_score = max(0, 15 - (patch.duration * 3))
+
+    total = load_score + time_score + weekend_score + priority_score + duration_score
+    return round(min(100, max(0, total)), 2)
+
+
+def test_basic_profile_matches_scalar_score():
+    patches = _patches()
+    kernel = get_kernel('basic')
+    for crew_count in CREW_COUNTS:
+        matrix = kernel.score_matrix(patches, LOADS, crew_counts=crew_count)
+        expected = [[basic_score(p, load, crew_count) for load in LOADS] for p in patches]
+        np.testing.assert_array_equal(matrix, expected)
+
+
+def test_basic_profile_takes_per_slot_crew_counts():
+    patches = _patches()
+    crew_counts = np.resize(CREW_COUNTS, len(LOADS))
+    matrix = get_kernel('basic').score_matrix(patches, LOADS, crew_counts=crew_counts)
+    expected = [[basic_score(p, load, c) for load, c in zip(LOADS, crew_counts)] for p in patches]
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_ml_optimizer_profile_matches_scalar_score():
+    patches = _patches()
+    kernel = get_kernel('ml_optimizer')
+    slots = list(itertools.product(LOADS, HOURS, DAY_NUMS))
+    loads, hours, day_nums = (np.array(column) for column in zip(*slots))
+    for crew_count in CREW_COUNTS:
+        matrix = kernel.score_matrix(patches, loads, hours, day_nums, crew_counts=crew_count)
+        expected = [[ml_optimizer_score(p, h, d, l, crew_count) for l, h, d in slots] for p in patches]
+        np.testing.assert_array_equal(matrix, expected)
+
+
+def test_mock_profile_matches_scalar_score():
+    patches = _patches()
+    grid = get_slot_grid(15)
+    loads = np.resize(LOADS, grid.n_slots)
+    matrix = get_kernel('mock').score_matrix(patches, loads, grid.hours, grid.day_nums)
+    expected = [
+        [mock_score(p, int(h), d, l) for l, h, d in zip(loads, grid.hours, grid.day_nums)]
+        for p in patches
+    ]
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_scheduler_and_optimizer_scores_use_the_kernel(network_loads, crew):
+    scheduler = PatchScheduler()
+    optimizer = MLOptimizer()
+    for patch in _patches():
+        for load in network_loads[::7]:
+            assert scheduler.calculate_score(patch, load.hour, network_loads, crew[:3], load.day_number) == \
+                basic_score(patch, load.load_kilowatts, 3)
+            assert optimizer.calculate_patch_score(patch, load.hour, load.day_number, load.load_kilowatts, 2) == \
+                ml_optimizer_score(patch, load.hour, load.day_number, load.load_kilowatts, 2)
+
+
+def test_unknown_profile_and_missing_inputs_raise():
+    with pytest.raises(ValueError):
+        ScoringKernel('nope')
+    with pytest.raises(ValueError):
+        ScoringKernel({'load': {'thresholds': (20,), 'points': (40,), 'default': 0}, 'bonus': 5})
+    with pytest.raises(ValueError):
+        get_kernel('basic').score_matrix(_patches(), LOADS)
+    with pytest.raises(ValueError):
+        get_kernel('mock').score_matrix(_patches(), LOADS)
+
@@ -0,0 +1,75 @@
+"""
+SeasonalProfilePredictor tests
+Each profile cell is the median (or mean) of its readings; cells without
+readings are filled from the hour, then days of the same kind, then overall
+"""
+
+import numpy as np
+import pytest
+
+from seasonal_predictor import SeasonalProfilePredictor
+
+
+def _columns(readings):
+    """Columns of (day_num, hour, minute, load_kw) readings"""
+    day_num, hour, minute, load_kw = (np.array(column) for column in zip(*readings))
+    return {'day_num': day_num, 'hour': hour, 'minute': minute, 'load_kw': load_kw}
+
+
+READINGS = [(0, 2, 0, 10.0), (0, 2, 5, 30.0), (0, 2, 10, 80.0),  # Monday 02:00-02:15
+            (1, 2, 30, 40.0),                                     # Tuesday 02:30
+            (5, 9, 0, 12.0)]                                      # Saturday 09:00
+
+
+@pytest.mark.parametrize('statistic, expected', [('median', 30.0), ('mean', 40.0)])
+def test_cells_take_the_statistic_of_their_readings(statistic, expected):
+    predictor = SeasonalProfilePredictor(statistic=statistic)
+    assert predictor.train(_columns(READINGS))
+    assert predictor.predict(0, 2, 0) == expected
+    assert predictor.predict('Tuesday', 2, 30) == 40.0
+    assert predictor.n_observations == len(READINGS)
+
+
+def test_missing_cells_are_filled_from_similar_slots():
+    predictor = SeasonalProfilePredictor()
+    predictor.train(_columns(READINGS))
+
+    # Another bucket of an observed hour: that hour's mean
+    assert predictor.predict(0, 2, 45) == 30.0
+    # Same hour on another weekday: the weekdays' mean of that hour
+    assert predictor.predict(3, 2, 0) == 35.0
+    # Same hour on the weekend: only weekend days count
+    assert predictor.predict(6, 9, 0) == 12.0
+    # Nothing similar: the overall mean of the observed cells
+    assert predictor.predict(6, 2, 0) == round((30.0 + 40.0 + 12.0) / 3, 2)
+
+
+def test_update_blends_new_readings():
+    predictor = SeasonalProfilePredictor(alpha=0.5)
+    predictor.train(_columns(READINGS))
+    version = predictor.model_version
+
+    updated = predictor.update(_columns([(0, 2, 0, 50.0), (4, 20, 0, 70.0)]))
+    assert updated == 2
+    assert predictor.predict(0, 2, 0) == 40.0   # Halfway from 30 to 50
+    assert predictor.predict(4, 20, 0) == 70.0  # First reading of the cell
+    assert predictor.model_version == version + 1
+    assert predictor.n_updates == 1
+
+
+def test_batch_and_grid_match_single_predictions():
+    predictor = SeasonalProfilePredictor()
+    predictor.train(n_samples=300)
+    day_nums, hours, minutes = np.array([0, 3, 6]), np.array([0, 12, 23]), np.array([0, 15, 45])
+    expected = [predictor.predict(d, h, m) for d, h, m in zip(day_nums, hours, minutes)]
+    np.testing.assert_array_equal(predictor.predict_batch(day_nums, hours, minutes), expected)
+    assert len(predictor.predict_week(15)) == 7 * 96
+
+
+def test_bad_configuration_raises():
+    with pytest.raises(ValueError):
+        SeasonalProfilePredictor(bucket_minutes=7)
+    with pytest.raises(ValueError):
+        SeasonalProfilePredictor(statistic='mode')
+    with pytest.raises(ValueError):
+        SeasonalProfilePredictor().train({'hour': [1], 'load_kw': [2.0]})
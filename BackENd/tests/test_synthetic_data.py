@@ -0,0 +1,67 @@
+"""
+Synthetic data tests
+Generators are seeded and loop-free: the same seed gives the same rows, the
+weekly grid covers every slot and chunked sets read back exactly
+"""
+
+import numpy as np
+
+from forecast_service import DAYS
+from synthetic_data import (
+    generate_network_load_columns, generate_patch_classifier_data, network_load_columns_to_frame,
+    read_chunks, write_chunks
+)
+
+
+def test_network_loads_are_seeded():
+    first, second = generate_network_load_columns(2000, seed=3), generate_network_load_columns(2000, seed=3)
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+    assert not np.array_equal(first['load_kw'], generate_network_load_columns(2000, seed=4)['load_kw'])
+
+
+def test_week_grid_covers_every_slot_once():
+    columns = generate_network_load_columns(1000)
+    assert len(columns['load_kw']) == 1000
+    grid = (columns['day_num'][:672].astype(int) * 24 + columns['hour'][:672]) * 60 + columns['minute'][:672]
+    assert len(np.unique(grid)) == 7 * 24 * 4
+    assert columns['load_kw'].min() >= 5
+
+    # Weekends and nights are lighter than weekday business hours
+    loads, day_num, hour = columns['load_kw'], columns['day_num'], columns['hour']
+    business = loads[(day_num < 5) & (hour >= 9) & (hour < 17)].mean()
+    assert loads[day_num >= 5].mean() < business
+    assert loads[hour < 6].mean() < business
+
+    without_grid = generate_network_load_columns(100, include_week_grid=False)
+    assert len(without_grid['load_kw']) == 100
+
+
+def test_frame_uses_day_names_and_clock_times():
+    columns = generate_network_load_columns(700)
+    frame = network_load_columns_to_frame(columns)
+    assert list(frame.columns) == ['day', 'time', 'load_kw']
+    assert frame['day'].iloc[0] == DAYS[columns['day_num'][0]]
+    assert frame['time'].iloc[1] == f"{columns['hour'][1]:02d}:{columns['minute'][1]:02d}"
+
+
+def test_patch_types_follow_risk_and_duration():
+    data = generate_patch_classifier_data(3000, seed=1)
+    risk, duration, label = data['risk_indicator'], data['duration_minutes'], data['patch_type']
+    assert (label[risk <= 2] == 0).all()
+    assert (label[risk == 3] == 1).all()
+    assert (label[(risk >= 4) & (duration <= 60)] == 2).all()
+    assert (label[(risk >= 4) & (duration > 60)] == 1).all()
+    assert all(np.isfinite(values).all() for values in data.values())
+
+
+def test_chunks_read_back_in_order(tmp_path):
+    paths = write_chunks(generate_network_load_columns, str(tmp_path), 2500, chunk_size=1000, seed=5)
+    assert len(paths) == 3
+
+    chunks = list(read_chunks(str(tmp_path)))
+    assert [len(chunk['load_kw']) for chunk in chunks] == [1000, 1000, 500]
+    # Every chunk is its own seeded draw; only the first carries the weekly grid
+    expected = generate_network_load_columns(500, seed=7, include_week_grid=False)
+    np.testing.assert_array_equal(chunks[2]['load_kw'], expected['load_kw'])
+    np.testing.assert_array_equal(chunks[0]['load_kw'], generate_network_load_columns(1000, seed=5)['load_kw'])
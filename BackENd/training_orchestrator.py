@@ -0,0 +1,123 @@
+"""
+Parallel Training Orchestrator
+Trains all ML models concurrently in a process pool (forests also build
+their trees in parallel, the cores split between the workers) and reports
+the wall time of each model
+
+Usage:
+    python training_orchestrator.py            # train missing/stale models
+    python training_orchestrator.py --force    # retrain everything
+"""
+
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from model_config import fit_n_jobs
+
+MODEL_NAMES = ['network_load_rf', 'network_load_lr', 'patch_classifier']
+
+
+def _get_model(name):
+    """Global instance of a model by name (imported lazily inside workers)"""
+    if name == 'network_load_rf':
+        from ml_predictor import predictor
+        return predictor
+    if name == 'network_load_lr':
+        from network_load_predictor import network_load_predictor
+        return network_load_predictor
+    if name == 'patch_classifier':
+        from patch_classifier import patch_classifier
+        return patch_classifier
+    raise ValueError(f"Unknown model: {name}")
+
+
+def _train_in_worker(name, network_loads, n_jobs, force):
+    """
+    Train (or load) one model inside a worker process
+    Runs at module level so it can be pickled by the process pool
+    """
+    model = _get_model(name)
+    start_time = time.time()
+
+    if name == 'network_load_rf':
+        model.fit_n_jobs = n_jobs
+        source = model.warm_start(network_loads, force=force)
+    elif name == 'patch_classifier':
+        model.fit_n_jobs = n_jobs
+        source = model.warm_start(force=force)
+    else:
+        source = model.warm_start(force=force)
+
+    payload, metadata = model.get_artifact()
+    return {
+        'name': name,
+        'source': source,
+        'wall_seconds': round(time.time() - start_time, 3),
+        'payload': payload,
+        'metadata': metadata
+    }
+
+
+def train_all(network_loads=None, max_workers=None, n_jobs=None, force=False, apply=True):
+    """
+    Train every model concurrently in separate processes
+
+    Args:
+        network_loads: NetworkLoad history for the RF model (fetched if None)
+        max_workers: Process pool size (defaults to one process per model)
+        n_jobs: Tree-building threads per forest fit (the cores divided by the
+                worker processes if None); the saved models predict with one
+        force: Retrain even if a matching artifact exists
+        apply: Load the trained models into this process's global instances
+
+    Returns:
+        dict report with per-model source and wall time, plus the total
+    """
+    if network_loads is None:
+        from supabase_client import supabase_fetcher
+        network_loads = supabase_fetcher.fetch_network_loads()
+
+    max_workers = max_workers or len(MODEL_NAMES)
+    if n_jobs is None:
+        n_jobs = fit_n_jobs(max_workers)
+
+    print(f"Training {len(MODEL_NAMES)} ML models in parallel...")
+    start_time = time.time()
+    report = {'models': {}}
+
+    # spawn: never fork a process that may already run warm-up threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            name: executor.submit(_train_in_worker, name, network_loads, n_jobs, force)
+            for name in MODEL_NAMES
+        }
+        for name, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Training {name} failed: {e}")
+                report['models'][name] = {'source': 'failed', 'error': str(e)}
+                continue
+
+            if apply:
+                _apply_result(result)
+            report['models'][name] = {
+                'source': result['source'],
+                'wall_seconds': result['wall_seconds']
+            }
+            print(f"✅ {name} {result['source']} in {result['wall_seconds']:.2f}s")
+
+    report['total_wall_seconds'] = round(time.time() - start_time, 3)
+    print(f"All models ready in {report['total_wall_seconds']:.2f}s")
+    return report
+
+
+def _apply_result(result):
+    """Load a model trained in a worker into this process's global instance"""
+    _get_model(result['name']).load_artifact(result['payload'], result['metadata'])
+
+
+if __name__ == '__main__':
+    train_all(force='--force' in sys.argv, apply=False)